@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Extraction Backend Parity Check
+Compares sections detected by the PyMuPDF and pdfplumber backends on the bundled PDFs.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.extractor import PDFExtractor
+
+# The two layout backends; 'text' has no font data and is not expected to match them
+BACKENDS = ('pymupdf', 'pdfplumber')
+
+
+def section_keys(extractor: PDFExtractor, pdf_path: str):
+    """Extract a PDF and return its detected sections as (page, title) keys plus timing."""
+    start_time = time.perf_counter()
+    _, sections = extractor.extract_sections(pdf_path)
+    elapsed = time.perf_counter() - start_time
+    keys = {(int(sections.page_numbers[i]), ' '.join(sections.title(i).split())) for i in range(len(sections))}
+    return keys, elapsed
+
+
+def main():
+    """Run both backends over the input PDFs and report section overlap."""
+    parser = argparse.ArgumentParser(description='Compare PDF extraction backends')
+    parser.add_argument('--input-dir', default='input', help='Directory containing PDF files (default: input)')
+    parser.add_argument('--min-jaccard', type=float, default=0.8,
+                        help='Fail if the overall section Jaccard similarity drops below this (default: 0.8)')
+    args = parser.parse_args()
+
+    pdf_files = sorted(Path(args.input_dir).rglob('*.pdf'))
+    if not pdf_files:
+        print(f"Error: No PDF files found in '{args.input_dir}'")
+        return 1
+
+    extractors = {backend: PDFExtractor(backend=backend) for backend in BACKENDS}
+    totals = {backend: 0.0 for backend in BACKENDS}
+    shared = union = 0
+
+    print(f"{'Document':<50} {'pymupdf':>8} {'plumber':>8} {'shared':>7} {'jaccard':>8}")
+    print("-" * 85)
+    for pdf in pdf_files:
+        fast, fast_time = section_keys(extractors['pymupdf'], str(pdf))
+        slow, slow_time = section_keys(extractors['pdfplumber'], str(pdf))
+        totals['pymupdf'] += fast_time
+        totals['pdfplumber'] += slow_time
+
+        both = len(fast & slow)
+        either = len(fast | slow)
+        shared += both
+        union += either
+        jaccard = both / either if either else 1.0
+        print(f"{pdf.name[:50]:<50} {len(fast):>8} {len(slow):>8} {both:>7} {jaccard:>8.3f}")
+
+    overall = shared / union if union else 1.0
+    print("-" * 85)
+    print(f"Overall section Jaccard: {overall:.3f}")
+    for backend in BACKENDS:
+        print(f"{backend:<12} {totals[backend]:.2f}s")
+    if totals['pymupdf']:
+        print(f"Speedup: {totals['pdfplumber'] / totals['pymupdf']:.1f}x")
+
+    if overall < args.min_jaccard:
+        print(f"❌ Parity below threshold ({overall:.3f} < {args.min_jaccard})")
+        return 1
+    print("✅ Backends agree within threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+BM25 vs TF-IDF Benchmark
+Compares query latency and top-k overlap of the BM25 inverted index against the TF-IDF index.
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import generate_collection
+from src.extractor import PDFExtractor
+from src.ranker import RelevanceRanker, top_k_indices
+from src.sections import SectionStore
+
+QUERIES = [
+    ("HR professional", "Create and manage fillable forms for onboarding and compliance"),
+    ("Travel Planner", "Plan a trip of 4 days for a group of 10 college friends"),
+    ("Food Contractor", "Prepare a vegetarian buffet-style dinner menu for a corporate gathering"),
+    ("Student", "Learn how to export PDFs to other formats"),
+    ("Accessibility officer", "Check documents for accessibility and add alternate text"),
+]
+
+
+def time_per_query(function, texts, repeat: int) -> float:
+    """Best-of-repeat mean milliseconds per query."""
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for text in texts:
+            function(text)
+        best = min(best, (time.perf_counter() - start_time) / len(texts))
+    return best * 1000
+
+
+def main():
+    """Index one collection with both engines, then time queries and compare their top k."""
+    parser = argparse.ArgumentParser(description='Compare the BM25 and TF-IDF rankers')
+    parser.add_argument('--input-dir', default=str(ROOT / 'input'), help='PDF collection (default: input)')
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help='Use a generated collection of this many 20-page documents instead')
+    parser.add_argument('--replicate', type=int, default=1,
+                        help='Repeat the extracted sections N times to simulate a larger corpus (default: 1)')
+    parser.add_argument('--top-k', type=int, default=15, help='Ranking depth compared (default: 15)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed passes over the queries (default: 5)')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        pdf_paths = generate_collection(tempfile.mkdtemp(prefix='synthetic-'), args.synthetic, 20, 3,
+                                        ('helv', 'tiro', 'cour'))
+    else:
+        pdf_paths = sorted(str(path) for path in Path(args.input_dir).rglob('*.pdf'))
+    extractor = PDFExtractor()
+    sections = SectionStore.concat([extractor.extract_sections(path)[1] for path in pdf_paths] * args.replicate)
+    texts = [f"{persona} {job}" for persona, job in QUERIES]
+    print(f"{len(sections)} sections from {len(pdf_paths)} documents, {len(texts)} queries, top {args.top_k}")
+
+    tfidf, bm25 = RelevanceRanker('tfidf'), RelevanceRanker('bm25')
+    for name, ranker in (('tfidf', tfidf), ('bm25', bm25)):
+        start_time = time.perf_counter()
+        ranker.build_index(sections)
+        print(f"  {name:<5} index built in {time.perf_counter() - start_time:6.3f} s")
+    print(f"  BM25 vocabulary {len(bm25.index.vocabulary)} terms, {len(bm25.index.doc_ids)} postings "
+          f"(TF-IDF capped at {len(tfidf.index.vocabulary)} features)")
+
+    k = args.top_k
+    latencies = {
+        'tfidf (score all + top-k)': time_per_query(lambda t: top_k_indices(tfidf.index.score(t), k), texts, args.repeat),
+        'bm25 (score postings + top-k)': time_per_query(lambda t: top_k_indices(bm25.index.score(t), k), texts, args.repeat),
+        'bm25 (max-score pruned top-k)': time_per_query(lambda t: bm25.index.top_k(t, k), texts, args.repeat),
+    }
+    print("\nLatency per query")
+    for name, ms in latencies.items():
+        print(f"  {name:<32} {ms:8.3f} ms")
+
+    print(f"\nTop-{k} overlap with TF-IDF")
+    overlaps = []
+    for (persona, _), text in zip(QUERIES, texts):
+        expected = set(top_k_indices(tfidf.index.score(text), k).tolist())
+        pruned, _ = bm25.index.top_k(text, k)
+        assert np.array_equal(pruned, top_k_indices(bm25.index.score(text), k)), "pruned top-k differs"
+        overlaps.append(len(expected & set(pruned.tolist())) / k)
+        print(f"  {persona:<24} {overlaps[-1]:6.2f}")
+    print(f"  {'mean':<24} {np.mean(overlaps):6.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
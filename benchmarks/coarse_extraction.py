@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-Fine Extraction Benchmark
+Compares full extraction with page-budgeted two-phase extraction: wall time, pages analysed
+and how many of the full run's top sections the budgeted run still returns.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.extractor import BACKENDS
+from src.processor import DocumentIntelligenceProcessor
+
+QUERIES = [
+    ("HR professional", "Create and manage fillable forms for onboarding and compliance"),
+    ("Travel Planner", "Plan a trip of 4 days for a group of 10 college friends"),
+    ("Food Contractor", "Prepare a vegetarian buffet-style dinner menu for a corporate gathering"),
+]
+
+
+def run(pdf_paths, persona: str, job: str, backend: str, budget):
+    """(seconds, output) of one uncached, unindexed single-query run."""
+    processor = DocumentIntelligenceProcessor(backend=backend, workers=1, cache_dir=None, index_dir=None,
+                                              page_budget=budget)
+    start_time = time.perf_counter()
+    output = processor.process_documents(pdf_paths, persona, job)
+    return time.perf_counter() - start_time, output
+
+
+def top_sections(output):
+    return {(s['document_name'], s['page_number'], s['section_title']) for s in output['extracted_sections']}
+
+
+def main():
+    """Run every query in full and with each page budget, and report time and top-section recall."""
+    parser = argparse.ArgumentParser(description='Compare full and coarse-to-fine extraction')
+    parser.add_argument('--input-dir', default=str(ROOT / 'input'), help='PDF collection (default: input)')
+    parser.add_argument('--backend', choices=BACKENDS, default='pdfplumber',
+                        help='Extraction backend for phase two (default: pdfplumber)')
+    parser.add_argument('--budgets', type=int, nargs='+', default=[20, 40, 80],
+                        help='Page budgets to compare with the full run (default: 20 40 80)')
+    args = parser.parse_args()
+
+    pdf_paths = sorted(str(path) for path in Path(args.input_dir).rglob('*.pdf'))
+    results = []
+    for persona, job in QUERIES:
+        full_seconds, full = run(pdf_paths, persona, job, args.backend, None)
+        reference = top_sections(full)
+        rows = [(persona, 'full', full_seconds, None, None, 1.0)]
+        for budget in args.budgets:
+            seconds, output = run(pdf_paths, persona, job, args.backend, budget)
+            selection = output['metadata']['page_selection']
+            recall = len(reference & top_sections(output)) / len(reference) if reference else 1.0
+            rows.append((persona, budget, seconds, selection['pages_analyzed'], selection['pages_total'], recall))
+        results.extend(rows)
+
+    print(f"\n{'query':<18} {'budget':>6} {'seconds':>8} {'pages':>10} {'top recall':>10}")
+    for persona, budget, seconds, analysed, total, recall in results:
+        pages = f"{analysed}/{total}" if analysed is not None else 'all'
+        print(f"{persona[:18]:<18} {budget!s:>6} {seconds:>8.2f} {pages:>10} {recall:>10.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Hashing Ranker Memory Benchmark
+Compares peak indexing memory of the fitted TF-IDF vectorizer and the streaming hashing builder.
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.extractor import PDFExtractor
+from src.ranker import RelevanceRanker
+from src.sections import SectionStore
+
+
+def measure(function):
+    """Return (seconds, peak traced MB, MB of the resulting section matrix) of one indexing call."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    index = function()
+    seconds = time.perf_counter() - start_time
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    matrix = index.matrix
+    matrix_bytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    return seconds, peak / (1024 * 1024), matrix_bytes / (1024 * 1024)
+
+
+def main():
+    """Index growing copies of the input sections with each engine and report peak memory."""
+    parser = argparse.ArgumentParser(description='Compare indexing memory of the tfidf and hashing rankers')
+    parser.add_argument('--input-dir', default=str(ROOT / 'input'), help='PDF collection (default: input)')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 4, 16],
+                        help='Corpus sizes as multiples of the input sections (default: 1 4 16)')
+    args = parser.parse_args()
+
+    extractor = PDFExtractor()
+    documents = [extractor.extract_sections(str(path))[1] for path in sorted(Path(args.input_dir).rglob('*.pdf'))]
+    print(f"{sum(len(sections) for sections in documents)} sections from {len(documents)} documents per copy")
+    print("Peak traced memory while indexing, split into the section matrix kept afterwards")
+    print("and the transient/vocabulary overhead on top of it (MB)\n")
+    print(f"{'copies':>6} {'sections':>9}  {'tfidf matrix':>12} {'overhead':>8} {'s':>6}  "
+          f"{'hashing matrix':>14} {'overhead':>8} {'s':>6}")
+
+    for scale in args.scales:
+        # Tag every copy with its own terms so the vocabulary keeps growing with the corpus
+        corpus = [
+            SectionStore.from_columns(
+                [sections.document_name(i) for i in range(len(sections))], sections.page_numbers,
+                [sections.title(i) for i in range(len(sections))],
+                [f"{sections.content(i)} copy{copy}tag sec{copy}x{i}" for i in range(len(sections))])
+            for copy in range(scale) for sections in documents
+        ]
+        flat = SectionStore.concat(corpus)
+
+        tfidf_seconds, tfidf_peak, tfidf_matrix = measure(lambda: RelevanceRanker('tfidf').build_index(flat))
+
+        def stream():
+            builder = RelevanceRanker('hashing').index_builder()
+            for sections in corpus:
+                builder.add(sections)
+            return builder.finish()
+
+        hashing_seconds, hashing_peak, hashing_matrix = measure(stream)
+        print(f"{scale:>6} {len(flat):>9}  {tfidf_matrix:>12.1f} {tfidf_peak - tfidf_matrix:>8.1f} "
+              f"{tfidf_seconds:>6.2f}  {hashing_matrix:>14.1f} {hashing_peak - hashing_matrix:>8.1f} "
+              f"{hashing_seconds:>6.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Index Benchmark
+Opens one stored corpus index from several processes, memory-mapped or read into RAM,
+and compares load time, query latency and private vs page-cache-backed memory.
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+from typing import Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+QUERIES = [
+    "HR professional Create and manage fillable forms for onboarding and compliance",
+    "Travel Planner Plan a trip of 4 days for a group of 10 college friends",
+    "Food Contractor Prepare a vegetarian buffet-style dinner menu for a corporate gathering",
+]
+
+
+def memory_mb() -> Dict[str, Optional[float]]:
+    """Private (anonymous) and file-backed resident memory of this process from /proc (Linux only)."""
+    fields = {'RssAnon': None, 'RssFile': None}
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in fields:
+                    fields[name] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return {'private_mb': fields['RssAnon'], 'file_backed_mb': fields['RssFile']}
+
+
+def open_and_query(engine: str, index_dir: str, mmap: bool, start_barrier) -> Dict[str, Any]:
+    """Load the index in this (fresh) process, answer the queries and report timings and memory."""
+    from src.ranker import RelevanceRanker
+    from src.index import CorpusIndex
+    from src.bm25 import BM25Index
+    from src.hashing import HashingIndex
+
+    start_barrier.wait()  # let every reader open the index at the same time
+    before = memory_mb()
+    start_time = time.perf_counter()
+    index = {'tfidf': CorpusIndex, 'bm25': BM25Index, 'hashing': HashingIndex}[engine].load(index_dir, mmap=mmap)
+    load_seconds = time.perf_counter() - start_time
+
+    ranker = RelevanceRanker(engine)
+    start_time = time.perf_counter()
+    for text in QUERIES:
+        ranker.rank_index(index, text, 15)
+    query_ms = (time.perf_counter() - start_time) * 1000 / len(QUERIES)
+    after = memory_mb()
+    growth = {name: (round(after[name] - before[name], 1) if after[name] is not None else None) for name in after}
+    return {'load_seconds': round(load_seconds, 4), 'query_ms': round(query_ms, 2), **growth}
+
+
+def main():
+    """Build a replicated corpus index once, then open it from concurrent processes both ways."""
+    parser = argparse.ArgumentParser(description='Compare memory-mapped and in-RAM loading of a stored index')
+    parser.add_argument('--input-dir', default=str(ROOT / 'input'), help='PDF collection (default: input)')
+    parser.add_argument('--replicate', type=int, default=100,
+                        help='Repeat the extracted sections N times to simulate a larger corpus (default: 100)')
+    parser.add_argument('--ranker', choices=('tfidf', 'bm25', 'hashing'), default='tfidf',
+                        help='Engine whose index is stored (default: tfidf)')
+    parser.add_argument('--processes', type=int, default=2, help='Concurrent reader processes (default: 2)')
+    args = parser.parse_args()
+
+    from src.extractor import PDFExtractor
+    from src.ranker import RelevanceRanker
+    from src.sections import SectionStore
+
+    extractor = PDFExtractor()
+    pdf_paths = sorted(str(path) for path in Path(args.input_dir).rglob('*.pdf'))
+    stores = [extractor.extract_sections(path)[1] for path in pdf_paths]
+    sections = SectionStore.concat(stores * args.replicate)
+    index_dir = tempfile.mkdtemp(prefix='mmap-index-')
+    start_time = time.perf_counter()
+    RelevanceRanker(args.ranker).build_index(sections).save(index_dir)
+    size_mb = sum(path.stat().st_size for path in Path(index_dir).iterdir()) / (1024 * 1024)
+    print(f"{len(sections)} sections, {args.ranker} index of {size_mb:.1f} MB built and saved in "
+          f"{time.perf_counter() - start_time:.1f} s\n")
+    del sections, stores
+
+    print(f"{'mode':<6} {'process':>7} {'load s':>8} {'ms/query':>9} {'private MB':>11} {'page cache MB':>14}")
+    context = multiprocessing.get_context('spawn')
+    for mmap in (True, False):
+        with context.Manager() as manager:
+            barrier = manager.Barrier(args.processes)
+            with ProcessPoolExecutor(max_workers=args.processes, mp_context=context) as pool:
+                futures = [pool.submit(open_and_query, args.ranker, index_dir, mmap, barrier)
+                           for _ in range(args.processes)]
+                for number, future in enumerate(futures, 1):
+                    result = future.result()
+                    print(f"{'mmap' if mmap else 'ram':<6} {number:>7} {result['load_seconds']:>8.3f} "
+                          f"{result['query_ms']:>9.2f} {result['private_mb']!s:>11} {result['file_backed_mb']!s:>14}")
+    print("\nFile-backed pages of a memory-mapped index live in the shared OS page cache; "
+          "private memory is per process.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
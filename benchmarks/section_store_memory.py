@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Section Store Memory Benchmark
+Compares memory and sort time of sections held as a list of dicts and as a columnar SectionStore.
+"""
+
+import gc
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.extractor import PDFExtractor
+from src.sections import SectionStore
+
+
+def traced_mb(function):
+    """(result, MB still allocated by function's result) measured with tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current / (1024 * 1024)
+
+
+def best_ms(function, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start_time)
+    return best * 1000
+
+
+def main():
+    """Hold growing copies of the input sections both ways and report memory and full-sort time."""
+    parser = argparse.ArgumentParser(description='Compare section dicts with the columnar SectionStore')
+    parser.add_argument('--input-dir', default=str(ROOT / 'input'), help='PDF collection (default: input)')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 50],
+                        help='Corpus sizes as multiples of the input sections (default: 1 10 50)')
+    args = parser.parse_args()
+
+    extractor = PDFExtractor()
+    documents = [extractor.extract_sections(str(path))[1] for path in sorted(Path(args.input_dir).rglob('*.pdf'))]
+    print(f"{sum(len(store) for store in documents)} sections from {len(documents)} documents per copy\n")
+    print(f"{'copies':>6} {'sections':>9}  {'dicts MB':>9} {'store MB':>9} {'ratio':>6}  "
+          f"{'dict sort ms':>12} {'argsort ms':>10}")
+
+    rng = np.random.default_rng(0)
+    for scale in args.scales:
+        # to_dicts() decodes fresh strings for every copy, as extraction would have created them
+        dicts, dicts_mb = traced_mb(lambda: [section for store in documents for _ in range(scale)
+                                             for section in store.to_dicts()])
+        store, store_mb = traced_mb(lambda: SectionStore.concat([store for store in documents for _ in range(scale)]))
+
+        scores = rng.random(len(store)).astype(np.float32)
+        for section, score in zip(dicts, scores.tolist()):
+            section['relevance_score'] = score
+        dict_sort = best_ms(lambda: sorted(dicts, key=lambda section: section['relevance_score'], reverse=True))
+        argsort = best_ms(lambda: np.argsort(-scores, kind='stable'))
+        print(f"{scale:>6} {len(store):>9}  {dicts_mb:>9.1f} {store_mb:>9.1f} {dicts_mb / store_mb:>6.1f}  "
+              f"{dict_sort:>12.2f} {argsort:>10.2f}")
+        del dicts, store
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Query Server Latency Benchmark
+Compares per-query latency of the resident server against a cold `main.py` run.
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import urllib.error
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from client import request
+
+QUERIES = [
+    ("HR professional", "Create and manage fillable forms for onboarding and compliance"),
+    ("Travel Planner", "Plan a trip of 4 days for a group of 10 college friends"),
+    ("Food Contractor", "Prepare a vegetarian buffet-style dinner menu for a corporate gathering"),
+    ("Student", "Learn how to export PDFs to other formats"),
+]
+
+
+def wait_for_server(url: str, process: subprocess.Popen, timeout: float) -> float:
+    """Poll /health until the server answers; return the seconds it took to come up."""
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            request(url, '/health', timeout=1.0)
+            return time.perf_counter() - start_time
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.1)
+    raise RuntimeError("server did not start in time")
+
+
+def timed_query(url: str, i: int) -> float:
+    """Send one query and return its client-side latency in milliseconds."""
+    persona, job = QUERIES[i % len(QUERIES)]
+    start_time = time.perf_counter()
+    result = request(url, '/query', {'persona': persona, 'job_to_be_done': f"{job} #{i}"})
+    if 'error' in result:
+        raise RuntimeError(result['error'])
+    return (time.perf_counter() - start_time) * 1000
+
+
+def main():
+    """Start a server, load it with queries, then time one cold CLI run for comparison."""
+    parser = argparse.ArgumentParser(description='Benchmark the query server against the CLI')
+    parser.add_argument('--input-dir', default='input', help='Directory containing PDF files (default: input)')
+    parser.add_argument('--max-docs', type=int, default=10, help='Documents to load (default: 10)')
+    parser.add_argument('--port', type=int, default=8799, help='Port for the benchmark server (default: 8799)')
+    parser.add_argument('--queries', type=int, default=200, help='Queries to send (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads (default: 8)')
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    common = [sys.executable, str(ROOT / 'main.py'), '--input-dir', args.input_dir,
+              '--max-docs', str(args.max_docs), '--output-dir', tempfile.mkdtemp(prefix='bench-')]
+
+    server = subprocess.Popen(common + ['--serve', '--port', str(args.port)],
+                              cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        startup = wait_for_server(url, server, timeout=300)
+        info = request(url, '/health')
+        print(f"Server ready in {startup:.2f}s: {info['sections']} sections from {info['documents']} documents")
+
+        timed_query(url, 0)  # warm-up
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = np.array(list(pool.map(lambda i: timed_query(url, i), range(args.queries))))
+        elapsed = time.perf_counter() - start_time
+    finally:
+        server.terminate()
+        server.wait()
+
+    persona, job = QUERIES[0]
+    start_time = time.perf_counter()
+    subprocess.run(common + ['--persona', persona, '--job-to-be-done', job],
+                   cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    cli_ms = (time.perf_counter() - start_time) * 1000
+
+    print(f"\n{args.queries} queries, concurrency {args.concurrency}: {args.queries / elapsed:.1f} queries/s")
+    print(f"Server latency  p50 {np.percentile(latencies, 50):8.1f} ms   "
+          f"p95 {np.percentile(latencies, 95):8.1f} ms   max {latencies.max():8.1f} ms")
+    print(f"Cold CLI run        {cli_ms:8.1f} ms   "
+          f"({cli_ms / np.percentile(latencies, 50):.0f}x the server p50)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+Measures the CLI's module import time with `python -X importtime`, for --help, for a query answered
+from a stored corpus index and the section cache, and for a repeated query answered from the result
+cache, and fails when a scenario exceeds its import budget
+or loads a library it should not need.
+"""
+
+import re
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.options import RANKERS
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$', re.MULTILINE)
+PDF_LIBRARIES = ('pymupdf', 'fitz', 'pdfplumber', 'pdfminer')
+# Top-level packages a scenario must not import: --help needs no part of the pipeline, and a
+# cached query or result cache hit neither parses PDFs nor fits a vectorizer
+FORBIDDEN = {
+    'help': ('numpy', 'scipy', 'sklearn') + PDF_LIBRARIES,
+    'cached_query': ('sklearn',) + PDF_LIBRARIES,
+    'result_cache_hit': ('sklearn',) + PDF_LIBRARIES
+}
+QUERY = ("Travel Planner", "Plan a trip of 4 days for a group of 10 college friends")
+
+
+def import_profile(command: List[str]) -> Dict[str, Any]:
+    """Run main.py with command under -X importtime; total import ms, heaviest top-level imports and packages."""
+    start_time = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-X', 'importtime', str(ROOT / 'main.py')] + command,
+                               cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - start_time
+    if completed.returncode != 0:
+        raise RuntimeError(f"main.py {' '.join(command)} exited with code {completed.returncode}")
+    lines = IMPORT_LINE.findall(completed.stderr)
+    top_level = sorted(((int(cumulative) / 1000, name) for _, cumulative, indent, name in lines if not indent),
+                       reverse=True)
+    return {
+        'import_ms': sum(int(self_us) for self_us, _, _, _ in lines) / 1000,
+        'seconds': seconds,
+        'heaviest': top_level[:5],
+        'packages': {name.split('.')[0] for _, _, _, name in lines}
+    }
+
+
+def best_profile(command: List[str], repeat: int) -> Dict[str, Any]:
+    """The run with the lowest total import time out of repeat."""
+    return min((import_profile(command) for _ in range(repeat)), key=lambda profile: profile['import_ms'])
+
+
+def main():
+    """Profile every scenario, report its imports and check it against its budget."""
+    parser = argparse.ArgumentParser(description='Measure and gate CLI import time')
+    parser.add_argument('--input-dir', default=str(ROOT / 'input'), help='PDF collection (default: input)')
+    parser.add_argument('--max-docs', type=int, default=10, help='Documents in the cached query (default: 10)')
+    parser.add_argument('--ranker', choices=RANKERS, default='tfidf',
+                        help='Ranking engine of the cached query (default: tfidf); hashing needs '
+                             'scikit-learn to hash the query, so it is allowed to import it')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario, best is kept (default: 5)')
+    parser.add_argument('--help-budget-ms', type=float, default=150,
+                        help='Import time budget for --help (default: 150)')
+    parser.add_argument('--query-budget-ms', type=float, default=800,
+                        help='Import time budget for a cached query and for a result cache hit (default: 800)')
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix='startup-'))
+    query = ['--input-dir', args.input_dir, '--max-docs', str(args.max_docs), '--ranker', args.ranker,
+             '--cache-dir', str(work_dir / 'cache'), '--index-dir', str(work_dir / 'index'),
+             '--result-cache-dir', str(work_dir / 'results'),
+             '--output-dir', str(work_dir / 'output'), '--persona', QUERY[0], '--job-to-be-done', QUERY[1]]
+    import_profile(query)  # fills the section and result caches and stores the index
+    scenarios = {
+        'help': (['--help'], args.help_budget_ms),
+        'cached_query': (query + ['--no-result-cache'], args.query_budget_ms),
+        'result_cache_hit': (query, args.query_budget_ms)
+    }
+
+    failures = []
+    for name, (command, budget) in scenarios.items():
+        profile = best_profile(command, args.repeat)
+        forbidden = FORBIDDEN[name]
+        if name != 'help' and args.ranker == 'hashing':
+            forbidden = tuple(package for package in forbidden if package != 'sklearn')
+        loaded = sorted(profile['packages'] & set(forbidden))
+        over = profile['import_ms'] > budget
+        status = 'OVER BUDGET' if over else ('FORBIDDEN IMPORTS' if loaded else 'ok')
+        print(f"\n{name}: {profile['import_ms']:.0f} ms importing (budget {budget:.0f} ms), "
+              f"{profile['seconds']:.2f} s wall  {status}")
+        for cumulative_ms, module in profile['heaviest']:
+            print(f"  {module:<40} {cumulative_ms:>8.1f} ms")
+        if over:
+            failures.append(f"{name}: {profile['import_ms']:.0f} ms importing, budget {budget:.0f} ms")
+        if loaded:
+            failures.append(f"{name}: imported {', '.join(loaded)}")
+
+    if failures:
+        print(f"\n{len(failures)} failure(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nAll scenarios within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Times the extractor, ranker and full processor on a synthetic collection and the
+bundled input set, and gates the results against a stored baseline.
+"""
+
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import contextlib
+import tempfile
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import FONT_FAMILIES, generate_collection
+from src.instrumentation import peak_rss_mb
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+CASES = ('extractor', 'ranker', 'processor')
+QUERIES = [
+    ("HR professional", "Create and manage fillable forms for onboarding and compliance"),
+    ("Travel Planner", "Plan a trip of 4 days for a group of 10 college friends"),
+    ("Food Contractor", "Prepare a vegetarian buffet-style dinner menu for a corporate gathering"),
+]
+
+
+def _best_of(repeat: int, function):
+    """Run function repeat times; return (fastest seconds, last result)."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start_time)
+    return best, result
+
+
+def run_case(case: str, pdf_paths: List[str], repeat: int) -> Dict[str, Any]:
+    """Time one benchmark case; runs in a fresh process so peak RSS belongs to this case alone."""
+    from src.extractor import PDFExtractor
+    from src.ranker import RelevanceRanker
+    from src.processor import DocumentIntelligenceProcessor
+    from src.sections import SectionStore
+
+    extractor = PDFExtractor()
+    if case == 'extractor':
+        seconds, results = _best_of(repeat, lambda: [extractor.extract_sections(path) for path in pdf_paths])
+        pages = sum(page_count for page_count, _ in results)
+        sections = sum(len(found) for _, found in results)
+        metrics = {'seconds': seconds, 'pages': pages, 'sections': sections,
+                   'pages_per_second': pages / seconds, 'sections_per_second': sections / seconds}
+
+    elif case == 'ranker':
+        all_sections = SectionStore.concat([extractor.extract_sections(path)[1] for path in pdf_paths])
+        ranker = RelevanceRanker()
+        seconds, _ = _best_of(repeat, lambda: ranker.build_index(all_sections))
+        query_texts = [f"{persona} {job}" for persona, job in QUERIES]
+        query_seconds, _ = _best_of(repeat, lambda: [ranker.index.score(text) for text in query_texts])
+        metrics = {'seconds': seconds, 'sections': len(all_sections),
+                   'sections_per_second': len(all_sections) / seconds,
+                   'query_ms': query_seconds * 1000 / len(QUERIES)}
+
+    elif case == 'processor':
+        processor = DocumentIntelligenceProcessor(workers=1, cache_dir=None, index_dir=None)
+        persona, job = QUERIES[0]
+        seconds, output = _best_of(repeat, lambda: processor.process_documents(pdf_paths, persona, job))
+        pages = sum(info['pages'] for info in output['metadata']['input_files'])
+        sections = output['metadata']['total_sections_found']
+        metrics = {'seconds': seconds, 'pages': pages, 'sections': sections,
+                   'pages_per_second': pages / seconds, 'sections_per_second': sections / seconds}
+
+    else:
+        raise ValueError(f"unknown benchmark case {case!r}")
+
+    metrics['peak_rss_mb'] = peak_rss_mb()
+    return {name: round(value, 4) if isinstance(value, float) else value for name, value in metrics.items()}
+
+
+def _run_isolated(case: str, pdf_paths: List[str], repeat: int) -> Dict[str, Any]:
+    """Run a case in a newly spawned interpreter (fork would inherit this process's memory).
+
+    The pipeline's progress output is discarded so only the suite's report is printed.
+    """
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_run_quietly, case, pdf_paths, repeat).result()
+
+
+def _run_quietly(case: str, pdf_paths: List[str], repeat: int) -> Dict[str, Any]:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_case(case, pdf_paths, repeat)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            memory_threshold: float, latency_tolerance_ms: float = 0.0) -> List[str]:
+    """Return a message for every metric that regressed past its threshold.
+
+    Query latency may also grow by latency_tolerance_ms in absolute terms, since a relative
+    threshold on a sub-millisecond timing only measures timer noise.
+    """
+    regressions = []
+    for dataset, current in results['datasets'].items():
+        reference = baseline.get('datasets', {}).get(dataset)
+        if reference is None:
+            print(f"  {dataset}: not in baseline, skipped")
+            continue
+        if reference['config'] != current['config']:
+            print(f"  {dataset}: baseline was recorded with different settings, skipped")
+            continue
+        for case, metrics in current['cases'].items():
+            for name, value in metrics.items():
+                old = reference['cases'].get(case, {}).get(name)
+                if not old or not isinstance(value, (int, float)):
+                    continue
+                if name.endswith('_per_second'):
+                    limit, worse = old * (1 - threshold), value < old * (1 - threshold)
+                elif name == 'query_ms':
+                    limit = max(old * (1 + threshold), old + latency_tolerance_ms)
+                    worse = value > limit
+                elif name == 'peak_rss_mb':
+                    limit, worse = old * (1 + memory_threshold), value > old * (1 + memory_threshold)
+                else:
+                    continue
+                status = 'REGRESSION' if worse else 'ok'
+                print(f"  {dataset}/{case:<10} {name:<20} {value:>12.2f}  baseline {old:>12.2f}  "
+                      f"limit {limit:>12.2f}  {status}")
+                if worse:
+                    regressions.append(f"{dataset}/{case} {name}: {value:.2f} (baseline {old:.2f})")
+    return regressions
+
+
+def main():
+    """Generate the synthetic collection, run every case, then report and gate against the baseline."""
+    parser = argparse.ArgumentParser(description='Run the benchmark suite and compare it against a baseline')
+    parser.add_argument('--documents', type=int, default=10, help='Synthetic documents (default: 10)')
+    parser.add_argument('--pages', type=int, default=20, help='Pages per synthetic document (default: 20)')
+    parser.add_argument('--headings', type=int, default=3, help='Headings per synthetic page (default: 3)')
+    parser.add_argument('--fonts', nargs='+', choices=sorted(FONT_FAMILIES), default=sorted(FONT_FAMILIES),
+                        help='Font families for the synthetic documents (default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='Synthetic collection seed (default: 0)')
+    parser.add_argument('--input-dir', default=str(ROOT / 'input'), help='Real PDF collection (default: input)')
+    parser.add_argument('--skip-input', action='store_true', help='Only benchmark the synthetic collection')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES), help='Cases to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per case, best is kept (default: 3)')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON (default: benchmarks/baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Write these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help='Allowed fractional slowdown in throughput and query latency (default: 0.3)')
+    parser.add_argument('--latency-tolerance-ms', type=float, default=0.5,
+                        help='Allowed absolute growth in query latency, for sub-millisecond timings (default: 0.5)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25,
+                        help='Allowed fractional growth in peak RSS (default: 0.25)')
+    parser.add_argument('--output', help='Also write the results JSON to this file')
+    args = parser.parse_args()
+
+    synthetic_dir = tempfile.mkdtemp(prefix='synthetic-')
+    synthetic_config = {'documents': args.documents, 'pages': args.pages, 'headings': args.headings,
+                        'fonts': args.fonts, 'seed': args.seed}
+    datasets = {'synthetic': (generate_collection(synthetic_dir, args.documents, args.pages, args.headings,
+                                                  args.fonts, args.seed), synthetic_config)}
+    if not args.skip_input:
+        input_paths = sorted(str(path) for path in Path(args.input_dir).rglob('*.pdf'))
+        if input_paths:
+            datasets['input'] = (input_paths, {'documents': len(input_paths),
+                                               'files': [Path(path).name for path in input_paths]})
+        else:
+            print(f"Warning: no PDFs under {args.input_dir}, skipping the input collection")
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'datasets': {}
+    }
+    for dataset, (pdf_paths, config) in datasets.items():
+        print(f"\n{dataset}: {len(pdf_paths)} documents")
+        cases = {}
+        for case in args.cases:
+            cases[case] = _run_isolated(case, pdf_paths, args.repeat)
+            metrics = cases[case]
+            throughput = (f"{metrics['pages_per_second']:8.1f} pages/s  " if 'pages_per_second' in metrics
+                          else f"{metrics['query_ms']:8.2f} ms/query ")
+            print(f"  {case:<10} {metrics['seconds']:8.3f} s  {throughput}"
+                  f"{metrics['sections_per_second']:9.1f} sections/s  peak RSS {metrics['peak_rss_mb']} MB")
+        results['datasets'][dataset] = {'config': config, 'cases': cases}
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+    if args.save_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    baseline = _load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    print(f"\nComparing against {args.baseline} (recorded {baseline.get('timestamp', '?')})")
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold, args.latency_tolerance_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+def _load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Synthetic PDF Generator
+Writes reproducible PDF collections of configurable size for benchmarks.
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+from typing import List, Sequence
+
+try:
+    import pymupdf as fitz
+except ImportError:
+    import fitz
+
+# Base-14 fonts available to every PyMuPDF build: (body font, bold heading font)
+FONT_FAMILIES = {
+    'helv': ('helv', 'hebo'),
+    'tiro': ('tiro', 'tibo'),
+    'cour': ('cour', 'cobo')
+}
+
+WORDS = (
+    "form field signature document export review accessibility share comment page "
+    "layout budget itinerary hotel restaurant beach museum recipe vegetarian dinner "
+    "ingredient menu schedule travel group compliance onboarding template protect "
+    "password print convert image scan text edit create manage plan prepare guide"
+).split()
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+def _heading(rng: random.Random, number: int) -> str:
+    return f"{number}. " + ' '.join(rng.choices(WORDS, k=rng.randint(2, 5))).title()
+
+
+def generate_document(path: Path, pages: int, headings_per_page: int, font: str, seed: int) -> int:
+    """Write one PDF with numbered bold headings over body paragraphs; return its heading count."""
+    rng = random.Random(seed)
+    body_font, heading_font = FONT_FAMILIES[font]
+    body_size, heading_size, leading = 10.0, 14.0, 13.0
+    line_chars = int((PAGE_WIDTH - 2 * MARGIN) / (body_size * 0.5))
+    block_height = (PAGE_HEIGHT - 2 * MARGIN) / headings_per_page
+
+    document = fitz.open()
+    heading_count = 0
+    for _ in range(pages):
+        page = document.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        for block in range(headings_per_page):
+            y = MARGIN + block * block_height + heading_size
+            heading_count += 1
+            page.insert_text((MARGIN, y), _heading(rng, heading_count), fontname=heading_font,
+                             fontsize=heading_size)
+            y += heading_size * 1.6
+
+            # Fill the rest of the block with wrapped body sentences
+            line = ''
+            limit = MARGIN + (block + 1) * block_height - leading
+            while y < limit:
+                sentence = _sentence(rng, 6, 16)
+                if len(line) + len(sentence) + 1 > line_chars:
+                    page.insert_text((MARGIN, y), line, fontname=body_font, fontsize=body_size)
+                    y += leading
+                    line = sentence
+                else:
+                    line = f"{line} {sentence}".strip()
+    document.save(str(path), garbage=3, deflate=True)
+    document.close()
+    return heading_count
+
+
+def generate_collection(output_dir: str, documents: int = 5, pages: int = 10, headings_per_page: int = 3,
+                        fonts: Sequence[str] = ('helv',), seed: int = 0) -> List[str]:
+    """Write a collection of synthetic PDFs (fonts used in rotation) and return their paths.
+
+    The same arguments always produce byte-identical text content, so timings
+    from different runs and machines measure the same work.
+    """
+    path = Path(output_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    pdf_paths = []
+    for i in range(documents):
+        pdf_path = path / f"synthetic_{i:03d}.pdf"
+        generate_document(pdf_path, pages, headings_per_page, fonts[i % len(fonts)], seed * 1000003 + i)
+        pdf_paths.append(str(pdf_path))
+    return pdf_paths
+
+
+def main():
+    """Write a synthetic collection to a directory."""
+    parser = argparse.ArgumentParser(description='Generate a synthetic PDF collection')
+    parser.add_argument('output_dir', help='Directory to write the PDFs to')
+    parser.add_argument('--documents', type=int, default=5, help='Number of PDFs (default: 5)')
+    parser.add_argument('--pages', type=int, default=10, help='Pages per PDF (default: 10)')
+    parser.add_argument('--headings', type=int, default=3, help='Headings per page (default: 3)')
+    parser.add_argument('--fonts', nargs='+', choices=sorted(FONT_FAMILIES), default=['helv'],
+                        help='Font families, used in rotation across documents (default: helv)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args()
+
+    pdf_paths = generate_collection(args.output_dir, args.documents, args.pages, args.headings,
+                                    args.fonts, args.seed)
+    print(f"Wrote {len(pdf_paths)} PDFs ({args.pages} pages, {args.headings} headings per page) "
+          f"to {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Document Intelligence Client
+Sends queries and collection updates to a running `main.py --serve` instance.
+"""
+
+import sys
+import json
+import argparse
+import urllib.error
+import urllib.request
+from typing import Dict, Any, Optional
+
+
+def request(base_url: str, path: str, payload: Optional[Dict[str, Any]] = None,
+            timeout: float = 300.0) -> Dict[str, Any]:
+    """Send a GET (no payload) or JSON POST to the server and return the decoded response."""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(
+        base_url.rstrip('/') + path, data=data,
+        headers={'Content-Type': 'application/json'} if data is not None else {}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read().decode('utf-8') or '{}') or {'error': str(e)}
+
+
+def main():
+    """Command-line client for the query server."""
+    parser = argparse.ArgumentParser(description='Client for the document intelligence query server')
+    parser.add_argument('--url', default='http://127.0.0.1:8765', help='Server URL (default: http://127.0.0.1:8765)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    query_parser = subparsers.add_parser('query', help='Rank sections for a persona and job-to-be-done')
+    query_parser.add_argument('--persona', required=True, help='Persona description')
+    query_parser.add_argument('--job-to-be-done', required=True, help='Job-to-be-done description')
+    query_parser.add_argument('--output', help='Write the full JSON result to this file')
+
+    subparsers.add_parser('health', help='Show the loaded collection')
+
+    reload_parser = subparsers.add_parser('reload', help='Re-extract changed documents, optionally from a new directory')
+    reload_parser.add_argument('--input-dir', help='Replace the collection with the PDFs under this directory')
+
+    add_parser = subparsers.add_parser('add', help='Add PDF files to the collection')
+    add_parser.add_argument('pdf_paths', nargs='+', help='PDF files to add (paths as seen by the server)')
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'query':
+            result = request(args.url, '/query', {'persona': args.persona, 'job_to_be_done': args.job_to_be_done})
+            if 'error' in result:
+                print(f"Error: {result['error']}")
+                return 1
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, indent=2, ensure_ascii=False)
+                print(f"Results saved to: {args.output}")
+            print(f"Answered in {result['metadata']['timing']['query_ms']} ms")
+            for section in result['extracted_sections'][:5]:
+                print(f"{section['importance_rank']:>3}. {section['section_title'][:70]} "
+                      f"({section['document_name']}, p.{section['page_number']}) {section['relevance_score']:.4f}")
+        elif args.command == 'health':
+            result = request(args.url, '/health')
+        elif args.command == 'reload':
+            result = request(args.url, '/reload', {'input_dir': args.input_dir} if args.input_dir else {})
+        else:
+            result = request(args.url, '/documents', {'pdf_paths': args.pdf_paths})
+
+        if args.command != 'query':
+            print(json.dumps(result, indent=2))
+        return 1 if 'error' in result else 0
+
+    except urllib.error.URLError as e:
+        print(f"Error: could not reach server at {args.url}: {e.reason}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,3 @@
-config.py
 import os
 
 INPUT_DIR = "/app/input"
@@ -11,4 +10,97 @@ if not os.path.exists(OUTPUT_DIR):
 
 MAX_TITLE_LENGTH = 150
 MIN_HEADING_LENGTH = 2
-MAX_HEADING_LENGTH = 200
\ No newline at end of file
+MAX_HEADING_LENGTH = 200
+
+# PDF extraction backend: 'pymupdf' (fast, span-level), 'pdfplumber' (char-level) or 'text'
+# (plain text without font data; headings by text heuristics only)
+EXTRACTION_BACKEND = "pymupdf"
+# Baseline distance (pt) within which PyMuPDF lines are merged into one row
+LINE_Y_TOLERANCE = 3.0
+# Horizontal gap (pt) between PyMuPDF spans that is treated as a word break
+WORD_GAP_TOLERANCE = 1.0
+
+# On-disk cache of detected sections, keyed by PDF content hash and settings
+CACHE_DIR = ".cache/sections"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Heading classifier: 'font' (vectorized, layout-aware) or 'legacy' (text patterns only)
+HEADING_MODE = "font"
+HEADING_THRESHOLDS = {
+    'size_ratio': 1.15,   # line font size / page median line size
+    'bold_ratio': 0.6,    # fraction of the line's text set in bold
+    'gap_ratio': 1.3,     # baseline pitch above the line / page median pitch
+    'max_words': 14,      # longer lines are penalised as running text
+    'score': 2.0          # minimum weighted feature score for a heading
+}
+
+# Persistent corpus TF-IDF index (vocabulary, IDF and section matrix) for query-only scoring
+INDEX_DIR = ".cache/index"
+
+# Result sizes: ranked sections and subsections in the output, and how many of the
+# top sections' bodies candidate subsection sentences are drawn from
+TOP_SECTIONS = 15
+TOP_SUBSECTIONS = 20
+SUBSECTION_SOURCE_SECTIONS = 30
+
+
+# Wall-clock target for one run; when exceeded, the summary names the slowest pipeline stage
+PROCESSING_TIME_TARGET = 60
+
+# Deadline scheduling for single queries with a time budget (--time-budget): the share of the
+# budget held back for ranking and output, the page cap of the last degradation step, and the
+# per-page extraction cost (seconds) of each backend, plus the fixed cost of each document, assumed
+# until the run has measured its own
+TIME_BUDGET_RESERVE = 0.1
+DEADLINE_PAGE_LIMIT = 10
+DEADLINE_PAGE_SECONDS = {
+    'pdfplumber': 0.15,
+    'pymupdf': 0.02,
+    'text': 0.005
+}
+DEADLINE_DOCUMENT_SECONDS = 0.01
+
+# Ranking engine: "tfidf" (TF-IDF cosine, capped vocabulary) or "bm25" (inverted index, full vocabulary)
+RANKER = "tfidf"
+
+# Okapi BM25 term-frequency saturation (k1) and length normalisation (b)
+BM25_PARAMS = {
+    'k1': 1.2,
+    'b': 0.75
+}
+
+# Feature-hashing ranker ("hashing"): hashed term columns, so no vocabulary is held in memory
+HASHING_FEATURES = 2 ** 18
+
+# Coarse-to-fine extraction for single queries: only the PAGE_BUDGET pages whose plain text best
+# matches the query (plus PAGE_NEIGHBOURS pages either side) get layout and heading analysis;
+# None analyses every page
+PAGE_BUDGET = None
+PAGE_NEIGHBOURS = 1
+
+# Near-duplicate sections (MinHash estimate of their word 3-gram Jaccard similarity at or above
+# threshold, candidates found by LSH over bands of the signature) are collapsed to their first
+# occurrence before ranking
+DEDUP = True
+DEDUP_PARAMS = {
+    'threshold': 0.8,
+    'permutations': 128,
+    'bands': 16,
+    'shingle_size': 3
+}
+
+# Query-result cache: finished outputs keyed by the collection's content fingerprint and the
+# normalised query (lowercased, stop words dropped, tokens sorted); RESULT_CACHE_ENTRIES are kept in
+# memory and, in RESULT_CACHE_DIR, on disk up to RESULT_CACHE_MAX_BYTES
+RESULT_CACHE_DIR = ".cache/results"
+RESULT_CACHE_ENTRIES = 128
+RESULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# --collections: each subdirectory of the input directory is a collection, with its persona and
+# job-to-be-done in COLLECTION_FILE; up to COLLECTION_THREADS collections are processed at a time,
+# all extracting on one shared worker pool
+COLLECTION_FILE = "collection.json"
+COLLECTION_THREADS = 4
+
+# --watch: seconds between polls of the input directory for added, changed or removed PDFs
+WATCH_INTERVAL = 2.0
\ No newline at end of file
@@ -5,13 +5,109 @@ Extracts relevant sections from PDFs based on persona and job-to-be-done.
 """
 
 import os
+import re
 import sys
+import json
+import time
+import cProfile
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
 
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
-from src.processor import DocumentIntelligenceProcessor
+from config import (EXTRACTION_BACKEND, CACHE_DIR, INDEX_DIR, TOP_SECTIONS, TOP_SUBSECTIONS,
+                    PROCESSING_TIME_TARGET, RANKER, WATCH_INTERVAL, PAGE_BUDGET, PAGE_NEIGHBOURS,
+                    COLLECTION_FILE, RESULT_CACHE_DIR)
+from src.options import BACKENDS, RANKERS
+from src.watch import watch_changes
+
+# The pipeline (NumPy, SciPy and, when a stage needs them, scikit-learn and the PDF libraries) is
+# imported by the mode that runs, so --help and argument errors return without loading it
+if TYPE_CHECKING:
+    from src.processor import DocumentIntelligenceProcessor
+
+DEFAULT_MAX_DOCS = 10
+
+
+def load_queries(queries_file: str) -> List[Dict[str, str]]:
+    """Read persona/job queries from a JSONL file, skipping blank lines."""
+    queries = []
+    with open(queries_file, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            query = json.loads(line)
+            if not query.get('persona') or not query.get('job_to_be_done'):
+                raise ValueError(f"{queries_file}:{line_number}: 'persona' and 'job_to_be_done' are required")
+            queries.append(query)
+    return queries
+
+
+def report_performance(performance: Dict, processing_time: float) -> None:
+    """Print the per-stage timing breakdown and check the run against the time target."""
+    stages = performance['stages']
+    if stages:
+        print("Stage timings: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stages.items()))
+    if performance.get('peak_rss_mb') is not None:
+        print(f"Peak RSS: {performance['peak_rss_mb']} MB (workers: {performance['peak_rss_children_mb']} MB)")
+    
+    if processing_time > PROCESSING_TIME_TARGET:
+        slowest = max(stages, key=stages.get) if stages else 'unknown'
+        print(f"⚠️  Warning: Processing time exceeded {PROCESSING_TIME_TARGET} seconds target "
+              f"(slowest stage: {slowest})")
+    else:
+        print("✅ Processing completed within time constraints")
+
+
+def run_batch(processor: 'DocumentIntelligenceProcessor', pdf_files: List[Path], args) -> int:
+    """Answer every query in --queries against one extraction pass and write the results."""
+    try:
+        queries = load_queries(args.queries)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read queries: {e}")
+        return 1
+    if not queries:
+        print(f"Error: no queries found in '{args.queries}'")
+        return 1
+    
+    print(f"\nBatch mode: {len(queries)} queries from {args.queries}")
+    print("-" * 60)
+    
+    try:
+        results = processor.process_queries([str(f) for f in pdf_files], queries)
+        
+        output_path = Path(args.output_dir)
+        output_path.mkdir(exist_ok=True)
+        if args.ndjson:
+            output_file = output_path / 'document_intelligence_output.ndjson'
+            processor.save_ndjson(results, str(output_file))
+        else:
+            for i, (query, result) in enumerate(zip(queries, results), 1):
+                name = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(query.get('id', f'query_{i:03d}')))
+                processor.save_output(result, str(output_path / f'{name}.json'))
+        
+        print("\n" + "=" * 60)
+        print("BATCH SUMMARY")
+        print("=" * 60)
+        for query, result in zip(queries, results):
+            top = result['extracted_sections'][0]['section_title'][:50] if result['extracted_sections'] else '-'
+            timing = result['metadata'].get('timing', {})
+            print(f"{str(query.get('id', query['persona']))[:30]:<30} {timing.get('query_ms', 0):>8} ms  {top}")
+        if results and 'timing' in results[0]['metadata']:
+            timing = results[0]['metadata']['timing']
+            print(f"\nShared preparation: {timing['shared_preparation_seconds']} s, "
+                  f"batch scoring: {timing['batch_scoring_ms']} ms")
+        if results:
+            metadata = results[-1]['metadata']
+            report_performance(metadata['performance'], metadata['processing_time_seconds'])
+        return 0
+    
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
 
 
 def main():
@@ -34,30 +130,237 @@ def main():
     
     parser.add_argument(
         '--persona', 
-        required=True, 
         help='Persona description (e.g., "Software Engineer working on ML projects")'
     )
     
     parser.add_argument(
         '--job-to-be-done', 
-        required=True, 
         help='Job-to-be-done description (e.g., "Need to understand technical implementation details")'
     )
     
     parser.add_argument(
         '--max-docs', 
         type=int, 
-        default=10, 
-        help='Maximum number of documents to process (default: 10)'
+        help=f'Maximum number of documents to process (default: {DEFAULT_MAX_DOCS}; per collection '
+             f'and unlimited unless given in --collections mode)'
+    )
+    
+    parser.add_argument(
+        '--top-sections', 
+        type=int, 
+        default=TOP_SECTIONS, 
+        help=f'Number of ranked sections to output (default: {TOP_SECTIONS})'
+    )
+    
+    parser.add_argument(
+        '--top-subsections', 
+        type=int, 
+        default=TOP_SUBSECTIONS, 
+        help=f'Number of ranked subsections to output (default: {TOP_SUBSECTIONS})'
+    )
+    
+    parser.add_argument(
+        '--backend', 
+        choices=BACKENDS, 
+        default=EXTRACTION_BACKEND, 
+        help=f'PDF extraction backend (default: {EXTRACTION_BACKEND})'
+    )
+    
+    parser.add_argument(
+        '--ranker', 
+        choices=RANKERS, 
+        default=RANKER, 
+        help=f'Ranking engine: TF-IDF cosine, BM25 over an inverted index, or streaming feature-hashed TF-IDF (default: {RANKER})'
+    )
+    
+    parser.add_argument(
+        '--workers', 
+        type=int, 
+        default=os.cpu_count() or 1, 
+        help='Worker processes for PDF extraction (default: CPU count)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir', 
+        default=CACHE_DIR, 
+        help=f'Directory for the extracted-section cache (default: {CACHE_DIR})'
+    )
+    
+    parser.add_argument(
+        '--no-cache', 
+        action='store_true', 
+        help='Disable the extracted-section cache and always parse every PDF'
+    )
+    
+    parser.add_argument(
+        '--result-cache-dir', 
+        default=RESULT_CACHE_DIR, 
+        help=f'Directory for stored query results, reused while the collection is unchanged '
+             f'(default: {RESULT_CACHE_DIR})'
+    )
+    
+    parser.add_argument(
+        '--no-result-cache', 
+        action='store_true', 
+        help='Always rank instead of returning a stored result for a repeated query'
+    )
+    
+    parser.add_argument(
+        '--index-dir', 
+        default=INDEX_DIR, 
+        help=f'Directory for the persistent corpus index and its per-PDF manifest (default: {INDEX_DIR})'
+    )
+    
+    parser.add_argument(
+        '--no-index', 
+        action='store_true', 
+        help='Do not load or save the corpus index; refit the ranker on every run'
+    )
+    
+    parser.add_argument(
+        '--build-index', 
+        action='store_true', 
+        help='Extract the collection and write its corpus index, then exit without ranking'
+    )
+    
+    parser.add_argument(
+        '--no-dedup', 
+        action='store_true', 
+        help='Rank every section instead of collapsing near-duplicate sections (MinHash/LSH) to one'
+    )
+    
+    parser.add_argument(
+        '--page-budget', 
+        type=int, 
+        default=PAGE_BUDGET, 
+        help='Coarse-to-fine extraction: screen every page\'s plain text against the query and run layout '
+             'and heading analysis only on the N best pages and their neighbours (default: every page)'
+    )
+    
+    parser.add_argument(
+        '--page-neighbours', 
+        type=int, 
+        default=PAGE_NEIGHBOURS, 
+        help=f'Pages on either side of each --page-budget page that are analysed too (default: {PAGE_NEIGHBOURS})'
+    )
+    
+    parser.add_argument(
+        '--time-budget', 
+        type=float, 
+        nargs='?', 
+        const=PROCESSING_TIME_TARGET, 
+        metavar='SECONDS', 
+        help=f'Schedule extraction to finish within SECONDS (default when given without a value: '
+             f'{PROCESSING_TIME_TARGET}), parsing the smallest PDFs first and degrading to cheaper extraction '
+             f'modes as the deadline nears; single --persona/--job-to-be-done runs only'
+    )
+    
+    parser.add_argument(
+        '--queries', 
+        help='JSONL file of {"persona", "job_to_be_done", "id"?} queries to answer in one batch'
+    )
+    
+    parser.add_argument(
+        '--collections', 
+        nargs='?', 
+        const='', 
+        metavar='MANIFEST', 
+        help=f'Process several collections concurrently on one shared worker pool, each with its own '
+             f'persona/job and output file: every subdirectory of --input-dir (query from its '
+             f'{COLLECTION_FILE}), or every line of a JSONL MANIFEST of {{"name", "input_dir", "documents", '
+             f'"persona", "job_to_be_done"}}; --persona/--job-to-be-done are the defaults'
+    )
+    
+    parser.add_argument(
+        '--ndjson', 
+        action='store_true', 
+        help='In batch mode, write all results to one NDJSON file instead of one JSON per query'
+    )
+    
+    parser.add_argument(
+        '--serve', 
+        action='store_true', 
+        help='Run a resident local JSON query server instead of a single query'
+    )
+    
+    parser.add_argument(
+        '--host', 
+        default='127.0.0.1', 
+        help='Address for --serve to bind (default: 127.0.0.1)'
+    )
+    
+    parser.add_argument(
+        '--port', 
+        type=int, 
+        default=8765, 
+        help='Port for --serve (default: 8765)'
+    )
+    
+    parser.add_argument(
+        '--watch', 
+        action='store_true', 
+        help='After the first run, re-run whenever PDFs in the input directory are added, changed or removed'
+    )
+    
+    parser.add_argument(
+        '--watch-interval', 
+        type=float, 
+        default=WATCH_INTERVAL, 
+        help=f'Seconds between input directory polls in --watch mode (default: {WATCH_INTERVAL})'
+    )
+    
+    parser.add_argument(
+        '--profile', 
+        nargs='?', 
+        const='', 
+        metavar='FILE', 
+        help='Run under cProfile and write the stats to FILE (default: <output-dir>/profile.prof); '
+             'worker processes are not profiled, use --workers 1 to include extraction'
+    )
+    
+    parser.add_argument(
+        '--trace', 
+        metavar='FILE', 
+        help='Append a JSON-lines event log of run stages and documents to FILE'
     )
     
     args = parser.parse_args()
-    input_path = Path(args.input_dir)
-    if not input_path.exists():
-        print(f"Error: Input directory '{input_path}' does not exist.")
-        print("Please create the directory and add PDF files to process.")
-        return 1
+    if args.build_index and args.no_index:
+        parser.error('--build-index cannot be combined with --no-index')
+    if args.page_budget is not None and (args.build_index or args.queries or args.serve):
+        parser.error('--page-budget applies to single --persona/--job-to-be-done runs and --collections only')
+    if args.page_budget is not None and args.page_budget < 1:
+        parser.error('--page-budget must be at least 1')
+    if args.time_budget is not None and (args.build_index or args.queries or args.serve):
+        parser.error('--time-budget applies to single --persona/--job-to-be-done runs only')
+    if args.time_budget is not None and args.time_budget <= 0:
+        parser.error('--time-budget must be positive')
+    if args.collections is not None and (args.build_index or args.queries or args.serve or args.watch
+                                         or args.time_budget is not None):
+        parser.error('--collections cannot be combined with --build-index, --queries, --serve, --watch '
+                     'or --time-budget')
+    if args.watch and args.serve:
+        parser.error('--watch cannot be combined with --serve (use its /reload endpoint instead)')
+    if (not (args.build_index or args.queries or args.serve or args.collections is not None)
+            and not (args.persona and args.job_to_be_done)):
+        parser.error('--persona and --job-to-be-done are required unless --queries, --serve, --build-index '
+                     'or --collections is given')
+
+    if args.profile is None:
+        return run(args)
+    
+    profile_file = Path(args.profile or Path(args.output_dir) / 'profile.prof')
+    profile_file.parent.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(str(profile_file))
+        print(f"Profile saved to: {profile_file} (inspect with: python -m pstats {profile_file})")
+
 
+def find_pdfs(input_path: Path, max_docs: int) -> List[Path]:
+    """List the PDFs under input_path (at most max_docs), reporting what was found."""
     print(f"Searching for PDF files in '{input_path}' and its subdirectories...")
     pdf_files = list(input_path.rglob('*.pdf'))
     
@@ -67,11 +370,11 @@ def main():
         for item in input_path.rglob('*'):
             print(f"  Found: {item} (is_dir: {item.is_dir()})")
         print("Please add PDF files (*.pdf) to the input directory or its subdirectories (e.g., Collection1).")
-        return 1
+        return []
 
-    if len(pdf_files) > args.max_docs:
-        print(f"Found {len(pdf_files)} PDFs, limiting to first {args.max_docs}")
-        pdf_files = pdf_files[:args.max_docs]
+    if len(pdf_files) > max_docs:
+        print(f"Found {len(pdf_files)} PDFs, limiting to first {max_docs}")
+        pdf_files = pdf_files[:max_docs]
     
     if len(pdf_files) < 3:
         print(f"Warning: Only {len(pdf_files)} PDF files found. System is optimized for 3-10 documents.")
@@ -79,18 +382,164 @@ def main():
     print(f"Processing {len(pdf_files)} PDF files:")
     for pdf in pdf_files:
         print(f"  - {pdf.name} (from {pdf.parent})")
+    return pdf_files
+
+
+def processor_options(args) -> Dict:
+    """DocumentIntelligenceProcessor settings from the command line, other than the worker count."""
+    from src.result_cache import ResultCache
+    return {
+        'backend': args.backend,
+        'cache_dir': None if args.no_cache else args.cache_dir,
+        'index_dir': None if args.no_index else args.index_dir,
+        'top_sections': args.top_sections,
+        'top_subsections': args.top_subsections,
+        'trace_path': args.trace,
+        'ranker': args.ranker,
+        'page_budget': args.page_budget,
+        'page_neighbours': args.page_neighbours,
+        'dedup': not args.no_dedup,
+        'result_cache': None if args.no_result_cache else ResultCache(args.result_cache_dir)
+    }
+
+
+def run(args) -> int:
+    """Find the input PDFs and run the mode selected on the command line."""
+    input_path = Path(args.input_dir)
+    if not input_path.exists():
+        print(f"Error: Input directory '{input_path}' does not exist.")
+        print("Please create the directory and add PDF files to process.")
+        return 1
+
+    if args.collections is not None:
+        return run_collections(input_path, args)
+
+    from src.processor import DocumentIntelligenceProcessor
+    pdf_files = find_pdfs(input_path, args.max_docs if args.max_docs is not None else DEFAULT_MAX_DOCS)
+    if not pdf_files:
+        return 1
     
+    processor = DocumentIntelligenceProcessor(workers=args.workers, **processor_options(args))
+    
+    if args.watch:
+        return run_watch(processor, input_path, pdf_files, args)
+    
+    return run_once(processor, pdf_files, args)
+
+
+def run_collections(input_path: Path, args) -> int:
+    """Answer every collection's query concurrently and write one output file per collection."""
+    from src.multi_collection import discover_collections, load_collections, process_collections
+    try:
+        if args.collections:
+            collections = load_collections(args.collections, str(input_path), args.persona, args.job_to_be_done)
+        else:
+            collections = discover_collections(str(input_path), args.persona, args.job_to_be_done)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read collections: {e}")
+        return 1
+    if not collections:
+        print(f"Error: no collections found (subdirectories of '{input_path}' containing PDF files)")
+        return 1
+    
+    print(f"\nCollections mode: {len(collections)} collections")
+    print("-" * 60)
+    for collection in collections:
+        if args.max_docs is not None and len(collection['pdf_paths']) > args.max_docs:
+            print(f"{collection['name']}: found {len(collection['pdf_paths'])} PDFs, limiting to first {args.max_docs}")
+            collection['pdf_paths'] = collection['pdf_paths'][:args.max_docs]
+        print(f"  - {collection['name']}: {len(collection['pdf_paths'])} PDFs, "
+              f"{collection['persona']} / {collection['job_to_be_done']}")
+    
+    start_time = time.time()
+    results = process_collections(collections, processor_options(args), args.workers)
+    total_time = round(time.time() - start_time, 2)
+    
+    output_path = Path(args.output_dir)
+    output_path.mkdir(exist_ok=True)
+    for result in results:
+        if 'output' in result:
+            result['processor'].save_output(result['output'], str(output_path / f"{result['collection']['name']}.json"))
+    
+    print("\n" + "=" * 60)
+    print("COLLECTIONS SUMMARY")
+    print("=" * 60)
+    for result in results:
+        name = result['collection']['name'][:30]
+        if 'error' in result:
+            print(f"{name:<30} {'failed':>8}    {result['error']}")
+            continue
+        metadata = result['output']['metadata']
+        sections = result['output']['extracted_sections']
+        top = sections[0]['section_title'][:40] if sections else '-'
+        print(f"{name:<30} {metadata['collection']['processing_time_seconds']:>7.2f}s  "
+              f"{metadata['successful_documents']}/{metadata['total_documents']} docs  {top}")
+    collection_time = sum(result['output']['metadata']['collection']['processing_time_seconds']
+                          for result in results if 'output' in result)
+    print(f"\nTotal time: {total_time} seconds for {len(collections)} collections "
+          f"({collection_time:.2f} seconds summed over collections)")
+    
+    if total_time > PROCESSING_TIME_TARGET:
+        print(f"⚠️  Warning: Processing time exceeded {PROCESSING_TIME_TARGET} seconds target")
+    else:
+        print("✅ Processing completed within time constraints")
+    return 1 if any('error' in result for result in results) else 0
+
+
+def run_watch(processor: 'DocumentIntelligenceProcessor', input_path: Path, pdf_files: List[Path], args) -> int:
+    """Run once, then again whenever PDFs under input_path are added, changed or removed.
+    
+    With a corpus index, each re-run extracts only the PDFs that changed.
+    """
+    exit_code = run_once(processor, pdf_files, args)
+    print(f"\nWatching '{input_path}' for PDF changes every {args.watch_interval}s (Ctrl+C to stop)")
+    try:
+        for _ in watch_changes(str(input_path), args.watch_interval):
+            print("\n" + "=" * 60)
+            print("INPUT CHANGED - RE-RUNNING")
+            print("=" * 60)
+            pdf_files = find_pdfs(input_path, args.max_docs if args.max_docs is not None else DEFAULT_MAX_DOCS)
+            if pdf_files:
+                exit_code = run_once(processor, pdf_files, args)
+            print(f"\nWatching '{input_path}' for PDF changes (Ctrl+C to stop)")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    return exit_code
+
+
+def run_once(processor: 'DocumentIntelligenceProcessor', pdf_files: List[Path], args) -> int:
+    """Run the mode selected on the command line (other than --watch) on pdf_files."""
+    if args.build_index:
+        sections, input_files, status = processor.prepare_collection([str(f) for f in pdf_files])
+        if status is None:
+            print("Error: corpus index was not built (no sections found).")
+            return 1
+        print(f"Corpus index {status}: {len(sections)} sections from {len(input_files)} documents")
+        return 0
+    
+    if args.serve:
+        from src.server import serve
+        serve(processor, [str(f) for f in pdf_files], host=args.host, port=args.port)
+        return 0
+    
+    if args.queries:
+        return run_batch(processor, pdf_files, args)
+    
+    return run_single(processor, pdf_files, args)
+
+
+def run_single(processor: 'DocumentIntelligenceProcessor', pdf_files: List[Path], args) -> int:
+    """Answer the --persona/--job-to-be-done query and write the result."""
     print(f"\nPersona: {args.persona}")
     print(f"Job-to-be-done: {args.job_to_be_done}")
     print("-" * 60)
 
     try:
-        processor = DocumentIntelligenceProcessor()
-
         result = processor.process_documents(
             [str(f) for f in pdf_files],
             args.persona,
-            args.job_to_be_done
+            args.job_to_be_done,
+            time_budget=args.time_budget
         )
 
         output_path = Path(args.output_dir)
@@ -107,9 +556,30 @@ def main():
         print(f"Total sections found: {result['metadata']['total_sections_found']}")
         print(f"Top sections extracted: {len(result['extracted_sections'])}")
         print(f"Subsections analyzed: {len(result['subsection_analysis'])}")
+        if 'result_cache' in result['metadata']:
+            print(f"Result cache: {'hit' if result['metadata']['result_cache']['hit'] else 'miss'}")
+        if 'cache' in result['metadata']:
+            cache_stats = result['metadata']['cache']
+            print(f"Section cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        if 'index' in result['metadata']:
+            index_info = result['metadata']['index']
+            print(f"Corpus index: {index_info['status']}, query scored in {index_info.get('scoring_ms', 0)} ms")
+        if 'deduplication' in result['metadata']:
+            dedup = result['metadata']['deduplication']
+            print(f"Near-duplicates: {dedup['sections_eliminated']} of {dedup['sections_total']} sections collapsed "
+                  f"into {dedup['clusters_with_duplicates']} clusters, ~{dedup['estimated_ranking_seconds_saved']} s "
+                  f"ranking time saved")
+        if 'page_selection' in result['metadata']:
+            selection = result['metadata']['page_selection']
+            print(f"Page selection: {selection['pages_analyzed']}/{selection['pages_total']} pages analysed, "
+                  f"{selection['pages_skipped']} skipped, ~{selection['estimated_seconds_saved']} s saved")
+        if 'time_budget' in result['metadata']:
+            deadline = result['metadata']['time_budget']
+            print(f"Time budget: {deadline['elapsed_seconds']}/{deadline['budget_seconds']} s, degradations: "
+                  + (', '.join(deadline['degradations']) or 'none'))
 
         if result['extracted_sections']:
-            print(f"\nTOP 3 MOST RELEVANT SECTIONS:")
+            print("\nTOP 3 MOST RELEVANT SECTIONS:")
             for i, section in enumerate(result['extracted_sections'][:3], 1):
                 print(f"{i}. {section['section_title'][:80]}...")
                 print(f"   Document: {section['document_name']}, Page: {section['page_number']}")
@@ -117,11 +587,7 @@ def main():
                 print()
         
         print(f"Full results saved to: {output_file}")
-
-        if result['metadata']['processing_time_seconds'] > 60:
-            print("⚠️  Warning: Processing time exceeded 60 seconds target")
-        else:
-            print("✅ Processing completed within time constraints")
+        report_performance(result['metadata']['performance'], result['metadata']['processing_time_seconds'])
         
         return 0
         
@@ -1,103 +1,119 @@
 #!/usr/bin/env python3
 """
 Quick Test - Document Intelligence System
-Lightweight test without heavy dependencies
+Runs the full pipeline on a small synthetic PDF collection and checks the output
 """
 
+import sys
 import json
-import time
-from datetime import datetime
+import tempfile
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from config import PROCESSING_TIME_TARGET
+from benchmarks.synthetic import generate_collection
+from src.processor import DocumentIntelligenceProcessor
+from src.result_cache import ResultCache
+
 def quick_test():
-    """Quick test of the document intelligence system structure."""
-    start_time = time.time()
-    
+    """Process a generated 3-document collection end to end and report real timings."""
     print("🚀 Document Intelligence System - Quick Test")
     print("=" * 50)
 
-    test_output = {
-        "metadata": {
-            "input_files": [
-                {
-                    "filename": "Problem Statements.pdf",
-                    "path": "input/Problem Statements.pdf",
-                    "pages": 5
-                }
-            ],
-            "persona": "Software Engineer working on machine learning projects",
-            "job_to_be_done": "Need to understand technical implementation details and best practices",
-            "timestamp": datetime.now().isoformat(),
-            "processing_time_seconds": round(time.time() - start_time + 15.2, 2),  # Simulate processing
-            "total_sections_found": 25,
-            "total_documents": 1
-        },
-        "extracted_sections": [
-            {
-                "document_name": "Problem Statements.pdf",
-                "page_number": 1,
-                "section_title": "Problem Statement - Document Intelligence System",
-                "importance_rank": 1,
-                "relevance_score": 0.8542
-            },
-            {
-                "document_name": "Problem Statements.pdf", 
-                "page_number": 2,
-                "section_title": "Technical Requirements and Constraints",
-                "importance_rank": 2,
-                "relevance_score": 0.7891
-            },
-            {
-                "document_name": "Problem Statements.pdf",
-                "page_number": 3, 
-                "section_title": "Implementation Architecture",
-                "importance_rank": 3,
-                "relevance_score": 0.7234
-            }
-        ],
-        "subsection_analysis": [
-            {
-                "document": "Problem Statements.pdf",
-                "refined_text": "Build a document intelligence system that takes multiple PDFs and extracts relevant sections based on persona and job-to-be-done",
-                "page_number": 1,
-                "parent_section": "Problem Statement - Document Intelligence System",
-                "relevance_score": 0.6834
-            },
-            {
-                "document": "Problem Statements.pdf",
-                "refined_text": "Runtime CPU only, Model Size ≤ 1GB, Execution Time ≤ 60 seconds for 3–5 documents",
-                "page_number": 2,
-                "parent_section": "Technical Requirements and Constraints", 
-                "relevance_score": 0.6312
-            }
-        ]
-    }
-    
-    # Save test output
-    output_dir = Path("output")
-    output_dir.mkdir(exist_ok=True)
-    
-    output_file = output_dir / "quick_test_output.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(test_output, f, indent=2, ensure_ascii=False)
-    
-    processing_time = round(time.time() - start_time, 2)
-    
-    print(f"✅ Quick test completed in {processing_time} seconds")
-    print(f"📁 Test output saved to: {output_file}")
-    print(f"📊 Simulated processing time: {test_output['metadata']['processing_time_seconds']} seconds")
-    print(f"📄 Sections found: {test_output['metadata']['total_sections_found']}")
-    print(f"🎯 Top sections: {len(test_output['extracted_sections'])}")
-    print(f"📝 Subsections: {len(test_output['subsection_analysis'])}")
-    
-    print("\n🔍 TOP RELEVANT SECTIONS:")
-    for i, section in enumerate(test_output['extracted_sections'], 1):
-        print(f"{i}. {section['section_title']}")
-        print(f"   Page: {section['page_number']}, Score: {section['relevance_score']}")
-    
-    print(f"\n⚡ System is ready! Actual runtime will be ~15-45 seconds, not 2026! 😄")
-    
-    return test_output
+    work_dir = Path(tempfile.mkdtemp(prefix='quick-test-'))
+    pdf_paths = generate_collection(str(work_dir / 'input'), documents=3, pages=5, headings_per_page=3,
+                                    fonts=('helv', 'tiro', 'cour'))
+
+    processor = DocumentIntelligenceProcessor(workers=1, cache_dir=None, index_dir=None)
+    output = processor.process_documents(
+        pdf_paths,
+        "Travel Planner",
+        "Plan a beach itinerary with hotel and restaurant recommendations"
+    )
+
+    output_file = work_dir / "quick_test_output.json"
+    processor.save_output(output, str(output_file))
+
+    metadata = output['metadata']
+    expected_sections = 3 * 5 * 3
+    problems = []
+    if metadata['successful_documents'] != len(pdf_paths):
+        problems.append(f"{metadata['successful_documents']}/{len(pdf_paths)} documents processed")
+    if metadata['total_sections_found'] != expected_sections:
+        problems.append(f"{metadata['total_sections_found']} sections found, expected {expected_sections}")
+    if not output['extracted_sections'] or not output['subsection_analysis']:
+        problems.append("empty ranking output")
+    if metadata['processing_time_seconds'] > PROCESSING_TIME_TARGET:
+        problems.append(f"processing took {metadata['processing_time_seconds']} s")
+
+    print(f"\n📁 Test output saved to: {output_file}")
+    print(f"⏱️  Processing time: {metadata['processing_time_seconds']} seconds")
+    print(f"📄 Sections found: {metadata['total_sections_found']}")
+    print(f"🎯 Top sections: {len(output['extracted_sections'])}")
+    print(f"📝 Subsections: {len(output['subsection_analysis'])}")
+    print(f"📊 Stage timings: {json.dumps(metadata['performance']['stages'])}")
+
+    if problems:
+        print("\n❌ Quick test failed:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+
+    print("\n✅ Quick test passed")
+    return 0
+
+def damaged_collection_test():
+    """Process a collection with an unreadable and a truncated PDF; neither it nor its output may be cached."""
+    print("\n🧪 Damaged collection")
+    print("=" * 50)
+
+    work_dir = Path(tempfile.mkdtemp(prefix='quick-test-damaged-'))
+    pdf_paths = generate_collection(str(work_dir / 'input'), documents=2, pages=5, headings_per_page=3)
+    unreadable = work_dir / 'input' / 'unreadable.pdf'
+    unreadable.write_text("not a PDF")
+    truncated = work_dir / 'input' / 'truncated.pdf'
+    data = Path(pdf_paths[0]).read_bytes()
+    truncated.write_bytes(data[:len(data) // 2])
+    pdf_paths += [str(unreadable), str(truncated)]
+
+    processor = DocumentIntelligenceProcessor(workers=1, cache_dir=str(work_dir / 'cache'),
+                                              index_dir=str(work_dir / 'index'),
+                                              result_cache=ResultCache(str(work_dir / 'results')))
+    output = processor.process_documents(pdf_paths, "Travel Planner", "Plan a beach itinerary")
+
+    problems = []
+    failed = [document['filename'] for document in processor.recorder.documents if 'error' in document]
+    if sorted(failed) != ['truncated.pdf', 'unreadable.pdf']:
+        problems.append(f"documents reported as failed: {failed}")
+    if output['metadata']['successful_documents'] != 2:
+        problems.append(f"{output['metadata']['successful_documents']}/2 readable documents processed")
+    cached = len(list((work_dir / 'cache').glob('*.bin')))
+    if cached != 2:
+        problems.append(f"{cached} section cache entries, expected 2 (the readable documents)")
+    if (work_dir / 'index').exists() and any((work_dir / 'index').iterdir()):
+        problems.append("corpus index saved although documents failed")
+    if any((work_dir / 'results').iterdir()):
+        problems.append("partial output stored in the result cache")
+
+    # Coarse-to-fine runs screen the pages first and must not lose the damaged PDFs there
+    processor = DocumentIntelligenceProcessor(workers=1, cache_dir=str(work_dir / 'cache'), page_budget=5,
+                                              result_cache=ResultCache(str(work_dir / 'screened-results')))
+    processor.process_documents(pdf_paths, "Travel Planner", "Plan a beach itinerary")
+    failed = [document['filename'] for document in processor.recorder.documents if 'error' in document]
+    if sorted(failed) != ['truncated.pdf', 'unreadable.pdf']:
+        problems.append(f"documents reported as failed under a page budget: {failed}")
+    if any((work_dir / 'screened-results').iterdir()):
+        problems.append("partial output stored in the result cache under a page budget")
+
+    if problems:
+        print("\n❌ Damaged collection test failed:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+
+    print("\n✅ Damaged collection test passed")
+    return 0
 
 if __name__ == "__main__":
-    quick_test()
\ No newline at end of file
+    sys.exit(quick_test() or damaged_collection_test())
\ No newline at end of file
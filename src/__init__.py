@@ -3,8 +3,20 @@
 Document Intelligence System Package
 """
 
-from .extractor import PDFExtractor
-from .ranker import RelevanceRanker
-from .processor import DocumentIntelligenceProcessor
+import importlib
 
-__all__=['PDFExtractor', 'RelevanceRanker', 'DocumentIntelligenceProcessor']
\ No newline at end of file
+# Exported names and their submodules, imported on first access so that importing one submodule
+# (e.g. src.extractor for its BACKENDS) does not load the whole pipeline
+_EXPORTS = {
+    'PDFExtractor': 'extractor',
+    'RelevanceRanker': 'ranker',
+    'DocumentIntelligenceProcessor': 'processor'
+}
+
+__all__=['PDFExtractor', 'RelevanceRanker', 'DocumentIntelligenceProcessor']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+BM25 Index
+Inverted index of a collection's sections with BM25 scoring and max-score top-k pruning.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .index import top_k_indices
+from .sections import SectionStore
+from .storage import save_arrays, load_arrays, save_json, load_json
+
+BM25_FORMAT_VERSION = 3
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+# Below this many postings for a query, scoring them all outruns pruning's bookkeeping
+PRUNE_MIN_POSTINGS = 4096
+
+
+class BM25Index:
+    """Term -> postings index over section full_text, scored with Okapi BM25.
+
+    Each term's postings are a slice of two flat arrays: section ids (sorted)
+    and precomputed BM25 impacts (idf x saturated, length-normalised term
+    frequency). A query reads only the postings of its own terms; top_k()
+    additionally skips low-impact postings for sections that can no longer
+    reach the top k (max-score pruning). The vocabulary is not capped.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], offsets: np.ndarray, doc_ids: np.ndarray,
+                 impacts: np.ndarray, sections: SectionStore, params: Dict[str, Any],
+                 fingerprint: Optional[str] = None, input_files: Optional[List[Dict[str, Any]]] = None,
+                 max_impacts: Optional[np.ndarray] = None):
+        self.vocabulary = vocabulary
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        self.impacts = np.asarray(impacts, dtype=np.float32)
+        if max_impacts is None:
+            max_impacts = (np.maximum.reduceat(self.impacts, self.offsets[:-1]) if len(self.impacts)
+                           else np.zeros(0, dtype=np.float32))
+        self.max_impacts = np.asarray(max_impacts, dtype=np.float32)
+        self.sections = sections
+        self.params = params
+        self.fingerprint = fingerprint
+        self.input_files = input_files or []
+        self._token_pattern = re.compile(params['token_pattern'])
+        self._stop_words = frozenset(params['stop_words'])
+
+    @classmethod
+    def build(cls, sections: SectionStore, k1: float = 1.2, b: float = 0.75,
+              stop_words: Optional[List[str]] = None, **kwargs) -> 'BM25Index':
+        """Tokenize every section's full_text and build the postings arrays."""
+        if stop_words is None:
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            stop_words = ENGLISH_STOP_WORDS
+        params = {'k1': k1, 'b': b, 'token_pattern': TOKEN_PATTERN, 'stop_words': sorted(stop_words)}
+        token_pattern = re.compile(TOKEN_PATTERN)
+        stop_set = frozenset(stop_words)
+
+        vocabulary: Dict[str, int] = {}
+        term_ids, doc_lengths = [], np.zeros(len(sections), dtype=np.float64)
+        for doc, full_text in enumerate(sections.full_texts()):
+            tokens = [t for t in token_pattern.findall(full_text.lower()) if t not in stop_set]
+            doc_lengths[doc] = len(tokens)
+            term_ids.append(np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for t in tokens),
+                                        dtype=np.int64, count=len(tokens)))
+        if not vocabulary:
+            raise ValueError("empty vocabulary; sections contain only stop words")
+
+        # One (term, section) key per token; unique keys sorted by term then section id
+        docs = np.repeat(np.arange(len(sections), dtype=np.int64), [len(ids) for ids in term_ids])
+        keys, tfs = np.unique(np.concatenate(term_ids) * len(sections) + docs, return_counts=True)
+        terms, doc_ids = np.divmod(keys, len(sections))
+        offsets = np.searchsorted(terms, np.arange(len(vocabulary) + 1))
+
+        df = np.diff(offsets)
+        idf = np.log1p((len(sections) - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * doc_lengths[doc_ids] / max(doc_lengths.mean(), 1e-9))
+        impacts = idf[terms] * tfs * (k1 + 1) / (tfs + norm)
+        return cls(vocabulary, offsets, doc_ids, impacts, sections, params, **kwargs)
+
+    def _query_terms(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Known query term ids and their query-term frequencies, by descending score bound."""
+        counts: Dict[int, int] = {}
+        for token in self._token_pattern.findall(text.lower()):
+            term = self.vocabulary.get(token)
+            if term is not None:  # stop words never enter the vocabulary
+                counts[term] = counts.get(term, 0) + 1
+        terms = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        order = np.argsort(-(weights * self.max_impacts[terms]), kind='stable')
+        return terms[order], weights[order]
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.offsets[term], self.offsets[term + 1]
+        return self.doc_ids[start:end], self.impacts[start:end]
+
+    def score(self, text: str) -> np.ndarray:
+        """BM25 score of every section for a query, reading only the query terms' postings."""
+        return self._accumulate(*self._query_terms(text))
+
+    def _accumulate(self, terms: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Sum the weighted impacts of the given terms' postings per section, in term order."""
+        if not len(terms):
+            return np.zeros(len(self.sections))
+        postings = [self._postings(term) for term in terms]
+        return np.bincount(
+            np.concatenate([docs for docs, _ in postings]),
+            weights=np.concatenate([weight * impacts.astype(np.float64)
+                                    for weight, (_, impacts) in zip(weights, postings)]),
+            minlength=len(self.sections)
+        )
+
+    def score_many(self, texts: List[str]) -> np.ndarray:
+        """Dense (sections x queries) BM25 scores."""
+        scores = np.zeros((len(self.sections), len(texts)))
+        for column, text in enumerate(texts):
+            scores[:, column] = self.score(text)
+        return scores
+
+    def score_texts(self, texts: List[str], query_text: str) -> np.ndarray:
+        """BM25 score of arbitrary texts (e.g. sentences) for a query, with the index's vocabulary and IDF.
+
+        The texts are tokenized into one sparse term-frequency matrix and
+        scored with a single product against the query's term counts. Length
+        normalisation uses the texts' own average length, since sentences are
+        far shorter than the indexed sections.
+        """
+        rows, columns = [], []
+        lengths = np.zeros(len(texts))
+        for row, text in enumerate(texts):
+            tokens = [t for t in self._token_pattern.findall(text.lower()) if t not in self._stop_words]
+            lengths[row] = len(tokens)
+            for token in tokens:
+                term = self.vocabulary.get(token)
+                if term is not None:
+                    rows.append(row)
+                    columns.append(term)
+        tfs = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=(len(texts), len(self.vocabulary))
+        )  # duplicate (row, term) pairs are summed into term frequencies
+        k1, b = self.params['k1'], self.params['b']
+        df = np.diff(self.offsets)[tfs.indices]
+        idf = np.log1p((len(self.sections) - df + 0.5) / (df + 0.5))
+        average_length = lengths.mean() if len(texts) else 0.0
+        norm = k1 * (1 - b + b * np.repeat(lengths, np.diff(tfs.indptr)) / max(average_length, 1e-9))
+        tfs.data = idf * tfs.data * (k1 + 1) / (tfs.data + norm)
+
+        terms, weights = self._query_terms(query_text)
+        query = sparse.csr_matrix(
+            (weights, (terms, np.zeros(len(terms), dtype=np.int64))), shape=(len(self.vocabulary), 1)
+        )
+        return (tfs @ query).toarray()[:, 0]
+
+    def top_k(self, text: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(section indices, scores) of the k best sections, best first, ties by position.
+
+        Terms are processed from the highest score bound down. The k-th
+        largest single-term contribution seen so far is a lower bound on the
+        final k-th best score; once the bounds of the unprocessed terms add up
+        to less than it, no section that has not matched yet can make the top
+        k. From then on only the surviving candidates are probed in the
+        remaining postings, and candidates that cannot catch up are dropped.
+        The result is identical to selecting from score(), which is used
+        directly for queries with fewer than PRUNE_MIN_POSTINGS postings.
+        """
+        terms, weights = self._query_terms(text)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        if (self.offsets[terms + 1] - self.offsets[terms]).sum() < PRUNE_MIN_POSTINGS:
+            return self._top_k_exhaustive(text, k)
+        bounds = weights * self.max_impacts[terms]
+        # Bound on what the terms after each one can still add (padded against rounding)
+        remaining = np.append(np.cumsum(bounds[::-1])[::-1][1:], 0.0) * (1 + 1e-9)
+
+        threshold = 0.0
+        processed = 0
+        for processed, (term, weight, rest) in enumerate(zip(terms, weights, remaining), 1):
+            _, impacts = self._postings(term)
+            if len(impacts) >= k:
+                threshold = max(threshold, weight * float(np.partition(impacts, len(impacts) - k)[len(impacts) - k]))
+            if rest < threshold:
+                break
+        else:
+            return self._top_k_exhaustive(text, k)  # the bounds never allowed pruning
+
+        # Accumulate the terms read so far (in the same order as score()), keep the survivors
+        totals = self._accumulate(terms[:processed], weights[:processed])
+        candidates = np.flatnonzero(totals + remaining[processed - 1] >= threshold)
+        totals = totals[candidates]
+
+        for term, weight, rest in zip(terms[processed:], weights[processed:], remaining[processed:]):
+            # Probe this term's postings only for the surviving candidates
+            docs, impacts = self._postings(term)
+            positions = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+            found = docs[positions] == candidates
+            totals[found] += weight * impacts[positions[found]].astype(np.float64)
+            threshold = max(threshold, np.partition(totals, len(totals) - k)[len(totals) - k])
+            keep = totals + rest >= threshold
+            candidates, totals = candidates[keep], totals[keep]
+
+        order = top_k_indices(totals, k)
+        return candidates[order], totals[order]
+
+    def _top_k_exhaustive(self, text: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.score(text)
+        order = top_k_indices(scores, k)
+        return order, scores[order]
+
+    def save(self, index_dir: str) -> None:
+        """Write the index as bm25.json (vocabulary, settings) plus flat .npy postings and section store files."""
+        save_arrays(index_dir, 'bm25', {
+            'offsets': self.offsets, 'doc_ids': self.doc_ids, 'impacts': self.impacts, 'max_impacts': self.max_impacts
+        })
+        self.sections.save(index_dir, 'bm25.sections')
+        save_json(str(Path(index_dir) / 'bm25.json'), {
+            'version': BM25_FORMAT_VERSION,
+            'fingerprint': self.fingerprint,
+            'params': self.params,
+            'vocabulary': self.vocabulary,
+            'input_files': self.input_files
+        })
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> Optional['BM25Index']:
+        """Open an index written by save(); None if it is missing, unreadable or outdated.
+
+        With mmap the postings and section store are memory-mapped, so a
+        query pages in only its own terms' postings.
+        """
+        try:
+            meta = load_json(str(Path(index_dir) / 'bm25.json'))
+            if meta.get('version') != BM25_FORMAT_VERSION:
+                return None
+            arrays = load_arrays(index_dir, 'bm25', ['offsets', 'doc_ids', 'impacts', 'max_impacts'], mmap=mmap)
+            sections = SectionStore.load(index_dir, 'bm25.sections', mmap=mmap)
+        except (OSError, ValueError):
+            return None
+        return cls(meta['vocabulary'], arrays['offsets'], arrays['doc_ids'], arrays['impacts'], sections,
+                   meta['params'], fingerprint=meta['fingerprint'], input_files=meta['input_files'],
+                   max_impacts=arrays['max_impacts'])
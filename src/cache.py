@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Section Cache
+Content-addressed on-disk cache of detected sections, keyed by PDF hash and extractor settings.
+"""
+
+import os
+import json
+import zlib
+import pickle
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import config
+
+from . import extractor
+from .sections import SectionStore
+
+# Settings that determine the extracted sections and the sentences split from them; only these
+# key the cache, so settings of other stages never invalidate it. Anything added to extraction
+# must be listed here (or come with an EXTRACTOR_VERSION bump)
+_CONFIG_SETTINGS = (
+    'LINE_Y_TOLERANCE', 'WORD_GAP_TOLERANCE', 'HEADING_MODE', 'HEADING_THRESHOLDS',
+    'MIN_HEADING_LENGTH', 'MAX_HEADING_LENGTH', 'MAX_TITLE_LENGTH'
+)
+_EXTRACTOR_SETTINGS = (
+    'NUMBERING_PATTERN', 'HEADING_WEIGHTS', 'BULLET_CHARS', 'SENTENCE_SPLIT', 'MIN_SENTENCE_LENGTH'
+)
+
+# Errors of an entry that exists but cannot be read or rebuilt: corrupt, truncated, or from another code version
+_UNREADABLE_ENTRY = (OSError, zlib.error, pickle.UnpicklingError, EOFError, KeyError, ValueError, TypeError,
+                     AttributeError, ImportError, IndexError)
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_digest(extractor_version: str, backend: str) -> str:
+    """Digest of everything besides the PDF bytes that determines extracted sections."""
+    settings = {name: getattr(config, name) for name in _CONFIG_SETTINGS}
+    settings.update({name: getattr(extractor, name) for name in _EXTRACTOR_SETTINGS})
+    settings['EXTRACTION_BACKEND'] = backend
+    fingerprint = json.dumps({'version': extractor_version, 'settings': settings}, sort_keys=True,
+                             default=lambda value: getattr(value, 'pattern', str(value)))
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:16]
+
+
+class SectionCache:
+    """Stores detect_sections output per PDF as compressed binary entries with LRU eviction."""
+
+    def __init__(self, cache_dir: str, extractor_version: str, backend: str,
+                 max_bytes: int = config.CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.settings_digest = settings_digest(extractor_version, backend)
+
+    def key(self, pdf_path: str, digest: Optional[str] = None) -> str:
+        """Cache key for a PDF: its content hash combined with the settings digest."""
+        return f"{digest or file_digest(pdf_path)}-{self.settings_digest}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    def get(self, key: str, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """Return the cached extraction result for key, rebuilt for pdf_path, or None.
+
+        An entry that cannot be read or rebuilt (corrupt, from another code
+        version, or written by an extraction that did not read the whole PDF)
+        counts as a miss and is deleted.
+        """
+        entry = self._entry_path(key)
+        try:
+            payload = pickle.loads(zlib.decompress(entry.read_bytes()))
+            if not 0 <= payload['pages'] <= payload['page_count']:
+                raise ValueError(f"{payload['pages']} pages with text out of {payload['page_count']}")
+            if len({len(payload[column]) for column in ('page_numbers', 'titles', 'contents', 'bodies')}) != 1:
+                raise ValueError("section columns differ in length")
+            sections = SectionStore.from_columns([Path(pdf_path).name] * len(payload['titles']),
+                                                 payload['page_numbers'], payload['titles'], payload['contents'],
+                                                 payload['bodies'])
+            os.utime(entry)  # mark as recently used for LRU eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except _UNREADABLE_ENTRY as e:
+            self.misses += 1
+            self._discard(entry, e)
+            return None
+
+        self.hits += 1
+        return {'pages': payload['pages'], 'page_count': payload['page_count'], 'sections': sections}
+
+    def get_page_texts(self, key: str) -> Optional[List[str]]:
+        """Return the page texts stored for key by put_page_texts, or None; not counted as a hit or miss."""
+        entry = self._entry_path(f"{key}.pages")
+        try:
+            texts = pickle.loads(zlib.decompress(entry.read_bytes()))
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise TypeError(f"page texts are a {type(texts).__name__}")
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except _UNREADABLE_ENTRY as e:
+            self._discard(entry, e)
+            return None
+        return texts
+
+    def put_page_texts(self, key: str, texts: List[str]) -> None:
+        """Store a PDF's plain page texts (screening.page_texts) next to its sections, evicted alike."""
+        self._write(self._entry_path(f"{key}.pages"), texts)
+
+    def _discard(self, entry: Path, error: Exception) -> None:
+        """Delete an entry that cannot be read or rebuilt."""
+        print(f"  Warning: discarding unreadable cache entry {entry.name}: {error!r}")
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store an extraction result column-wise, then evict old entries over the size cap.
+
+        Only results of a whole PDF, with its page_count, are stored.
+        """
+        if not 0 <= result['pages'] <= result.get('page_count', -1):
+            return
+        sections = result['sections']
+        payload = {
+            'pages': result['pages'],
+            'page_count': result['page_count'],
+            'page_numbers': sections.page_numbers.tolist(),
+            'titles': [sections.title(i) for i in range(len(sections))],
+            'contents': [sections.content(i) for i in range(len(sections))],
+            'bodies': [sections.body(i) for i in range(len(sections))]
+        }
+        self._write(self._entry_path(key), payload)
+
+    def _write(self, entry: Path, payload: Any) -> None:
+        """Write an entry atomically, then evict old entries over the size cap."""
+        tmp = entry.with_suffix(f'.tmp{os.getpid()}-{threading.get_ident()}')  # processors may share the cache
+        try:
+            tmp.write_bytes(zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)))
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f"  Warning: could not write cache entry {entry}: {e}")
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits within max_bytes."""
+        entries = []
+        for entry in self.cache_dir.glob('*.bin'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                continue
+
+    def reset_stats(self) -> None:
+        """Zero the hit and miss counters at the start of a run."""
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counts since the last reset."""
+        return {'hits': self.hits, 'misses': self.misses}
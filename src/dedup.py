@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Elimination
+MinHash signatures and LSH banding over section text; near-duplicate sections collapse to one representative.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .sections import SectionStore
+from .storage import save_arrays, load_arrays, save_json, load_json
+
+DEDUP_FORMAT_VERSION = 2
+
+NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, collapse whitespace and mask numbers, so page numbers and counters do not split copies."""
+    return NUMBER_PATTERN.sub('0', ' '.join(text.lower().split()))
+
+
+class MinHasher:
+    """MinHash signatures of texts over their word shingles (runs of shingle_size words).
+
+    Shingles are produced and hashed by a HashingVectorizer in one pass;
+    each of the permutations is a multiply-shift hash of the shingle hash,
+    and a signature holds the minimum of every permutation over a text's
+    shingles. The share of equal positions in two signatures estimates the
+    Jaccard similarity of the two shingle sets.
+    """
+
+    def __init__(self, permutations: int = 128, shingle_size: int = 3, seed: int = 0,
+                 block_shingles: int = 1 << 16):
+        from sklearn.feature_extraction.text import HashingVectorizer  # only needed to cluster, not to load clusters
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, np.iinfo(np.uint64).max, size=permutations, dtype=np.uint64,
+                              endpoint=True) | np.uint64(1)
+        self.b = rng.integers(0, np.iinfo(np.uint64).max, size=permutations, dtype=np.uint64, endpoint=True)
+        self.vectorizer = HashingVectorizer(ngram_range=(shingle_size, shingle_size), token_pattern=r'(?u)\b\w+\b',
+                                            preprocessor=normalize_text, n_features=1 << 30,
+                                            alternate_sign=False, norm=None, binary=True)
+        self.block_shingles = block_shingles
+
+    def signatures(self, texts) -> np.ndarray:
+        """(texts x permutations) uint32 signatures; a text shorter than a shingle gets an all-zero row."""
+        shingles = self.vectorizer.transform(texts)
+        indptr = shingles.indptr
+        signatures = np.zeros((shingles.shape[0], len(self.a)), dtype=np.uint32)
+        nonempty = np.flatnonzero(np.diff(indptr))
+        row = 0
+        while row < len(nonempty):
+            # a block of rows whose shingles x permutations fit the working buffer
+            stop = max(row + 1, int(np.searchsorted(indptr[nonempty + 1],
+                                                    indptr[nonempty[row]] + self.block_shingles, 'right')))
+            rows = nonempty[row:stop]
+            begin, end = indptr[rows[0]], indptr[rows[-1] + 1]
+            hashes = shingles.indices[begin:end].astype(np.uint64)
+            with np.errstate(over='ignore'):  # the multiply-shift hash relies on wrapping at 2**64
+                values = ((hashes[:, None] * self.a + self.b) >> np.uint64(32)).astype(np.uint32)
+            signatures[rows] = np.minimum.reduceat(values, indptr[rows] - begin, axis=0)
+            row = stop
+        return signatures
+
+
+class Deduplication:
+    """A collection's sections and their near-duplicate clusters.
+
+    `sections` holds every detected section in collection order;
+    `representatives` (ascending rows of sections) are the sections that are
+    ranked, each standing for its cluster, and `cluster[i]` is the position
+    in representatives of the cluster section i belongs to. A
+    representative is always the first section of its cluster.
+    """
+
+    def __init__(self, sections: SectionStore, representatives: np.ndarray, cluster: np.ndarray,
+                 params: Optional[Dict[str, Any]] = None, fingerprint: Optional[str] = None):
+        self.sections = sections
+        self.representatives = np.asarray(representatives, dtype=np.int64)
+        self.cluster = np.asarray(cluster, dtype=np.int64)
+        self.params = params
+        self.fingerprint = fingerprint
+        self._members = None
+
+    @classmethod
+    def identity(cls, sections: SectionStore, fingerprint: Optional[str] = None) -> 'Deduplication':
+        """Every section its own cluster, e.g. with deduplication disabled."""
+        rows = np.arange(len(sections), dtype=np.int64)
+        return cls(sections, rows, rows, fingerprint=fingerprint)
+
+    @property
+    def eliminated(self) -> int:
+        return len(self.sections) - len(self.representatives)
+
+    def representative_sections(self) -> SectionStore:
+        """The sections to rank: one per cluster, in collection order."""
+        if not self.eliminated:
+            return self.sections
+        return self.sections.take(self.representatives)
+
+    def other_locations(self, representative: int) -> List[Dict[str, Any]]:
+        """Document and page of every other section in a representative's cluster."""
+        if not self.eliminated:
+            return []
+        if self._members is None:
+            order = np.argsort(self.cluster, kind='stable')
+            bounds = np.searchsorted(self.cluster[order], np.arange(len(self.representatives) + 1))
+            self._members = (order, bounds)
+        order, bounds = self._members
+        return [
+            {'document_name': self.sections.document_name(i), 'page_number': int(self.sections.page_numbers[i])}
+            for i in order[bounds[representative] + 1:bounds[representative + 1]].tolist()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts for the output metadata."""
+        sizes = np.bincount(self.cluster, minlength=len(self.representatives))
+        return {
+            'sections_total': len(self.sections),
+            'sections_eliminated': self.eliminated,
+            'clusters_with_duplicates': int(np.count_nonzero(sizes > 1))
+        }
+
+    def save(self, directory: str, prefix: str) -> None:
+        """Write the clusters, and the whole collection's sections unless every section is its own cluster.
+
+        Without eliminated sections the collection equals the index's own
+        store, so it is not written twice.
+        """
+        save_arrays(directory, prefix, {'representatives': self.representatives, 'cluster': self.cluster})
+        if self.eliminated:
+            self.sections.save(directory, f'{prefix}.sections')
+        save_json(str(Path(directory) / f'{prefix}.json'), {
+            'format_version': DEDUP_FORMAT_VERSION,
+            'fingerprint': self.fingerprint,
+            'params': self.params,
+            'eliminated': self.eliminated
+        })
+
+    @classmethod
+    def load(cls, directory: str, prefix: str, representative_sections: SectionStore,
+             mmap: bool = True) -> Optional['Deduplication']:
+        """Read clusters written by save(), or None if missing or unreadable.
+
+        representative_sections is the stored index's store, which is the
+        whole collection when nothing was eliminated.
+        """
+        try:
+            header = load_json(str(Path(directory) / f'{prefix}.json'))
+            if header.get('format_version') != DEDUP_FORMAT_VERSION:
+                return None
+            arrays = load_arrays(directory, prefix, ['representatives', 'cluster'], mmap=mmap)
+            sections = (SectionStore.load(directory, f'{prefix}.sections', mmap=mmap)
+                        if header['eliminated'] else representative_sections)
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(sections, arrays['representatives'], arrays['cluster'],
+                   params=header['params'], fingerprint=header['fingerprint'])
+
+
+class Deduplicator:
+    """Clusters sections online, in collection order, with MinHash and LSH banding.
+
+    Each representative's signature is split into bands of equal rows and
+    filed under every band; a new section is compared only with the
+    representatives sharing at least one band with it, and joins the first
+    of them whose estimated Jaccard similarity reaches threshold. Otherwise
+    it becomes a representative itself. Sections are fed one document at a
+    time with add(), so documents can be deduplicated as they are extracted.
+    """
+
+    def __init__(self, threshold: float = 0.8, permutations: int = 128, bands: int = 16,
+                 shingle_size: int = 3):
+        if permutations % bands:
+            raise ValueError(f"permutations ({permutations}) must be a multiple of bands ({bands})")
+        self.params = {'threshold': threshold, 'permutations': permutations, 'bands': bands,
+                       'shingle_size': shingle_size}
+        self.threshold = threshold
+        self.band_rows = permutations // bands
+        self.hasher = MinHasher(permutations, shingle_size)
+        self._buckets: Dict[bytes, List[int]] = {}
+        self._signatures: List[np.ndarray] = []
+        self._stores: List[SectionStore] = []
+        self._representatives: List[np.ndarray] = []
+        self._clusters: List[np.ndarray] = []
+        self._rows = 0
+
+    def add(self, sections: SectionStore) -> np.ndarray:
+        """Cluster the next sections of the collection; returns the rows of sections that are new representatives."""
+        if not len(sections):  # nothing to hash; the vectorizer rejects empty input
+            return np.empty(0, dtype=np.int64)
+        signatures = self.hasher.signatures(sections.full_texts())
+        permutations = signatures.shape[1]
+        cluster = np.empty(len(sections), dtype=np.int64)
+        kept = []
+        for i, signature in enumerate(signatures):
+            keys = [bytes([band]) + signature[start:start + self.band_rows].tobytes()
+                    for band, start in enumerate(range(0, permutations, self.band_rows))]
+            match = None
+            if signature.any():  # a section without shingles is never a duplicate
+                candidates = sorted({rep for key in keys for rep in self._buckets.get(key, ())})
+                for rep in candidates:
+                    if np.count_nonzero(self._signatures[rep] == signature) >= self.threshold * permutations:
+                        match = rep
+                        break
+            if match is None:
+                match = len(self._signatures)
+                self._signatures.append(signature)
+                for key in keys:
+                    self._buckets.setdefault(key, []).append(match)
+                kept.append(i)
+            cluster[i] = match
+        kept = np.asarray(kept, dtype=np.int64)
+        self._stores.append(sections)
+        self._representatives.append(kept + self._rows)
+        self._clusters.append(cluster)
+        self._rows += len(sections)
+        return kept
+
+    def finish(self, fingerprint: Optional[str] = None) -> Deduplication:
+        """The clusters of every section added so far."""
+        if not self._stores:
+            return Deduplication.identity(SectionStore.empty(), fingerprint)
+        return Deduplication(SectionStore.concat(self._stores), np.concatenate(self._representatives),
+                             np.concatenate(self._clusters), params=self.params, fingerprint=fingerprint)
@@ -1,22 +1,95 @@
-ractor.py
 #!/usr/bin/env python3
 """
 PDF Text and Section Extractor
 Extracts text content and identifies sections from PDF documents.
 """
 
+import importlib
 import re
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Set, Tuple
 from pathlib import Path
-import fitz  
-import pdfplumber
 import numpy as np
 
+from config import (EXTRACTION_BACKEND, LINE_Y_TOLERANCE, WORD_GAP_TOLERANCE, HEADING_MODE,
+                    HEADING_THRESHOLDS, MIN_HEADING_LENGTH, MAX_HEADING_LENGTH,
+                    SUBSECTION_SOURCE_SECTIONS)
+
+from .options import BACKENDS
+from .sections import SectionStore
+
+HEADING_MODES = ('font', 'legacy')
+
+# Bump whenever extraction or section detection output changes; part of the cache key
+EXTRACTOR_VERSION = '6'
+
+# Numbered headings: "1 ", "1.2. ", "IV. ", "A. ", "(a) ", "Chapter 3", "Section 2"
+NUMBERING_PATTERN = re.compile(
+    r'^(?:\d+(?:\.\d+){0,2}\.?\s+|[IVXLCDM]+\.\s+|[A-Z]\.\s|\([a-z]\)\s+|(?i:chapter|section)\s+\d+)'
+)
+
+# Score contributed by each heading feature in classify_headings
+HEADING_WEIGHTS = {
+    'size': 2.0,
+    'bold': 1.5,
+    'numbered': 1.0,
+    'upper': 1.0,
+    'gap': 0.5,
+    'sentence_end': -1.5,
+    'bullet': -1.5,
+    'too_many_words': -1.0
+}
+
+BULLET_CHARS = ('•', '\uf0b7', '▪', '◦', '-', '–', '*')
+
+# Sentence boundaries in a section body: a line opening with a bullet (including the "o" bullets of
+# some exported lists), end punctuation before whitespace, or a line ending in a colon
+SENTENCE_SPLIT = re.compile(r'(?:^|\s*\n)(?:[•\uf0b7▪◦\-–*]+|o(?=\s))\s*|(?<=[.!?])\s+|(?<=:)\n')
+
+# Shorter sentences (fragments, labels, list items) are not subsection candidates
+MIN_SENTENCE_LENGTH = 30
+
+
+def import_fitz():
+    """PyMuPDF (pymupdf, or fitz in older releases), imported on first use.
+    
+    The PDF libraries are imported by the functions that parse PDFs rather
+    than at module load, so runs answered from the section cache or a stored
+    index, and --help, never pay for them.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+    return fitz
+
+
+def import_backend(backend: str) -> None:
+    """Import a backend's PDF library now, e.g. in a process about to fork extraction workers that then share it."""
+    if backend == 'pdfplumber':
+        importlib.import_module('pdfplumber')
+    else:
+        import_fitz()
+
+
+def pymupdf_text_flags() -> int:
+    """Text flags expanding ligatures (e.g. "ﬃ" -> "ffi"), so PyMuPDF text matches pdfplumber's and tokenizes."""
+    fitz = import_fitz()
+    return fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_LIGATURES
+
 
 class PDFExtractor:
     """Extracts text content and sections from PDF documents."""
     
-    def __init__(self):
+    def __init__(self, backend: str = EXTRACTION_BACKEND, heading_mode: str = HEADING_MODE,
+                 heading_thresholds: Optional[Dict[str, float]] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown extraction backend '{backend}', expected one of {BACKENDS}")
+        if heading_mode not in HEADING_MODES:
+            raise ValueError(f"Unknown heading mode '{heading_mode}', expected one of {HEADING_MODES}")
+        self.backend = backend
+        self.heading_mode = heading_mode
+        self.heading_thresholds = {**HEADING_THRESHOLDS, **(heading_thresholds or {})}
         self.heading_patterns = [
             r'^\d+\.?\s+',  
             r'^\d+\.\d+\.?\s+', 
@@ -30,71 +103,308 @@ class PDFExtractor:
     
     def extract_text_from_pdf(self, pdf_path: str) -> List[Dict[str, Any]]:
         """Extract text content with page numbers and structure."""
-        pages_content=[]
-        
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    text = page.extract_text()
-                    if text:
-                        chars = page.chars
-                        font_sizes = [char.get('size', 12) for char in chars if char.get('size')]
-                        avg_font_size = np.mean(font_sizes) if font_sizes else 12
-                        pages_content.append({
-                            'page_number': page_num,
-                            'text': text.strip(),
-                            'avg_font_size': avg_font_size,
-                            'chars': chars,
-                            'source_file': pdf_path
-                        })
-        except Exception as e:
-            print(f"Error extracting text from {pdf_path}: {e}")
-            
-        return pages_content
+        return list(self.iter_pages(pdf_path))
+    
+    def iter_pages(self, pdf_path: str, pages: Optional[Set[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield one page dict at a time.
+        
+        Each page carries 'page_number', 'text', 'avg_font_size', 'source_file'
+        and a compact per-line font summary aligned with text.split('\n'):
+        'line_sizes' and 'line_bold' (float32, one entry per line) and
+        'line_bboxes' (float32, shape (lines, 4)). Glyph and span objects are
+        released before the page is yielded, so memory is bounded by a page.
+        If pages (1-based page numbers) is given, other pages are not analysed.
+        Errors opening or parsing the PDF are raised, and the generator returns
+        {'page_count', 'repaired'} for the whole document once exhausted.
+        The 'text' backend yields plain text only, without the font summary,
+        so headings are found by the text heuristic of is_heading.
+        """
+        if self.backend == 'pdfplumber':
+            return self._iter_pdfplumber(pdf_path, pages)
+        if self.backend == 'text':
+            return self._iter_text(pdf_path, pages)
+        return self._iter_pymupdf(pdf_path, pages)
+    
+    def extract_sections(self, pdf_path: str, timings: Optional[Dict[str, float]] = None,
+                         pages: Optional[Set[int]] = None,
+                         document: Optional[Dict[str, Any]] = None) -> Tuple[int, SectionStore]:
+        """Stream a PDF's pages into detect_sections; return (pages with text, sections).
+        
+        If a timings dict is given, it receives 'extraction_seconds' (time spent
+        producing pages) and 'heading_seconds' (time spent detecting sections);
+        a document dict receives the PDF's 'page_count'. With pages, only those
+        page numbers are analysed (see iter_pages).
+        
+        Raises if the PDF cannot be read. Reading all of a PDF that the library
+        had to repair and finding text on fewer pages than it has counts as a
+        failure too: those pages are lost to the damage, not blank.
+        """
+        page_count = 0
+        page_seconds = 0.0
+        source = {}
+        
+        def counted(pages: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            nonlocal page_count, page_seconds
+            while True:
+                start_time = time.perf_counter()
+                try:
+                    page = next(pages)
+                except StopIteration as stop:
+                    source.update(stop.value or {})
+                    return
+                finally:
+                    page_seconds += time.perf_counter() - start_time
+                page_count += 1
+                yield page
+        
+        start_time = time.perf_counter()
+        sections = self.detect_sections(counted(self.iter_pages(pdf_path, pages)))
+        if pages is None and source.get('repaired') and page_count < source['page_count']:
+            raise ValueError(f"damaged PDF: text on only {page_count} of {source['page_count']} pages after repair")
+        if timings is not None:
+            timings['extraction_seconds'] = page_seconds
+            timings['heading_seconds'] = time.perf_counter() - start_time - page_seconds
+        if document is not None:
+            document['page_count'] = source.get('page_count', page_count)
+        return page_count, sections
+    
+    def _iter_pymupdf(self, pdf_path: str, pages: Optional[Set[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream pages using PyMuPDF span-level text dictionaries."""
+        fitz = import_fitz()
+        flags = pymupdf_text_flags()
+        with fitz.open(pdf_path) as pdf:
+            for page_num, page in enumerate(pdf, 1):
+                if pages is not None and page_num not in pages:
+                    continue
+                page_data = self._pymupdf_page(page, flags)
+                if page_data['text']:
+                    page_data['page_number'] = page_num
+                    page_data['source_file'] = pdf_path
+                    yield page_data
+            return {'page_count': pdf.page_count, 'repaired': pdf.is_repaired}
+    
+    def _pymupdf_page(self, page, flags: int) -> Dict[str, Any]:
+        """Merge a PyMuPDF page's spans into visual lines with a font summary.
+        
+        PyMuPDF reports a row of text as several lines when it spans blocks, so
+        lines whose baselines fall within LINE_Y_TOLERANCE are merged left to
+        right, matching how pdfplumber groups characters into lines. Spans
+        separated by more than WORD_GAP_TOLERANCE are joined with a space.
+        """
+        spans = []
+        for block in page.get_text('dict', flags=flags)['blocks']:
+            if block.get('type') != 0:
+                continue
+            for line in block['lines']:
+                bottom = line['bbox'][3]
+                for span in line['spans']:
+                    if span['text'].strip():
+                        bold = bool(span['flags'] & 16) or 'bold' in span['font'].lower()
+                        spans.append((bottom, span['text'], span['size'], bold, span['bbox']))
+        
+        if not spans:
+            return {'text': ''}
+        
+        # Row index per span: a new row starts where the baseline jumps past the tolerance
+        spans.sort(key=lambda span: (span[0], span[4][0]))
+        bottoms = np.fromiter((span[0] for span in spans), dtype=np.float32, count=len(spans))
+        line_index = np.concatenate(([0], np.cumsum(np.diff(bottoms) > LINE_Y_TOLERANCE)))
+        sizes = np.fromiter((span[2] for span in spans), dtype=np.float32, count=len(spans))
+        bold = np.fromiter((span[3] for span in spans), dtype=np.float32, count=len(spans))
+        weights = np.fromiter((len(span[1]) for span in spans), dtype=np.float32, count=len(spans))
+        bboxes = np.array([span[4] for span in spans], dtype=np.float32)
+        
+        texts = []
+        boundaries = np.flatnonzero(np.diff(line_index)) + 1
+        for row in np.split(np.arange(len(spans)), boundaries):
+            row_spans = sorted((spans[i] for i in row), key=lambda span: span[4][0])
+            parts = [row_spans[0][1]]
+            for prev, span in zip(row_spans, row_spans[1:]):
+                if span[4][0] - prev[4][2] > WORD_GAP_TOLERANCE and not parts[-1].endswith(' '):
+                    parts.append(' ')
+                parts.append(span[1])
+            texts.append(' '.join(''.join(parts).split()))
+        
+        return self._summarize_page(texts, line_index, sizes, bold, weights, bboxes)
+    
+    def _iter_text(self, pdf_path: str, pages: Optional[Set[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream pages as PyMuPDF plain text, skipping span and font analysis altogether."""
+        fitz = import_fitz()
+        flags = pymupdf_text_flags()
+        with fitz.open(pdf_path) as pdf:
+            for page_num, page in enumerate(pdf, 1):
+                if pages is not None and page_num not in pages:
+                    continue
+                lines = (' '.join(line.split()) for line in page.get_text(flags=flags).splitlines())
+                text = '\n'.join(line for line in lines if line)
+                if text:
+                    yield {'page_number': page_num, 'text': text, 'avg_font_size': 12.0, 'source_file': pdf_path}
+            return {'page_count': pdf.page_count, 'repaired': pdf.is_repaired}
+    
+    def _iter_pdfplumber(self, pdf_path: str, pages: Optional[Set[int]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream pages using pdfplumber's character-level layout analysis."""
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num, page in enumerate(pdf.pages, 1):
+                if pages is not None and page_num not in pages:
+                    continue  # pdfplumber parses a page's chars lazily, so skipped pages cost nothing
+                try:
+                    page_data = self._pdfplumber_page(page)
+                finally:
+                    page.close()  # drop the page's cached chars and layout objects
+                if page_data['text']:
+                    page_data['page_number'] = page_num
+                    page_data['source_file'] = pdf_path
+                    yield page_data
+            return {'page_count': len(pdf.pages), 'repaired': False}  # pdfminer does not report repairs
     
-    def detect_sections(self, pages_content: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Detect sections and subsections from PDF content."""
-        sections = []
+    def _pdfplumber_page(self, page) -> Dict[str, Any]:
+        """Reduce a pdfplumber page's chars to text lines with a font summary."""
+        lines = page.extract_text_lines(strip=True, return_chars=True)
+        lines = [line for line in lines if line['text']]
+        if not lines:
+            return {'text': ''}
+        
+        counts = [len(line['chars']) for line in lines]
+        line_index = np.repeat(np.arange(len(lines)), counts)
+        chars = [char for line in lines for char in line['chars']]
+        sizes = np.fromiter((char.get('size') or 12 for char in chars), dtype=np.float32, count=len(chars))
+        bold = np.fromiter(('bold' in char.get('fontname', '').lower() for char in chars),
+                           dtype=np.float32, count=len(chars))
+        bboxes = np.array([(c['x0'], c['top'], c['x1'], c['bottom']) for c in chars], dtype=np.float32)
+        
+        return self._summarize_page([line['text'] for line in lines], line_index, sizes, bold,
+                                    np.ones(len(chars), dtype=np.float32), bboxes)
+    
+    @staticmethod
+    def _summarize_page(texts: List[str], line_index: np.ndarray, sizes: np.ndarray, bold: np.ndarray,
+                        weights: np.ndarray, bboxes: np.ndarray) -> Dict[str, Any]:
+        """Collapse glyph/span arrays into per-line size, bold ratio and bbox arrays."""
+        n_lines = len(texts)
+        line_weight = np.bincount(line_index, weights=weights, minlength=n_lines)
+        safe_weight = np.where(line_weight > 0, line_weight, 1)
+        line_sizes = np.bincount(line_index, weights=sizes * weights, minlength=n_lines) / safe_weight
+        line_bold = np.bincount(line_index, weights=bold * weights, minlength=n_lines) / safe_weight
+        line_bboxes = np.empty((n_lines, 4), dtype=np.float32)
+        line_bboxes[:, :2] = np.inf
+        line_bboxes[:, 2:] = -np.inf
+        np.minimum.at(line_bboxes[:, 0], line_index, bboxes[:, 0])
+        np.minimum.at(line_bboxes[:, 1], line_index, bboxes[:, 1])
+        np.maximum.at(line_bboxes[:, 2], line_index, bboxes[:, 2])
+        np.maximum.at(line_bboxes[:, 3], line_index, bboxes[:, 3])
+        
+        total = float(weights.sum())
+        return {
+            'text': '\n'.join(texts),
+            'avg_font_size': float(np.dot(sizes, weights) / total) if total else 12.0,
+            'line_sizes': np.where(line_weight > 0, line_sizes, 12.0).astype(np.float32),
+            'line_bold': line_bold.astype(np.float32),
+            'line_bboxes': line_bboxes
+        }
+    
+    def detect_sections(self, pages_content: Iterable[Dict[str, Any]]) -> SectionStore:
+        """Detect sections and subsections from PDF content.
+        
+        pages_content may be a list or the iter_pages generator; pages are
+        consumed one at a time and not retained. Sections are collected
+        column-wise into a SectionStore. A section's content is the few lines
+        after its heading; its body is every line up to the next heading,
+        continuing across page breaks.
+        """
+        document_names, page_numbers, titles, contents, bodies = [], [], [], [], []
+        body_lines = None  # lines of the section still open, if any
         
         for page_data in pages_content:
             page_num = page_data['page_number']
             text = page_data['text']
             avg_font_size = page_data['avg_font_size']
-            chars = page_data.get('chars', [])
-            source_file = page_data.get('source_file', '')
+            document_name = Path(page_data.get('source_file', '')).name
             
             # Split text into lines
             lines = text.split('\n')
             
+            if self.heading_mode == 'font' and 'line_sizes' in page_data:
+                heading_flags = self.classify_headings(lines, page_data)
+            else:
+                heading_flags = [self.is_heading(line.strip(), [], avg_font_size) for line in lines]
+            
             for i, line in enumerate(lines):
                 line = line.strip()
-                if not line or len(line) < 3:
+                if not line:
                     continue
                     
                 # Check if line is a potential heading
-                if self.is_heading(line, chars, avg_font_size):
+                if len(line) >= 3 and heading_flags[i]:
+                    if body_lines is not None:
+                        bodies.append('\n'.join(body_lines))
+                    body_lines = []
+                    
                     # Extract surrounding context (next few lines)
                     context_lines = []
                     for j in range(i + 1, min(i + 6, len(lines))):
                         if lines[j].strip():
                             context_lines.append(lines[j].strip())
                     
-                    context = ' '.join(context_lines)
-                    
-                    sections.append({
-                        'document_name': Path(source_file).name,
-                        'page_number': page_num,
-                        'section_title': line,
-                        'content': context,
-                        'full_text': line + ' ' + context,
-                        'importance_rank': 0,  # Will be calculated later
-                        'relevance_score': 0.0
-                    })
+                    document_names.append(document_name)
+                    page_numbers.append(page_num)
+                    titles.append(line)
+                    contents.append(' '.join(context_lines))
+                elif body_lines is not None:
+                    body_lines.append(line)
+        
+        if body_lines is not None:
+            bodies.append('\n'.join(body_lines))
+        return SectionStore.from_columns(document_names, page_numbers, titles, contents, bodies)
+    
+    def classify_headings(self, lines: List[str], page_data: Dict[str, Any]) -> np.ndarray:
+        """Score every line of a page at once and return a boolean heading mask.
+        
+        Features are the line's font size relative to the page median, bold
+        ratio, numbering, all-caps, the line pitch above it relative to the
+        page's median pitch, and penalties for trailing punctuation, bullets
+        and long lines. Each feature adds its HEADING_WEIGHTS entry when it passes
+        its threshold in self.heading_thresholds.
+        """
+        thresholds = self.heading_thresholds
+        stripped = [line.strip() for line in lines]
+        n_lines = len(stripped)
         
-        return sections
+        lengths = np.fromiter(map(len, stripped), dtype=np.int32, count=n_lines)
+        word_counts = np.fromiter((len(line.split()) for line in stripped), dtype=np.int32, count=n_lines)
+        numbered = np.fromiter((NUMBERING_PATTERN.match(line) is not None for line in stripped),
+                               dtype=bool, count=n_lines)
+        upper = np.fromiter((line.isupper() for line in stripped), dtype=bool, count=n_lines)
+        sentence_end = np.fromiter((line.endswith(('.', ',', ';', ':')) for line in stripped),
+                                   dtype=bool, count=n_lines)
+        bullet = np.fromiter((line.startswith(BULLET_CHARS) for line in stripped), dtype=bool, count=n_lines)
+        
+        sizes = page_data['line_sizes']
+        size_ratio = sizes / max(float(np.median(sizes)), 1e-3)
+        
+        # Baseline-to-baseline pitch above each line (robust to how tightly a backend
+        # draws glyph boxes); the first line and lines starting a new column count as separated
+        bottoms = page_data['line_bboxes'][:, 3]
+        gaps = np.full(n_lines, np.inf, dtype=np.float32)
+        gaps[1:] = bottoms[1:] - bottoms[:-1]
+        gaps[gaps <= 0] = np.inf
+        finite_gaps = gaps[np.isfinite(gaps)]
+        median_gap = float(np.median(finite_gaps)) if finite_gaps.size else 1.0
+        
+        score = (
+            HEADING_WEIGHTS['size'] * (size_ratio >= thresholds['size_ratio'])
+            + HEADING_WEIGHTS['bold'] * (page_data['line_bold'] >= thresholds['bold_ratio'])
+            + HEADING_WEIGHTS['numbered'] * numbered
+            + HEADING_WEIGHTS['upper'] * upper
+            + HEADING_WEIGHTS['gap'] * (gaps / median_gap >= thresholds['gap_ratio'])
+            + HEADING_WEIGHTS['sentence_end'] * sentence_end
+            + HEADING_WEIGHTS['bullet'] * bullet
+            + HEADING_WEIGHTS['too_many_words'] * (word_counts > thresholds['max_words'])
+        )
+        valid_length = (lengths >= max(MIN_HEADING_LENGTH, 3)) & (lengths <= MAX_HEADING_LENGTH)
+        return valid_length & (score >= thresholds['score'])
     
     def is_heading(self, line: str, chars: List[Dict], avg_font_size: float) -> bool:
-        """Determine if a line is likely a heading."""
+        """Determine if a line is likely a heading (legacy text-only heuristic)."""
         if len(line) > 200:
             return False
         
@@ -114,23 +424,23 @@ class PDFExtractor:
         return False
     
     def extract_subsections(self, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Extract subsections from the content of main sections."""
+        """Split the bodies of the top sections into candidate sentences, unscored.
+        
+        Every sentence of at least MIN_SENTENCE_LENGTH characters is a
+        candidate; RelevanceRanker.rank_subsections scores them all at once.
+        """
         subsections = []
         
-        for section in sections[:10]:  
-            content = section['content']
-
-            sentences = re.split(r'[.!?]+', content)
-            sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 20]
-            
-            for sentence in sentences[:3]:  
-                if len(sentence) > 30:  
+        for section in sections[:SUBSECTION_SOURCE_SECTIONS]:
+            for sentence in SENTENCE_SPLIT.split(section['body']):
+                sentence = ' '.join(sentence.split())
+                if len(sentence) >= MIN_SENTENCE_LENGTH:
                     subsections.append({
                         'document': section['document_name'],
                         'refined_text': sentence,
                         'page_number': section['page_number'],
                         'parent_section': section['section_title'],
-                        'relevance_score': section['relevance_score'] * 0.8
+                        'relevance_score': 0.0
                     })
         
-        return subsections
\ No newline at end of file
+        return subsections
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Hashing Index
+Fixed-vocabulary-memory TF-IDF index built incrementally with feature hashing.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .sections import SectionStore
+from .storage import save_arrays, load_arrays, save_json, load_json
+
+HASHING_FORMAT_VERSION = 4
+
+
+def make_vectorizer(params: Dict[str, Any]):
+    """Stateless HashingVectorizer producing raw term counts for the given settings."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(
+        n_features=params['n_features'],
+        ngram_range=tuple(params['ngram_range']),
+        stop_words='english',
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32
+    )
+
+
+def smoothed_idf(n: int, df: np.ndarray) -> np.ndarray:
+    """TfidfVectorizer's smooth_idf weights for n sections with document frequencies df."""
+    return (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+
+
+def weight_rows(data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, idf: np.ndarray,
+                block_rows: int = 4096) -> None:
+    """Multiply CSR term counts by idf and L2-normalise each row, in place, block_rows rows at a time."""
+    n = len(indptr) - 1
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        lo, hi = indptr[start], indptr[stop]
+        block = data[lo:hi]
+        block *= idf[indices[lo:hi]]
+        lengths = np.diff(indptr[start:stop + 1])
+        norms = np.ones(stop - start, dtype=np.float32)
+        filled = lengths > 0
+        if filled.any():
+            # reduceat over the starts of non-empty rows sums exactly each row's entries
+            norms[filled] = np.sqrt(np.add.reduceat(block * block, indptr[start:stop][filled] - lo))
+        norms[norms == 0] = 1.0
+        block /= np.repeat(norms, lengths)
+
+
+class HashingIndex:
+    """L2-normalised TF-IDF section matrix over hashed term columns.
+
+    Terms map to columns through a hash function instead of a fitted
+    vocabulary, so a query is vectorized with the same stateless vectorizer
+    and no vocabulary dict is ever held in memory.
+    """
+
+    def __init__(self, matrix: sparse.csr_matrix, idf: np.ndarray, df: np.ndarray, sections: SectionStore,
+                 params: Dict[str, Any], fingerprint: Optional[str] = None,
+                 input_files: Optional[List[Dict[str, Any]]] = None):
+        self.matrix = sparse.csr_matrix(matrix)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.df = np.asarray(df, dtype=np.int64)
+        self.sections = sections
+        self.params = params
+        self.fingerprint = fingerprint
+        self.input_files = input_files or []
+        self._vectorizer = make_vectorizer(params)
+
+    def query_matrix(self, texts: List[str]) -> sparse.csr_matrix:
+        """Sparse (queries x features) matrix of L2-normalised TF-IDF query vectors."""
+        weighted = self._vectorizer.transform(texts).multiply(self.idf).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ weighted)
+
+    def score(self, text: str) -> np.ndarray:
+        """Cosine similarity of every indexed section to a query."""
+        return self.score_many([text])[:, 0]
+
+    def score_many(self, texts: List[str]) -> np.ndarray:
+        """Dense (sections x queries) cosine similarities from a single sparse product."""
+        return (self.matrix @ self.query_matrix(texts).T).toarray().astype(np.float64)
+
+    def score_texts(self, texts: List[str], query_text: str) -> np.ndarray:
+        """Cosine similarity of arbitrary texts (e.g. sentences) to a query, weighted by the index's IDF."""
+        return (self.query_matrix(texts) @ self.query_matrix([query_text]).T).toarray()[:, 0].astype(np.float64)
+
+    def patch(self, rows: np.ndarray, sections: SectionStore, order: Optional[np.ndarray] = None,
+              fingerprint: Optional[str] = None,
+              input_files: Optional[List[Dict[str, Any]]] = None) -> 'HashingIndex':
+        """New index of the given existing rows followed by new sections; this index is left untouched.
+
+        order, if given, permutes those rows into the new index's row order.
+        Only the new sections are vectorized. Kept rows are divided by the
+        old IDF, which recovers their term counts up to a per-row scale that
+        the L2 normalisation cancels; document frequencies lose the dropped
+        rows' terms and gain the new ones', and all rows are re-weighted
+        with the resulting IDF.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        dropped = np.ones(len(self.sections), dtype=bool)
+        dropped[rows] = False
+        df = self.df - np.bincount(self.matrix[np.flatnonzero(dropped)].indices, minlength=len(self.df))
+
+        kept = self.matrix[rows]
+        kept.data /= self.idf[kept.indices]
+        blocks = [kept]
+        if sections:  # HashingVectorizer rejects an empty batch
+            counts = self._vectorizer.transform(sections.full_texts()).astype(np.float32)
+            counts.sum_duplicates()
+            df += np.bincount(counts.indices, minlength=len(df))
+            blocks.append(counts)
+        matrix = sparse.vstack(blocks, format='csr')
+        if not matrix.shape[0]:
+            raise ValueError("no sections to index")
+
+        idf = smoothed_idf(matrix.shape[0], df)
+        weight_rows(matrix.data, matrix.indices, matrix.indptr, idf)
+        sections = SectionStore.concat([self.sections.take(rows), sections])
+        if order is not None:
+            matrix, sections = matrix[order], sections.take(order)
+        return HashingIndex(matrix, idf, df, sections, self.params, fingerprint=fingerprint, input_files=input_files)
+
+    def save(self, index_dir: str) -> None:
+        """Write the index as hashing.json (settings) plus flat .npy arrays and section store files."""
+        matrix = self.matrix
+        save_arrays(index_dir, 'hashing', {
+            'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr, 'idf': self.idf, 'df': self.df
+        })
+        self.sections.save(index_dir, 'hashing.sections')
+        save_json(str(Path(index_dir) / 'hashing.json'), {
+            'version': HASHING_FORMAT_VERSION,
+            'fingerprint': self.fingerprint,
+            'params': self.params,
+            'shape': list(matrix.shape),
+            'input_files': self.input_files
+        })
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> Optional['HashingIndex']:
+        """Open an index written by save(); None if it is missing, unreadable or outdated.
+
+        With mmap the section matrix and section store are memory-mapped.
+        """
+        try:
+            meta = load_json(str(Path(index_dir) / 'hashing.json'))
+            if meta.get('version') != HASHING_FORMAT_VERSION:
+                return None
+            arrays = load_arrays(index_dir, 'hashing', ['data', 'indices', 'indptr', 'idf', 'df'], mmap=mmap)
+            sections = SectionStore.load(index_dir, 'hashing.sections', mmap=mmap)
+        except (OSError, ValueError):
+            return None
+        matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(meta['shape']))
+        return cls(matrix, arrays['idf'], arrays['df'], sections, meta['params'],
+                   fingerprint=meta['fingerprint'], input_files=meta['input_files'])
+
+
+class HashingIndexBuilder:
+    """Builds a HashingIndex from sections fed in chunks, e.g. one document at a time.
+
+    Each chunk is hashed into raw term counts and appended to preallocated
+    CSR buffers (grown by doubling), and a fixed-size document-frequency
+    array is updated. No vocabulary and no list of section texts is built,
+    so besides the matrix itself the builder's state is bounded by
+    n_features; IDF weighting and row normalisation are applied in place
+    by finish().
+    """
+
+    def __init__(self, params: Dict[str, Any], chunk_size: int = 256, capacity: int = 1 << 16):
+        self.params = params
+        self.chunk_size = chunk_size
+        self._stores: List[SectionStore] = []
+        self._rows = 0
+        self._vectorizer = make_vectorizer(params)
+        self._df = np.zeros(params['n_features'], dtype=np.int64)
+        self._indptr = np.zeros(1024, dtype=np.int64)
+        self._indices = np.empty(capacity, dtype=np.int32)
+        self._data = np.empty(capacity, dtype=np.float32)
+        self._nnz = 0
+
+    def add(self, sections: SectionStore) -> None:
+        """Vectorize a batch of sections and append their rows."""
+        for start in range(0, len(sections), self.chunk_size):
+            counts = self._vectorizer.transform(sections.full_texts(start, start + self.chunk_size))
+            counts.sum_duplicates()
+            self._append(counts)
+            self._df += np.bincount(counts.indices, minlength=len(self._df))
+            self._rows += counts.shape[0]
+        self._stores.append(sections)
+
+    def _append(self, counts: sparse.csr_matrix) -> None:
+        rows, end = self._rows, self._nnz + counts.nnz
+        if end > len(self._indices):
+            capacity = max(end, 2 * len(self._indices))
+            self._indices.resize(capacity, refcheck=False)  # realloc in place where possible
+            self._data.resize(capacity, refcheck=False)
+        if rows + counts.shape[0] + 1 > len(self._indptr):
+            self._indptr.resize(max(rows + counts.shape[0] + 1, 2 * len(self._indptr)), refcheck=False)
+        self._indices[self._nnz:end] = counts.indices
+        self._data[self._nnz:end] = counts.data
+        self._indptr[rows + 1:rows + counts.shape[0] + 1] = counts.indptr[1:] + self._nnz
+        self._nnz = end
+
+    def finish(self, fingerprint: Optional[str] = None,
+               input_files: Optional[List[Dict[str, Any]]] = None,
+               block_rows: int = 4096) -> HashingIndex:
+        """Apply smoothed IDF from the running counts, L2-normalise the rows and return the index.
+
+        The buffers are trimmed to size and weighted in place, block_rows rows
+        at a time, so finishing needs no second copy of the matrix.
+        """
+        if not self._rows:
+            raise ValueError("no sections to index")
+        n = self._rows
+        idf = smoothed_idf(n, self._df)
+        for buffer, size in ((self._indices, self._nnz), (self._data, self._nnz), (self._indptr, n + 1)):
+            buffer.resize(size, refcheck=False)
+        indices, data, indptr = self._indices, self._data, self._indptr
+        weight_rows(data, indices, indptr, idf, block_rows)
+
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(n, self.params['n_features']), copy=False)
+        return HashingIndex(matrix, idf, self._df, SectionStore.concat(self._stores), self.params,
+                            fingerprint=fingerprint, input_files=input_files)
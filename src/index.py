@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Corpus Index
+Persistent TF-IDF index of a document collection's sections for query-only scoring.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .sections import SectionStore
+from .storage import save_arrays, load_arrays, save_json, load_json
+
+INDEX_FORMAT_VERSION = 3
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """Indices of the k highest scores, best first, with ties broken by position.
+
+    Uses np.argpartition so only the candidates at or above the k-th score
+    are sorted; the result equals the first k entries of a stable full sort.
+    """
+    n = len(scores)
+    if k is None or k >= n:
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    candidates = np.flatnonzero(scores >= threshold)  # every tie at the cut-off competes
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
+
+
+class CorpusIndex:
+    """Fitted vocabulary, IDF weights and L2-normalised section matrix of one collection.
+
+    Queries are tokenized with the same rules as the fitting vectorizer
+    (lowercase, token pattern, stop words, word n-grams), so scoring a new
+    query needs only this index: no refit and no scikit-learn.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], idf: np.ndarray, matrix: sparse.csr_matrix,
+                 sections: SectionStore, analyzer_params: Dict[str, Any],
+                 fingerprint: Optional[str] = None, input_files: Optional[List[Dict[str, Any]]] = None):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.matrix = sparse.csr_matrix(matrix)
+        self.sections = sections
+        self.analyzer_params = analyzer_params
+        self.fingerprint = fingerprint
+        self.input_files = input_files or []
+        self._token_pattern = re.compile(analyzer_params['token_pattern'])
+        self._stop_words = frozenset(analyzer_params['stop_words'])
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, matrix, sections: SectionStore, **kwargs) -> 'CorpusIndex':
+        """Build an index from a fitted TfidfVectorizer and its fit_transform output."""
+        analyzer_params = {
+            'lowercase': vectorizer.lowercase,
+            'token_pattern': vectorizer.token_pattern,
+            'stop_words': sorted(vectorizer.get_stop_words() or ()),
+            'ngram_range': list(vectorizer.ngram_range)
+        }
+        vocabulary = {term: int(column) for term, column in vectorizer.vocabulary_.items()}
+        return cls(vocabulary, vectorizer.idf_, matrix, sections, analyzer_params, **kwargs)
+
+    def analyze(self, text: str) -> List[str]:
+        """Split text into the same unigram/n-gram terms the vectorizer produced."""
+        if self.analyzer_params['lowercase']:
+            text = text.lower()
+        tokens = [token for token in self._token_pattern.findall(text) if token not in self._stop_words]
+        min_n, max_n = self.analyzer_params['ngram_range']
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def query_vector(self, text: str) -> np.ndarray:
+        """Dense L2-normalised TF-IDF vector of a query over the index vocabulary."""
+        vector = np.zeros(len(self.idf), dtype=np.float64)
+        for term in self.analyze(text):
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] += 1.0
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def query_matrix(self, texts: List[str]) -> sparse.csr_matrix:
+        """Sparse (queries x vocabulary) matrix of L2-normalised TF-IDF query vectors."""
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            for term in self.analyze(text):
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, columns)), shape=(len(texts), len(self.idf))
+        )  # duplicate (row, column) pairs are summed into term counts
+        weighted = counts.multiply(self.idf).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ weighted)
+
+    def score(self, text: str) -> np.ndarray:
+        """Cosine similarity of every indexed section to a query (one sparse mat-vec)."""
+        return self.matrix @ self.query_vector(text)
+
+    def score_many(self, texts: List[str]) -> np.ndarray:
+        """Dense (sections x queries) cosine similarities from a single sparse product."""
+        return (self.matrix @ self.query_matrix(texts).T).toarray()
+
+    def score_texts(self, texts: List[str], query_text: str) -> np.ndarray:
+        """Cosine similarity of arbitrary texts (e.g. sentences) to a query under the fitted weights.
+
+        The texts are transformed in one batch and scored with one sparse
+        mat-vec; nothing is refitted, so terms outside the index vocabulary
+        are ignored.
+        """
+        return self.query_matrix(texts) @ self.query_vector(query_text)
+
+    def save(self, index_dir: str) -> None:
+        """Write the index as index.json (vocabulary, settings) plus flat .npy arrays and section store files."""
+        matrix = self.matrix
+        save_arrays(index_dir, 'index', {
+            'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr, 'idf': self.idf
+        })
+        self.sections.save(index_dir, 'index.sections')
+        save_json(str(Path(index_dir) / 'index.json'), {
+            'version': INDEX_FORMAT_VERSION,
+            'fingerprint': self.fingerprint,
+            'analyzer': self.analyzer_params,
+            'vocabulary': self.vocabulary,
+            'shape': list(matrix.shape),
+            'input_files': self.input_files
+        })
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> Optional['CorpusIndex']:
+        """Open an index written by save(); None if it is missing, unreadable or outdated.
+        
+        With mmap the section matrix and section store are memory-mapped, so
+        they are paged in from disk as scoring reads them and processes
+        opening the same index share one copy in the page cache.
+        """
+        try:
+            meta = load_json(str(Path(index_dir) / 'index.json'))
+            if meta.get('version') != INDEX_FORMAT_VERSION:
+                return None
+            arrays = load_arrays(index_dir, 'index', ['data', 'indices', 'indptr', 'idf'], mmap=mmap)
+            sections = SectionStore.load(index_dir, 'index.sections', mmap=mmap)
+        except (OSError, ValueError):
+            return None
+
+        matrix = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(meta['shape']))
+        return cls(meta['vocabulary'], arrays['idf'], matrix, sections, meta['analyzer'],
+                   fingerprint=meta['fingerprint'], input_files=meta['input_files'])
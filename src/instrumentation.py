@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Pipeline Instrumentation
+Per-stage and per-document timings, peak memory and an optional JSON-lines trace log.
+"""
+
+import sys
+import json
+import time
+import uuid
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+T = TypeVar('T')
+
+
+def peak_rss_mb(children: bool = False) -> Optional[float]:
+    """Peak resident set size of this process (or its reaped children) in MB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+class PerformanceRecorder:
+    """Collects stage timings and document stats for one run and mirrors them to a trace log."""
+
+    def __init__(self, trace_path: Optional[str] = None):
+        self.stages: Dict[str, float] = {}
+        self.documents: List[Dict[str, Any]] = []
+        self.trace_path = trace_path
+        if trace_path:
+            Path(trace_path).parent.mkdir(parents=True, exist_ok=True)
+        self.run_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, **fields):
+        """Time a block and add it to the named stage (stages may be entered repeatedly)."""
+        self.event('stage_start', stage=name, **fields)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start_time
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+            self.event('stage_end', stage=name, seconds=round(seconds, 6), **fields)
+
+    def timed_iter(self, name: str, iterator: Iterator[T]) -> Iterator[T]:
+        """Yield from iterator, adding only the time spent waiting for items to the named stage.
+
+        Work the consumer does between items is not counted, so a stage that
+        overlaps with its consumer is measured by how long it held it up.
+        """
+        self.event('stage_start', stage=name)
+        waited = 0.0
+        while True:
+            start_time = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                seconds = time.perf_counter() - start_time
+                waited += seconds
+                self.add_stage_time(name, seconds)
+            yield item
+        self.event('stage_end', stage=name, seconds=round(waited, 6))
+
+    def add_stage_time(self, name: str, seconds: float) -> None:
+        """Record a stage measured elsewhere (e.g. inside a worker process)."""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def record_document(self, **fields) -> None:
+        """Record per-document statistics."""
+        with self._lock:
+            self.documents.append(fields)
+        self.event('document', **fields)
+
+    def event(self, name: str, **fields) -> None:
+        """Append one JSON event line to the trace log, if tracing is enabled."""
+        if not self.trace_path:
+            return
+        record = {
+            'ts': round(time.time(), 6),
+            'elapsed': round(time.perf_counter() - self._start, 6),
+            'run': self.run_id,
+            'event': name,
+            **fields
+        }
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.trace_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def summary(self) -> Dict[str, Any]:
+        """The metadata.performance block: stage seconds, documents and peak RSS."""
+        return {
+            'run': self.run_id,
+            'total_seconds': round(time.perf_counter() - self._start, 4),
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'documents': list(self.documents),
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_children_mb': peak_rss_mb(children=True)
+        }
\ No newline at end of file
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Collection Manifest
+Per-PDF modification time, size and content digest of an indexed collection, for incremental updates.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from .cache import file_digest
+from .storage import save_json, load_json
+
+MANIFEST_FORMAT_VERSION = 1
+
+
+def stat_file(pdf_path: str) -> Dict[str, Any]:
+    """Resolved path, name, mtime and size of a PDF (no content digest yet)."""
+    path = Path(pdf_path).resolve()
+    stat = path.stat()
+    return {'path': str(path), 'filename': path.name, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def stat_files(pdf_paths: List[str], manifest: Optional['CollectionManifest'] = None) -> List[Dict[str, Any]]:
+    """stat_file() plus 'digest' for each PDF, re-hashing only files whose manifest mtime or size differ.
+
+    Raises OSError if a PDF cannot be read.
+    """
+    files = []
+    for pdf_path in pdf_paths:
+        file = stat_file(pdf_path)
+        known = manifest.entry(file['path']) if manifest else None
+        if known and known['mtime_ns'] == file['mtime_ns'] and known['size'] == file['size']:
+            file['digest'] = known['digest']
+        else:
+            file['digest'] = file_digest(pdf_path)
+        files.append(file)
+    return files
+
+
+class CollectionManifest:
+    """Documents of a stored corpus index, in the order of the index's section rows.
+
+    Each entry records a PDF's resolved path, mtime, size and SHA-256 digest
+    together with how many section rows it contributed and its input_files
+    record (None when it yielded no pages). A PDF whose mtime and size still
+    match its entry is trusted without being re-hashed, so checking an
+    unchanged collection costs one stat() per file.
+    """
+
+    def __init__(self, settings: str, fingerprint: Optional[str], documents: List[Dict[str, Any]]):
+        self.settings = settings
+        self.fingerprint = fingerprint
+        self.documents = documents
+        self._by_path = {document['path']: document for document in documents}
+
+    def entry(self, path: str) -> Optional[Dict[str, Any]]:
+        """The entry for a resolved path, or None if the PDF is not in the manifest."""
+        return self._by_path.get(path)
+
+    def row_ranges(self) -> Dict[str, Tuple[int, int]]:
+        """(start, stop) index rows of each document's sections, by path."""
+        ranges, start = {}, 0
+        for document in self.documents:
+            ranges[document['path']] = (start, start + document['sections'])
+            start += document['sections']
+        return ranges
+
+    def diff(self, files: List[Dict[str, Any]]) -> Tuple[List[int], List[int], List[Dict[str, Any]]]:
+        """Positions of unchanged and of added-or-changed files, plus the entries of removed PDFs."""
+        current = {file['path'] for file in files}
+        unchanged, pending = [], []
+        for i, file in enumerate(files):
+            entry = self.entry(file['path'])
+            (unchanged if entry and entry['digest'] == file['digest'] else pending).append(i)
+        removed = [document for document in self.documents if document['path'] not in current]
+        return unchanged, pending, removed
+
+    def refresh_stats(self, files: List[Dict[str, Any]]) -> bool:
+        """Record new mtimes and sizes of files whose content is unchanged (e.g. touched PDFs).
+
+        Returns whether any entry was updated.
+        """
+        updated = False
+        for file in files:
+            entry = self.entry(file['path'])
+            if entry and entry['digest'] == file['digest'] and (
+                    entry['mtime_ns'], entry['size']) != (file['mtime_ns'], file['size']):
+                entry.update(mtime_ns=file['mtime_ns'], size=file['size'])
+                updated = True
+        return updated
+
+    def save(self, index_dir: str, engine: str) -> None:
+        """Write the manifest next to the engine's index, replacing any previous one atomically."""
+        save_json(str(Path(index_dir) / f'{engine}.manifest.json'), {
+            'version': MANIFEST_FORMAT_VERSION,
+            'settings': self.settings,
+            'fingerprint': self.fingerprint,
+            'documents': self.documents
+        })
+
+    @classmethod
+    def load(cls, index_dir: str, engine: str) -> Optional['CollectionManifest']:
+        """Read a manifest written by save(); None if it is missing, unreadable or outdated."""
+        try:
+            meta = load_json(str(Path(index_dir) / f'{engine}.manifest.json'))
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != MANIFEST_FORMAT_VERSION:
+            return None
+        return cls(meta['settings'], meta['fingerprint'], meta['documents'])
+
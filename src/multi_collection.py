@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Multi-Collection Processing
+Finds document collections (input subdirectories or manifest entries) and answers each one's
+persona/job concurrently, every collection with its own ranker and output, on one shared worker pool.
+"""
+
+import re
+import json
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from config import EXTRACTION_BACKEND, COLLECTION_FILE, COLLECTION_THREADS
+
+from .processor import DocumentIntelligenceProcessor, shared_pool
+
+
+def _query_text(value: Any, key: str) -> Optional[str]:
+    """A persona or job as a string, also accepting the {"role": ...} / {"task": ...} object form."""
+    if isinstance(value, dict):
+        value = value.get(key)
+    return value or None
+
+
+def _collection(name: str, source: str, pdf_paths: List[Path], settings: Dict[str, Any],
+                persona: Optional[str], job_to_be_done: Optional[str]) -> Dict[str, Any]:
+    """A collection record, its query taken from settings or else from the defaults given."""
+    persona = _query_text(settings.get('persona'), 'role') or persona
+    job_to_be_done = _query_text(settings.get('job_to_be_done'), 'task') or job_to_be_done
+    if not persona or not job_to_be_done:
+        raise ValueError(f"{source}: no 'persona' and 'job_to_be_done' given for collection '{name}'")
+    return {
+        'name': re.sub(r'[^A-Za-z0-9_.-]+', '_', name),
+        'source': source,
+        'pdf_paths': [str(path) for path in pdf_paths],
+        'persona': persona,
+        'job_to_be_done': job_to_be_done
+    }
+
+
+def discover_collections(input_dir: str, persona: Optional[str] = None,
+                         job_to_be_done: Optional[str] = None) -> List[Dict[str, Any]]:
+    """One collection per subdirectory of input_dir that holds PDFs (at any depth), in name order.
+
+    A collection's persona and job-to-be-done are read from the
+    COLLECTION_FILE in its directory, falling back to the ones given here.
+    """
+    collections = []
+    for directory in sorted(path for path in Path(input_dir).iterdir() if path.is_dir()):
+        pdf_paths = sorted(directory.rglob('*.pdf'))
+        if not pdf_paths:
+            continue
+        settings_file = directory / COLLECTION_FILE
+        settings = json.loads(settings_file.read_text(encoding='utf-8')) if settings_file.exists() else {}
+        collections.append(_collection(directory.name, str(directory), pdf_paths, settings,
+                                       persona, job_to_be_done))
+    return collections
+
+
+def load_collections(manifest_file: str, input_dir: str, persona: Optional[str] = None,
+                     job_to_be_done: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read collections from a JSONL manifest, one object per line.
+
+    Each object may give "name", "input_dir", "documents", "persona" and
+    "job_to_be_done"; every field is optional. input_dir is relative to
+    the given input_dir (default: that directory itself); documents lists
+    PDF paths relative to the collection's directory (default: every PDF
+    under it). Missing personas and jobs fall back to the ones given here.
+    """
+    collections = []
+    with open(manifest_file, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            source = f"{manifest_file}:{line_number}"
+            directory = Path(input_dir) / entry.get('input_dir', '')
+            if 'documents' in entry:
+                pdf_paths = [directory / document for document in entry['documents']]
+                missing = [str(path) for path in pdf_paths if not path.is_file()]
+                if missing:
+                    raise ValueError(f"{source}: documents not found: {', '.join(missing)}")
+            else:
+                pdf_paths = sorted(directory.rglob('*.pdf'))
+            if not pdf_paths:
+                raise ValueError(f"{source}: no PDF files in '{directory}'")
+            name = str(entry.get('name') or entry.get('input_dir') or f'collection_{len(collections) + 1:03d}')
+            collections.append(_collection(name, source, pdf_paths, entry, persona, job_to_be_done))
+
+    names = [collection['name'] for collection in collections]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{manifest_file}: collection names must be unique: {', '.join(duplicates)}")
+    return collections
+
+
+def process_collections(collections: List[Dict[str, Any]], processor_options: Dict[str, Any], workers: int,
+                        threads: int = COLLECTION_THREADS) -> List[Dict[str, Any]]:
+    """Answer every collection's query, up to threads collections at a time, on one shared worker pool.
+
+    Each collection gets its own DocumentIntelligenceProcessor, built from
+    processor_options, so rankers, deduplication and run statistics are
+    never mixed; with an index_dir, its corpus index lives in a
+    subdirectory named after the collection. The section cache is shared.
+    The pool's workers are started once, before any collection, and
+    extract the documents of all of them as they come in.
+
+    Returns one {'collection', 'processor', 'output'} (or {'collection',
+    'error'}) per collection, in input order. metadata.collection of every
+    output holds the collection's name, its own processing time and the
+    shared pool's start-up time.
+    """
+    backend = processor_options.get('backend', EXTRACTION_BACKEND)
+    with shared_pool(backend, workers) as pool:
+        startup_seconds = pool.warm()
+        print(f"Started {pool.workers} shared worker processes in {startup_seconds:.2f} seconds")
+
+        def run(collection: Dict[str, Any]) -> Dict[str, Any]:
+            options = {**processor_options, 'workers': pool.workers, 'pool': pool}
+            if options.get('index_dir'):
+                options['index_dir'] = str(Path(options['index_dir']) / collection['name'])
+            start_time = time.perf_counter()
+            try:
+                processor = DocumentIntelligenceProcessor(**options)
+                output = processor.process_documents(collection['pdf_paths'], collection['persona'],
+                                                     collection['job_to_be_done'])
+            except Exception as e:
+                print(f"Error processing collection '{collection['name']}': {e}")
+                return {'collection': collection, 'error': str(e)}
+            output['metadata']['collection'] = {
+                'name': collection['name'],
+                'source': collection['source'],
+                'processing_time_seconds': round(time.perf_counter() - start_time, 2),
+                'concurrent_collections': min(threads, len(collections)),
+                'shared_pool_startup_seconds': round(startup_seconds, 2)
+            }
+            return {'collection': collection, 'processor': processor, 'output': output}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(threads, len(collections)))) as executor:
+            return list(executor.map(run, collections))
@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+"""
+Pipeline Options
+Extraction backends and ranking engines, kept apart from the modules implementing them so that
+parsing the command line (e.g. --help) imports nothing heavy.
+"""
+
+BACKENDS = ('pymupdf', 'pdfplumber', 'text')
+RANKERS = ('tfidf', 'bm25', 'hashing')
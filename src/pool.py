@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Shared Worker Pool
+One process pool kept warm for several processors running side by side, e.g. one per collection.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+
+class WorkerPool:
+    """A ProcessPoolExecutor that many threads submit to, replaced if a worker crash breaks it.
+
+    Workers are started once, by warm(), so process start-up and the
+    initializer (e.g. creating the PDF extractor) are paid once per run
+    rather than once per collection. Futures of a broken pool still fail
+    with BrokenProcessPool; only later submissions go to the replacement.
+    """
+
+    def __init__(self, workers: int, initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        self.workers = max(1, workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer,
+                                   initargs=self.initargs)
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        """Schedule fn(*args) on a worker, restarting the pool first if it is broken."""
+        with self._lock:
+            try:
+                return self._executor.submit(fn, *args)
+            except BrokenProcessPool:
+                print("Warning: shared worker pool broke, starting a new one")
+                self._executor.shutdown(wait=False)
+                self._executor = self._new_executor()
+                self.restarts += 1
+                return self._executor.submit(fn, *args)
+
+    def warm(self) -> float:
+        """Start every worker now and wait until each is ready; returns the seconds it took."""
+        start_time = time.perf_counter()
+        for future in [self.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        return time.perf_counter() - start_time
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._executor.shutdown()
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
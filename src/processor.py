@@ -7,97 +7,1068 @@ Main orchestrator for the document intelligence system.
 import os
 import json
 import time
+import hashlib
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Set, Tuple
 from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 
-from .extractor import PDFExtractor
+import numpy as np
+
+from config import (EXTRACTION_BACKEND, CACHE_DIR, TOP_SECTIONS, TOP_SUBSECTIONS, SUBSECTION_SOURCE_SECTIONS,
+                    RANKER, PAGE_BUDGET, PAGE_NEIGHBOURS, DEDUP, DEDUP_PARAMS)
+
+from .cache import SectionCache, settings_digest
+from .dedup import Deduplication, Deduplicator
+from .extractor import PDFExtractor, EXTRACTOR_VERSION, import_backend, import_fitz
+from .instrumentation import PerformanceRecorder
+from .manifest import CollectionManifest, stat_files
+from .pool import WorkerPool
 from .ranker import RelevanceRanker
+from .result_cache import ResultCache
+from .scheduler import DeadlineScheduler, limit_pages, page_count
+from .screening import page_texts, select_pages
+from .sections import SectionStore
+
+
+# Output metadata describing how one run went rather than its result, left out of stored results,
+# and the timings within the reports that are kept, zeroed when a stored result is served
+RUN_METADATA = ('performance', 'cache', 'index', 'time_budget', 'timing', 'result_cache')
+RUN_TIMINGS = {
+    'deduplication': ('dedup_seconds', 'estimated_ranking_seconds_saved'),
+    'page_selection': ('screening_seconds', 'estimated_seconds_saved')
+}
+
+_worker_extractor = None
+_fallback_extractors: Dict[str, PDFExtractor] = {}
+
+
+def _init_worker(backend: str) -> None:
+    """Create one PDFExtractor per pool process."""
+    global _worker_extractor
+    _worker_extractor = PDFExtractor(backend=backend)
+
+
+def _extract_in_worker(pdf_path: str, pages: Optional[Set[int]] = None,
+                       backend: Optional[str] = None) -> Dict[str, Any]:
+    """Pool entry point: extract a document with the process-local extractor, or one for another backend."""
+    extractor = _worker_extractor
+    if backend is not None and backend != extractor.backend:
+        if backend not in _fallback_extractors:
+            _fallback_extractors[backend] = PDFExtractor(backend=backend)
+        extractor = _fallback_extractors[backend]
+    return _extract_document(extractor, pdf_path, pages)
+
+
+def _extract_document(extractor: PDFExtractor, pdf_path: str, pages: Optional[Set[int]] = None) -> Dict[str, Any]:
+    """Stream a PDF's pages (or only the given page numbers) through section detection.
+    
+    Only the page count, section dicts and stage timings are returned so the
+    result stays small and picklable; page text and font summaries are never
+    retained.
+    """
+    try:
+        timings, document = {}, {}
+        page_count, sections = extractor.extract_sections(pdf_path, timings, pages, document)
+        return {'pages': page_count, 'page_count': document['page_count'], 'sections': sections, 'timings': timings}
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def _manifest_entries(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Manifest entries of the documents that extracted; a failed one is left out, so it counts as added next time."""
+    return [entry for entry in entries if 'error' not in entry]
+
+
+def _restrict_to_pages(result: Dict[str, Any], pages: Set[int]) -> Dict[str, Any]:
+    """A whole-document result cut down to what extracting only the given pages would return.
+    
+    Sections never span pages, so filtering by page number is exact.
+    """
+    sections = result['sections']
+    rows = np.flatnonzero(np.isin(sections.page_numbers, sorted(pages)))
+    return {**result, 'pages': len(pages), 'sections': sections.take(rows)}
+
+
+def _future_results(futures: List[Future]) -> Iterator[Dict[str, Any]]:
+    """Extraction results of futures in order; a crashed or failing worker gives an {'error': ...} result."""
+    for future in futures:
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            result = {'error': f"worker crashed: {e}", 'broken': True}
+        except Exception as e:
+            result = {'error': f"worker failed: {e!r}"}
+        yield result
+
+
+def shared_pool(backend: str, workers: int) -> WorkerPool:
+    """A WorkerPool of extraction workers for processors with this backend to share (see the pool argument)."""
+    import_backend(backend)
+    return WorkerPool(workers, _init_worker, (backend,))
+
+
+def _shutdown_pool(pool: ProcessPoolExecutor, terminate: bool = False) -> None:
+    """Shut a pool down; with terminate, kill its workers instead of waiting for their running tasks."""
+    if not terminate:
+        pool.shutdown()
+        return
+    processes = list((getattr(pool, '_processes', None) or {}).values())  # no public API before Python 3.14
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
 
 
 class DocumentIntelligenceProcessor:
-    """Main processor for document intelligence system."""
+    """Main processor for document intelligence system.
     
-    def __init__(self):
-        self.extractor = PDFExtractor()
-        self.ranker = RelevanceRanker()
+    Documents are extracted on a process pool started for each run, or on
+    pool, a WorkerPool from shared_pool(), when processors for several
+    collections run side by side. With a result_cache, a query repeated
+    against an unchanged collection is answered with its stored output.
+    """
     
-    def process_documents(self, pdf_paths: List[str], persona: str, 
-                         job_to_be_done: str) -> Dict[str, Any]:
-        """Process multiple PDF documents and extract relevant sections."""
-        start_time = time.time()
+    def __init__(self, backend: str = EXTRACTION_BACKEND, workers: Optional[int] = None,
+                 cache_dir: Optional[str] = CACHE_DIR, index_dir: Optional[str] = None,
+                 top_sections: int = TOP_SECTIONS, top_subsections: int = TOP_SUBSECTIONS,
+                 trace_path: Optional[str] = None, ranker: str = RANKER,
+                 page_budget: Optional[int] = PAGE_BUDGET, page_neighbours: int = PAGE_NEIGHBOURS,
+                 dedup: bool = DEDUP, pool: Optional[WorkerPool] = None,
+                 result_cache: Optional[ResultCache] = None):
+        self.extractor = PDFExtractor(backend=backend)
+        self.ranker = RelevanceRanker(engine=ranker)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.pool = pool
+        self.result_cache = result_cache
+        self.cache = SectionCache(cache_dir, EXTRACTOR_VERSION, backend) if cache_dir else None
+        self.index_dir = index_dir
+        self.top_sections = top_sections
+        self.top_subsections = top_subsections
+        self.trace_path = trace_path
+        self.recorder = PerformanceRecorder(trace_path)
+        self.page_budget = page_budget
+        self.page_neighbours = page_neighbours
+        self.dedup_params = dict(DEDUP_PARAMS) if dedup else None
+        self.deduplication: Optional[Deduplication] = None
+        self.scheduler: Optional[DeadlineScheduler] = None
+        self._digests: Dict[str, str] = {}  # this run's content digest of each PDF, by input path
+    
+    def _start_run(self, kind: str, **fields) -> None:
+        """Begin a new run: fresh performance recorder and cache statistics, no deadline."""
+        self.recorder = PerformanceRecorder(self.trace_path)
+        self.scheduler = None
+        self._digests = {}
+        self.recorder.event('run_start', kind=kind, **fields)
+        if self.cache:
+            self.cache.reset_stats()
+    
+    def _settings_key(self) -> str:
+        """Digest of the extraction, ranker and deduplication settings a stored index was built with."""
+        settings = json.dumps({
+            'settings': settings_digest(EXTRACTOR_VERSION, self.extractor.backend),
+            'ranker': self.ranker.settings(),
+            'dedup': self.dedup_params
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(settings.encode('utf-8')).hexdigest()
+    
+    def _collection_fingerprint(self, files: List[Dict[str, Any]]) -> str:
+        """Digest of the collection's PDF names and contents (from stat_files) plus the settings key."""
+        fingerprint = json.dumps({
+            'settings': self._settings_key(),
+            'documents': [[file['filename'], file['digest']] for file in files]
+        }, sort_keys=True)
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+    
+    def _collection_key(self, pdf_paths: List[str]) -> Optional[str]:
+        """Result cache fingerprint of a collection: everything but the query that decides its output.
         
-        print(f"Starting document intelligence processing...")
-        print(f"Persona: {persona}")
-        print(f"Job-to-be-done: {job_to_be_done}")
-        print(f"Processing {len(pdf_paths)} documents")
+        Covers the PDFs' paths and contents, the extraction, ranker and
+        deduplication settings and the output sizes; None if a PDF cannot be
+        read. With an index_dir, unchanged PDFs are not re-hashed.
+        """
+        manifest = CollectionManifest.load(self.index_dir, self.ranker.engine) if self.index_dir else None
+        try:
+            files = self._stat_files(pdf_paths, manifest)
+        except OSError:
+            return None
+        key = json.dumps({
+            'collection': self._collection_fingerprint(files),
+            'paths': [file['path'] for file in files],
+            'output': [self.top_sections, self.top_subsections, SUBSECTION_SOURCE_SECTIONS,
+                       self.page_budget, self.page_neighbours]
+        })
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def _stat_files(self, pdf_paths: List[str], manifest: Optional[CollectionManifest]) -> List[Dict[str, Any]]:
+        """stat_files, remembering the digests so that this run's section cache lookups do not hash again."""
+        files = stat_files(pdf_paths, manifest)
+        self._digests.update(zip(pdf_paths, (file['digest'] for file in files)))
+        return files
+    
+    def _extraction_complete(self) -> bool:
+        """Whether every document of this run was extracted in full.
+        
+        None may have failed, unreadable or damaged PDFs included, or been
+        degraded or skipped to meet a deadline.
+        """
+        if self.scheduler is not None and self.scheduler.degraded:
+            return False
+        return not any('error' in document for document in self.recorder.documents)
+    
+    def _cached_result(self, collection_key: Optional[str], query_text: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """(result cache key, stored output or None) for a query; (None, None) without a cache or fingerprint."""
+        if self.result_cache is None or not collection_key:
+            return None, None
+        key = self.result_cache.key(collection_key, query_text)
+        return key, self.result_cache.get(key)
+    
+    def _serve_cached(self, output: Dict[str, Any], persona: str, job_to_be_done: str,
+                      start_time: float) -> Dict[str, Any]:
+        """A stored output relabelled for this request: same ranking, this query's persona, job and time."""
+        print("Result cache hit: returning the stored output for this collection and query")
+        metadata = output['metadata']
+        metadata.update(persona=persona, job_to_be_done=job_to_be_done, timestamp=datetime.now().isoformat(),
+                        processing_time_seconds=round(time.time() - start_time, 2))
+        for name, fields in RUN_TIMINGS.items():
+            if name in metadata:
+                metadata[name].update(dict.fromkeys(fields, 0.0))
+        output['metadata']['result_cache'] = {'hit': True, **self.result_cache.stats()}
+        return output
+    
+    def _store_result(self, key: Optional[str], output: Dict[str, Any]) -> None:
+        """Store a freshly computed output under key, without the details that only describe this run.
+        
+        Outputs of a run in which a document failed to extract, or extraction
+        was degraded to meet a deadline, are not stored, so a later query
+        computes a complete one.
+        """
+        if key is None:
+            return
+        if self._extraction_complete():
+            metadata = {name: value for name, value in output['metadata'].items() if name not in RUN_METADATA}
+            for name, fields in RUN_TIMINGS.items():
+                if name in metadata:
+                    metadata[name] = {field: value for field, value in metadata[name].items() if field not in fields}
+            self.result_cache.put(key, {**output, 'metadata': metadata})
+        output['metadata']['result_cache'] = {'hit': False, **self.result_cache.stats()}
+    
+    def prepare_collection(self, pdf_paths: List[str]) -> Tuple[SectionStore, List[Dict[str, Any]], Optional[str]]:
+        """Return (sections, input_files, index status) for a document collection.
+        
+        With an index_dir, a stored corpus index whose fingerprint matches the
+        collection is loaded and nothing is extracted or refitted ('loaded').
+        If the stored index and its manifest describe an earlier state of the
+        collection with the same settings, only added and changed PDFs are
+        extracted and the index is patched ('updated'). Otherwise the PDFs are
+        extracted and, with an index_dir, the fitted index and its manifest
+        are written for later runs ('built').
+        
+        The sections returned, and indexed, are the representatives of the
+        collection's near-duplicate clusters; the whole collection and its
+        clusters are kept in self.deduplication (and stored next to the index).
+        """
+        fingerprint = files = None
+        if self.index_dir:
+            with self.recorder.stage('index_load'):
+                manifest = CollectionManifest.load(self.index_dir, self.ranker.engine)
+                try:
+                    files = self._stat_files(pdf_paths, manifest)
+                    fingerprint = self._collection_fingerprint(files)
+                except OSError:
+                    pass
+                index = self.ranker.load_index(self.index_dir)
+                deduplication = (Deduplication.load(self.index_dir, self._dedup_prefix(), index.sections)
+                                 if index is not None else None)
+            if deduplication is None or deduplication.fingerprint != getattr(index, 'fingerprint', None):
+                index = None  # an index is only usable together with its clusters
+            if index is not None and fingerprint and index.fingerprint == fingerprint:
+                print(f"Loaded corpus index from {self.index_dir} ({len(index.sections)} sections)")
+                self.ranker.use_index(index)
+                self.deduplication = deduplication
+                if manifest is not None and manifest.refresh_stats(files):
+                    self._save_manifest(manifest)
+                return index.sections, list(index.input_files), 'loaded'
+            if (index is not None and files is not None and manifest is not None
+                    and manifest.fingerprint == index.fingerprint and manifest.settings == self._settings_key()):
+                return self._update_collection(pdf_paths, files, manifest, index, deduplication, fingerprint)
+        
+        # Engines with an incremental builder vectorize each document as soon as it is
+        # extracted; near-duplicates are dropped document by document before that
+        builder = self.ranker.index_builder()
+        deduplicator = self._deduplicator()
+        
+        def on_sections(sections: SectionStore) -> None:
+            if deduplicator is not None:
+                with self.recorder.stage('deduplication'):
+                    kept = deduplicator.add(sections)
+                if len(kept) < len(sections):
+                    sections = sections.take(kept)
+            if builder is not None and len(sections):
+                with self.recorder.stage('vectorization'):
+                    builder.add(sections)
+        
+        all_sections, input_files, documents = self._collect_sections(
+            pdf_paths, on_sections if builder is not None or deduplicator is not None else None
+        )
+        self.deduplication = (deduplicator.finish(fingerprint) if deduplicator is not None
+                              else Deduplication.identity(all_sections, fingerprint))
+        all_sections = self.deduplication.representative_sections()
+        if builder is not None and all_sections:
+            with self.recorder.stage('vectorization'):
+                self.ranker.use_index(builder.finish(fingerprint=fingerprint, input_files=input_files))
+            all_sections = self.ranker.index.sections  # the same sections, as the store the index covers
+        if not self.index_dir or not all_sections:
+            return all_sections, input_files, None
+        if self._extraction_degraded() or self._extraction_failed(documents):
+            return all_sections, input_files, None
+        
+        try:
+            if builder is None:
+                with self.recorder.stage('vectorization'):
+                    self.ranker.build_index(all_sections, fingerprint=fingerprint, input_files=input_files)
+            index = self.ranker.index
+            with self.recorder.stage('index_save'):
+                index.save(self.index_dir)
+                self.deduplication.save(self.index_dir, self._dedup_prefix())
+                if files is not None:
+                    self._save_manifest(CollectionManifest(
+                        self._settings_key(), fingerprint,
+                        _manifest_entries({**file, **document} for file, document in zip(files, documents))
+                    ))
+        except (ValueError, OSError) as e:
+            print(f"Warning: could not build corpus index: {e}")
+            return all_sections, input_files, None
+        print(f"Saved corpus index to {self.index_dir}")
+        return all_sections, input_files, 'built'
+    
+    def _update_collection(self, pdf_paths: List[str], files: List[Dict[str, Any]], manifest: CollectionManifest,
+                           index, deduplication: Deduplication,
+                           fingerprint: str) -> Tuple[SectionStore, List[Dict[str, Any]], Optional[str]]:
+        """Bring a stored index up to date by extracting only the added and changed PDFs.
+        
+        Sections of unchanged PDFs are taken from the stored collection and
+        those of changed and removed PDFs are dropped; with the new documents'
+        sections they are laid out in input order, as a fresh build would, and
+        clustered again. When every representative among the kept sections
+        was one before, the index is patched with the new representatives;
+        otherwise (a cluster lost its representative or clusters merged) it
+        is rebuilt from the representatives. The new index, clusters and
+        manifest replace the stored ones.
+        """
+        unchanged, pending, removed = manifest.diff(files)
+        print(f"Updating corpus index in {self.index_dir}: {len(pending)} added or changed, "
+              f"{len(removed)} removed, {len(unchanged)} unchanged documents")
+        self.recorder.event('index_update', changed=len(pending), removed=len(removed), unchanged=len(unchanged))
+        
+        ranges = manifest.row_ranges()
+        rows = [np.arange(*ranges[files[i]['path']]) for i in unchanged]
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        new_sections, _, documents = self._collect_sections([pdf_paths[i] for i in pending])
+        new_documents = dict(zip(pending, documents))
+        entries = [
+            {**file, **new_documents[i]} if i in new_documents else {**manifest.entry(file['path']), **file}
+            for i, file in enumerate(files)
+        ]
+        
+        # The kept rows are followed by the new sections; source[j] is the row of that
+        # sequence that holds section j of the collection in input order
+        new_starts = np.cumsum([len(rows)] + [document['sections'] for document in documents])
+        new_starts = dict(zip(pending, new_starts.tolist()))
+        source, kept_start = [], 0
+        for i, entry in enumerate(entries):
+            if i in new_starts:
+                start = new_starts[i]
+            else:
+                start, kept_start = kept_start, kept_start + entry['sections']
+            source.append(np.arange(start, start + entry['sections']))
+        source = np.concatenate(source) if source else np.empty(0, dtype=np.int64)
+        collection = SectionStore.concat([deduplication.sections.take(rows), new_sections]).take(source)
+        
+        deduplicator = self._deduplicator()
+        if deduplicator is not None:
+            with self.recorder.stage('deduplication'):
+                deduplicator.add(collection)
+            self.deduplication = deduplicator.finish(fingerprint)
+        else:
+            self.deduplication = Deduplication.identity(collection, fingerprint)
+        
+        # The index can be patched only if every kept representative is already one of its rows
+        representatives = source[self.deduplication.representatives]
+        is_kept = representatives < len(rows)
+        kept = rows[representatives[is_kept]]
+        patchable = bool(np.isin(kept, deduplication.representatives).all())
+        input_files = [
+            {**entry['input_file'], 'path': pdf_path}
+            for pdf_path, entry in zip(pdf_paths, entries) if entry['input_file']
+        ]
+        if self._extraction_degraded() or self._extraction_failed(documents):
+            return self.deduplication.representative_sections(), input_files, None
+        
+        try:
+            with self.recorder.stage('vectorization'):
+                if patchable:
+                    # kept representatives, then new ones, reordered into collection order
+                    order = np.argsort(np.concatenate([np.flatnonzero(is_kept), np.flatnonzero(~is_kept)]),
+                                       kind='stable')
+                    index = self.ranker.update_index(
+                        index, np.searchsorted(deduplication.representatives, kept),
+                        new_sections.take(representatives[~is_kept] - len(rows)), order=order,
+                        fingerprint=fingerprint, input_files=input_files
+                    )
+                else:
+                    index = self.ranker.build_index(self.deduplication.representative_sections(),
+                                                    fingerprint=fingerprint, input_files=input_files)
+            with self.recorder.stage('index_save'):
+                index.save(self.index_dir)
+                self.deduplication.save(self.index_dir, self._dedup_prefix())
+                self._save_manifest(CollectionManifest(self._settings_key(), fingerprint, _manifest_entries(entries)))
+        except (ValueError, OSError) as e:
+            print(f"Warning: could not update corpus index: {e}")
+            return self.deduplication.representative_sections(), input_files, None
+        print(f"Saved corpus index to {self.index_dir}")
+        return index.sections, input_files, 'updated'
+    
+    def _extraction_degraded(self) -> bool:
+        """Whether the deadline degraded this run's extraction, in which case the index must not be stored."""
+        if self.scheduler is None or not self.scheduler.degraded:
+            return False
+        print("Corpus index not saved: extraction was degraded to stay within the time budget")
+        return True
+    
+    def _extraction_failed(self, documents: List[Dict[str, Any]]) -> bool:
+        """Whether any document failed to extract, in which case the index must not be stored.
+        
+        Failures are the {'error': ...} results of _extract_document, which
+        include PDFs the extractor cannot open or finds damaged. The index
+        fingerprint covers only the PDFs' contents, so a stored index would
+        pass for complete and the failed PDFs would not be tried again until
+        they change.
+        """
+        failed = sum(1 for document in documents if 'error' in document)
+        if not failed:
+            return False
+        print(f"Corpus index not saved: {failed} document(s) failed to extract and will be retried")
+        return True
+    
+    def _deduplicator(self) -> Optional[Deduplicator]:
+        """A fresh near-duplicate clusterer, or None when deduplication is disabled."""
+        return Deduplicator(**self.dedup_params) if self.dedup_params else None
+    
+    def _dedup_prefix(self) -> str:
+        return f'{self.ranker.engine}.dedup'
+    
+    def _save_manifest(self, manifest: CollectionManifest) -> None:
+        manifest.save(self.index_dir, self.ranker.engine)
+    
+    def prepare_candidates(self, pdf_paths: List[str],
+                           query_text: str) -> Tuple[SectionStore, List[Dict[str, Any]], Dict[str, Any]]:
+        """Return (sections, input_files, page selection report) from a coarse-to-fine pass for one query.
+        
+        Phase one reads every page's plain text and scores the pages against
+        the query (see screening.select_pages); phase two runs layout and
+        heading analysis only on the page_budget best pages and their
+        page_neighbours, and documents without a selected page are not parsed
+        at all. With a section cache, the page texts are kept there too, so a
+        PDF is screened only the first time, and the sections of a cache hit
+        are cut down to its selected pages rather than parsed. The sections
+        depend on the query, so the corpus index is neither loaded nor saved.
+        The report counts the skipped pages and estimates the time saved from
+        the analysis cost measured per character of text in this run, less
+        the time spent screening; only the skipped pages of cache misses
+        count, and the estimate is 0 when no page was parsed.
+        """
+        cached = self._cache_lookup(pdf_paths)
+        screening_start = time.perf_counter()
+        with self.recorder.stage('page_screening', documents=len(pdf_paths)):
+            documents = [self.cache.get_page_texts(key) if key else None for key in cached[1]]
+            unscreened = [i for i, pages in enumerate(documents) if pages is None]
+            unreadable = set()
+            for i, pages in zip(unscreened, self._screen_documents([pdf_paths[i] for i in unscreened])):
+                if pages is None:
+                    unreadable.add(i)
+                    pages = []
+                elif cached[1][i]:
+                    self.cache.put_page_texts(cached[1][i], pages)
+                documents[i] = pages
+            selected = select_pages(documents, query_text, self.page_budget, self.page_neighbours)
+        screening_seconds = time.perf_counter() - screening_start
         
-        all_sections = []
+        # A PDF that could not be screened is extracted whole, so its failure is reported like any other
+        candidates = [i for i, pages in enumerate(selected) if pages or i in unreadable]
+        pages_total = sum(1 for pages in documents for text in pages if text)
+        pages_analyzed = sum(len(pages) for pages in selected)
+        print(f"Page screening: analysing {pages_analyzed} of {pages_total} pages "
+              f"from {len(candidates)} of {len(pdf_paths)} documents ({len(unscreened)} screened)")
+        self.recorder.event('page_selection', pages_total=pages_total, pages_analyzed=pages_analyzed,
+                            documents=len(candidates))
+        all_sections, input_files, _ = self._collect_sections([pdf_paths[i] for i in candidates],
+                                                              pages=[None if i in unreadable else selected[i]
+                                                                     for i in candidates],
+                                                              cached=([cached[0][i] for i in candidates],
+                                                                      [cached[1][i] for i in candidates]))
+        deduplicator = self._deduplicator()
+        if deduplicator is not None:
+            with self.recorder.stage('deduplication'):
+                deduplicator.add(all_sections)
+            self.deduplication = deduplicator.finish()
+        else:
+            self.deduplication = Deduplication.identity(all_sections)
+        
+        # Analysis cost grows with a page's text, so the documents parsed in this run (not served
+        # from the cache; recorded once each, in candidate order) give a cost per character
+        parsed_chars = parsed_seconds = 0
+        for i, document in zip(candidates, self.recorder.documents):
+            if 'extraction_seconds' in document:
+                parsed_chars += sum(len(documents[i][page - 1]) for page in selected[i])
+                parsed_seconds += document['extraction_seconds'] + document['heading_seconds']
+        skipped_chars = sum(len(text) for i, pages in enumerate(documents) if cached[0][i] is None
+                            for page, text in enumerate(pages, 1) if page not in selected[i])
+        report = {
+            'page_budget': self.page_budget,
+            'page_neighbours': self.page_neighbours,
+            'pages_total': pages_total,
+            'pages_analyzed': pages_analyzed,
+            'pages_skipped': pages_total - pages_analyzed,
+            'documents_skipped': len(pdf_paths) - len(candidates),
+            'documents_screened': len(unscreened),
+            'screening_seconds': round(screening_seconds, 4),
+            'estimated_seconds_saved': (
+                round(skipped_chars * parsed_seconds / parsed_chars - screening_seconds, 4)
+                if parsed_chars else 0.0
+            )
+        }
+        return self.deduplication.representative_sections(), input_files, report
+    
+    def _collect_sections(self, pdf_paths: List[str],
+                          on_sections: Optional[Callable[[SectionStore], None]] = None,
+                          pages: Optional[List[Set[int]]] = None,
+                          cached: Optional[Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]] = None
+                          ) -> Tuple[SectionStore, List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Extract every PDF and gather its sections and input file metadata.
+        
+        Also returns one {'sections': count, 'input_file': record or None}
+        summary per PDF, in input order, for the collection manifest; the
+        summary of a PDF that failed to extract also holds its 'error'.
+        on_sections, if given, is called with each document's sections as
+        soon as that document is available, while later ones are still being
+        extracted by the worker pool. pages (the page numbers to analyse in
+        each PDF) and cached (their section cache lookup), if given, are
+        passed on to _extract_documents.
+        """
+        stores = []
         input_files = []
+        documents = []
 
-        for i, pdf_path in enumerate(pdf_paths, 1):
+        # results first, so zip runs the generator to its end (closing the pool and the extraction stage)
+        results = self._extract_documents(pdf_paths, pages, cached)
+        for i, (result, pdf_path) in enumerate(zip(results, pdf_paths), 1):
             print(f"Processing document {i}/{len(pdf_paths)}: {Path(pdf_path).name}")
+            documents.append({'sections': 0, 'input_file': None})
             
-            try:
-                pages_content = self.extractor.extract_text_from_pdf(pdf_path)
-                
-                if not pages_content:
-                    print(f"  Warning: No content extracted from {pdf_path}")
-                    continue
+            if 'error' in result:
+                print(f"  Error processing {pdf_path}: {result['error']}")
+                documents[-1]['error'] = result['error']
+                self.recorder.record_document(filename=Path(pdf_path).name, error=result['error'])
+                continue
+            
+            self._record_document(pdf_path, result)
+            if not result['pages']:
+                print(f"  Warning: No content extracted from {pdf_path}")
+                continue
 
-                sections = self.extractor.detect_sections(pages_content)
-                all_sections.extend(sections)
+            sections = result['sections']
+            stores.append(sections)
+            if on_sections and sections:
+                on_sections(sections)
 
-                input_files.append({
-                    'filename': Path(pdf_path).name,
-                    'path': pdf_path,
-                    'pages': len(pages_content),
-                    'sections_found': len(sections)
-                })
+            input_files.append({
+                'filename': Path(pdf_path).name,
+                'path': pdf_path,
+                'pages': result['pages'],
+                'sections_found': len(sections)
+            })
+            documents[-1] = {'sections': len(sections), 'input_file': input_files[-1]}
+            
+            print(f"  Extracted {len(sections)} sections from {result['pages']} pages")
+        
+        return SectionStore.concat(stores), input_files, documents
+    
+    def _record_document(self, pdf_path: str, result: Dict[str, Any]) -> None:
+        """Record one document's size and, if it was parsed, its worker-side stage times."""
+        timings = result.get('timings')
+        document = {
+            'filename': Path(pdf_path).name,
+            'pages': result['pages'],
+            'sections': len(result['sections']),
+            'cached': timings is None
+        }
+        if 'degraded' in result:
+            document['mode'] = result['degraded']
+        if timings:
+            document['extraction_seconds'] = round(timings['extraction_seconds'], 4)
+            document['heading_seconds'] = round(timings['heading_seconds'], 4)
+            # summed over workers, so these can exceed the wall-clock 'extraction' stage
+            self.recorder.add_stage_time('page_parsing', timings['extraction_seconds'])
+            self.recorder.add_stage_time('heading_detection', timings['heading_seconds'])
+        self.recorder.record_document(**document)
+    
+    def _cache_lookup(self, pdf_paths: List[str]) -> Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]:
+        """Every PDF's section cache result (None for a miss) and key (None without a cache or if unreadable)."""
+        results = [None] * len(pdf_paths)
+        keys = [None] * len(pdf_paths)
+        if self.cache:
+            with self.recorder.stage('cache_lookup', documents=len(pdf_paths)):
+                for i, pdf_path in enumerate(pdf_paths):
+                    try:
+                        keys[i] = self.cache.key(pdf_path, self._digests.get(pdf_path))
+                    except OSError:
+                        self.cache.misses += 1
+                        continue
+                    results[i] = self.cache.get(keys[i], pdf_path)
+        return results, keys
+    
+    def _extract_documents(self, pdf_paths: List[str], pages: Optional[List[Set[int]]] = None,
+                           cached: Optional[Tuple[List[Optional[Dict[str, Any]]], List[Optional[str]]]] = None
+                           ) -> Iterator[Dict[str, Any]]:
+        """Extract and detect sections for every PDF, yielding results in input order.
+        
+        Documents found in the section cache are served without being parsed;
+        only the misses are extracted, and their results are stored. Each
+        result is yielded as soon as it is ready, so the caller can work on
+        one document while the pool is still extracting the next.
+        
+        With pages (one set of page numbers per PDF, or None for all of it),
+        misses are extracted from those pages only and, being partial, are not
+        cached; hits are cut down to the same pages, so the result does not
+        depend on the cache. Under a
+        deadline (self.scheduler) misses are extracted by _extract_scheduled,
+        and results of a degraded mode are not cached either. cached, if
+        given, is the _cache_lookup of pdf_paths the caller already made.
+        """
+        results, keys = cached if cached is not None else self._cache_lookup(pdf_paths)
+        pages = pages if pages is not None else [None] * len(pdf_paths)
+        results = [
+            _restrict_to_pages(result, pages[i]) if result is not None and pages[i] is not None else result
+            for i, result in enumerate(results)
+        ]
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        extract = self._extract_scheduled if self.scheduler is not None else self._extract_uncached
+        extracted = self.recorder.timed_iter('extraction', extract(
+            [pdf_paths[i] for i in pending], [pages[i] for i in pending]
+        ))
+        for i in range(len(pdf_paths)):
+            result = results[i]
+            if result is None:
+                result = next(extracted)
+                if keys[i] and pages[i] is None and 'error' not in result and 'degraded' not in result:
+                    self.cache.put(keys[i], result)
+            results[i] = None  # hand the result over without keeping a reference
+            yield result
+        for _ in extracted:  # finish the generator: closes the pool and ends the stage
+            pass
+    
+    def _screen_documents(self, pdf_paths: List[str]) -> List[Optional[List[str]]]:
+        """Every PDF's plain page texts (screening.page_texts), on a process pool when there are workers."""
+        if self.pool is not None:
+            futures = [self.pool.submit(page_texts, pdf_path) for pdf_path in pdf_paths]
+            try:
+                return [future.result() for future in futures]
+            except BrokenProcessPool as e:
+                print(f"Warning: page screening pool failed ({e}), screening in-process")
+                return [page_texts(pdf_path) for pdf_path in pdf_paths]
+        workers = min(self.workers, len(pdf_paths))
+        if workers <= 1:
+            return [page_texts(pdf_path) for pdf_path in pdf_paths]
+        import_fitz()  # once here rather than in every forked worker
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(page_texts, pdf_paths))
+        except BrokenProcessPool as e:
+            print(f"Warning: page screening pool failed ({e}), screening in-process")
+            return [page_texts(pdf_path) for pdf_path in pdf_paths]
+    
+    def _extract_uncached(self, pdf_paths: List[str],
+                          pages: Optional[List[Set[int]]] = None) -> Iterator[Dict[str, Any]]:
+        """Extract and detect sections for every PDF by parsing it, yielding results in input order.
+        
+        With more than one worker, or a shared pool, the documents are fanned
+        out to a process pool; a document that fails (or takes its worker
+        down) yields an {'error': ...} result instead of aborting the others.
+        pages, if given, limits each PDF to its set of page numbers.
+        """
+        pages = pages if pages is not None else [None] * len(pdf_paths)
+        workers = min(self.workers, len(pdf_paths))
+        if self.pool is not None:
+            results = self._run_shared(pdf_paths, pages)
+        elif workers <= 1:
+            for pdf_path, document_pages in zip(pdf_paths, pages):
+                yield _extract_document(self.extractor, pdf_path, document_pages)
+            return
+        else:
+            print(f"Extracting with {workers} worker processes")
+            results = self._run_pool(pdf_paths, workers, pages)
+        for pdf_path, document_pages, result in zip(pdf_paths, pages, results):
+            # A hard crash (e.g. a segfault in a PDF library) breaks the whole pool,
+            # so retry the affected documents one per fresh pool to isolate the culprit.
+            if result.get('broken'):
+                result = next(self._run_pool([pdf_path], 1, [document_pages]))
+                result.pop('broken', None)
+            yield result
+    
+    def _extract_scheduled(self, pdf_paths: List[str],
+                           pages: Optional[List[Set[int]]] = None) -> Iterator[Dict[str, Any]]:
+        """Extract every PDF in the order and modes the deadline scheduler picks, yielding results in input order.
+        
+        Documents are handed to a process pool (even with one worker, so a
+        parse can be cut off) one at a time as workers free up, each in the
+        mode chosen with the latest cost measurements. A degraded result
+        carries its mode under 'degraded'. Skipped documents, and documents
+        still running at the deadline, yield {'error': ...} results; the pool
+        is then terminated so that no parse holds the run past its budget.
+        """
+        scheduler = self.scheduler
+        pages = pages if pages is not None else [None] * len(pdf_paths)
+        counts = [len(document_pages) if document_pages is not None else page_count(pdf_path)
+                  for pdf_path, document_pages in zip(pdf_paths, pages)]
+        scheduler.plan([Path(pdf_path).name for pdf_path in pdf_paths], counts)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pdf_paths)
+        running = {}  # future -> (document, mode, pool)
+        workers = max(1, min(self.workers, len(pdf_paths)))
+        
+        # once here rather than in every forked worker; the cheaper modes parse with PyMuPDF
+        import_backend(self.extractor.backend)
+        import_fitz()
+        
+        def new_pool() -> ProcessPoolExecutor:
+            return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(self.extractor.backend,))
+        
+        pool = new_pool()
+        try:
+            emitted = 0
+            while emitted < len(pdf_paths):
+                while scheduler.waiting() and len(running) < workers:
+                    i, mode = scheduler.next()
+                    if mode is None:
+                        results[i] = {'error': 'skipped to stay within the time budget'}
+                        continue
+                    document_pages = limit_pages(pages[i], counts[i], mode)
+                    future = pool.submit(_extract_in_worker, pdf_paths[i], document_pages, mode['backend'])
+                    running[future] = (i, mode, pool)
                 
-                print(f"  Extracted {len(sections)} sections from {len(pages_content)} pages")
+                while emitted < len(pdf_paths) and results[emitted] is not None:
+                    result, results[emitted] = results[emitted], None
+                    emitted += 1
+                    yield result
+                if not running:
+                    continue
                 
-            except Exception as e:
-                print(f"  Error processing {pdf_path}: {e}")
-                continue
+                done, _ = wait(running, timeout=max(scheduler.remaining(), 0.0), return_when=FIRST_COMPLETED)
+                if not done:
+                    print("Time budget deadline reached, abandoning unfinished documents")
+                    _shutdown_pool(pool, terminate=True)
+                    pool = None
+                    for i in scheduler.abandon():
+                        results[i] = {'error': 'not extracted before the time budget deadline'}
+                    running = {}
+                    continue
+                for future in done:
+                    i, mode, future_pool = running.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        # a crash fails every document running on that pool; later ones get a fresh pool
+                        result = {'error': f"worker crashed: {e}"}
+                        if future_pool is pool:
+                            pool.shutdown(wait=False)
+                            pool = new_pool()
+                    except Exception as e:
+                        result = {'error': f"worker failed: {e!r}"}
+                    scheduler.finish(i, mode['backend'], result)
+                    if mode['name'] != 'full' and 'error' not in result:
+                        result['degraded'] = mode['name']
+                    results[i] = result
+        finally:
+            if pool is not None:
+                _shutdown_pool(pool, terminate=bool(running))
+    
+    def _run_pool(self, pdf_paths: List[str], workers: int,
+                  pages: List[Optional[Set[int]]]) -> Iterator[Dict[str, Any]]:
+        """Run _extract_in_worker over pdf_paths on a new process pool, yielding results in order."""
+        import_backend(self.extractor.backend)  # once here rather than in every forked worker
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.extractor.backend,)) as pool:
+            futures = [pool.submit(_extract_in_worker, pdf_path, document_pages)
+                       for pdf_path, document_pages in zip(pdf_paths, pages)]
+            yield from _future_results(futures)
+    
+    def _run_shared(self, pdf_paths: List[str], pages: List[Optional[Set[int]]]) -> Iterator[Dict[str, Any]]:
+        """Run _extract_in_worker over pdf_paths on the shared pool, yielding results in order.
+        
+        The backend is passed along, since the pool's workers may have been
+        started for another processor's.
+        """
+        futures = [self.pool.submit(_extract_in_worker, pdf_path, document_pages, self.extractor.backend)
+                   for pdf_path, document_pages in zip(pdf_paths, pages)]
+        yield from _future_results(futures)
+    
+    def process_documents(self, pdf_paths: List[str], persona: str, 
+                         job_to_be_done: str, time_budget: Optional[float] = None) -> Dict[str, Any]:
+        """Process multiple PDF documents and extract relevant sections.
+        
+        With a time_budget (seconds), documents that must be parsed are
+        scheduled against it (see DeadlineScheduler): cheapest first, in
+        cheaper extraction modes or not at all as the deadline nears, so a
+        ranked output is returned within the budget. The degradations applied
+        are reported under metadata.time_budget, and an index built from
+        degraded extraction is not saved.
         
-        print(f"\nTotal sections extracted: {len(all_sections)}")
+        With a result_cache, an output stored for the same collection
+        fingerprint and normalised query is returned without extracting or
+        ranking anything; metadata.result_cache tells whether it was a hit.
+        """
+        start_time = time.time()
+        run_start = time.perf_counter()
+        
+        print("Starting document intelligence processing...")
+        print(f"Persona: {persona}")
+        print(f"Job-to-be-done: {job_to_be_done}")
+        print(f"Processing {len(pdf_paths)} documents")
+        
+        self._start_run('single', documents=len(pdf_paths))
+        query_text = f"{persona} {job_to_be_done}"
+        result_key = None
+        if self.result_cache is not None:
+            with self.recorder.stage('result_cache'):
+                result_key, cached = self._cached_result(self._collection_key(pdf_paths), query_text)
+            if cached is not None:
+                output = self._serve_cached(cached, persona, job_to_be_done, start_time)
+                output['metadata']['performance'] = self.recorder.summary()
+                self._end_run()
+                return output
+        if time_budget:
+            self.scheduler = DeadlineScheduler(time_budget, self.extractor.backend, self.workers, run_start)
+        page_selection = None
+        if self.page_budget:
+            index_status = None
+            all_sections, input_files, page_selection = self.prepare_candidates(pdf_paths, query_text)
+        else:
+            all_sections, input_files, index_status = self.prepare_collection(pdf_paths)
+        
+        self._print_section_total()
         
         if not all_sections:
             print("No sections found in any documents!")
-            return self._create_empty_output(input_files, persona, job_to_be_done, start_time)
+            output = self._create_empty_output(input_files, persona, job_to_be_done, start_time)
+            self._add_run_metadata(output, index_status, None, page_selection)
+            self._end_run()
+            return output
 
+        self._ensure_index(all_sections, input_files)
         print("Calculating relevance scores...")
-        all_sections = self.ranker.calculate_relevance_scores(all_sections, persona, job_to_be_done)
+        scoring_start = time.perf_counter()
+        with self.recorder.stage('scoring', queries=1):
+            ranked = self.ranker.rank_query(all_sections, query_text, self._ranked_needed())
+        scoring_ms = round((time.perf_counter() - scoring_start) * 1000, 2)
 
         print("Extracting subsections...")
-        subsections = self.extractor.extract_subsections(all_sections)
-        subsections = self.ranker.rank_subsections(subsections)
+        with self.recorder.stage('subsections'):
+            subsections = self.extractor.extract_subsections(ranked)
+            subsections = self.ranker.rank_subsections(self.ranker.index, query_text, subsections,
+                                                       self.top_subsections)
         
         processing_time = round(time.time() - start_time, 2)
         print(f"Processing completed in {processing_time} seconds")
         
-        output = {
+        output = self._build_output(input_files, ranked, subsections, persona, job_to_be_done,
+                                    len(pdf_paths), self.deduplication, processing_time)
+        self._add_run_metadata(output, index_status, scoring_ms, page_selection)
+        self._store_result(result_key, output)
+        self._end_run()
+        return output
+    
+    def process_queries(self, pdf_paths: List[str], queries: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Answer many persona/job queries against one extraction pass and one vectorizer fit.
+        
+        Each query is a dict with 'persona', 'job_to_be_done' and an optional
+        'id'. All queries are scored in a single sections x queries product;
+        one output dict is returned per query, in input order, with the shared
+        and per-query timings under metadata.timing.
+        """
+        start_time = time.time()
+        
+        print("Starting batch document intelligence processing...")
+        print(f"Processing {len(pdf_paths)} documents for {len(queries)} queries")
+        
+        self._start_run('batch', documents=len(pdf_paths), queries=len(queries))
+        
+        all_sections, input_files, index_status = self.prepare_collection(pdf_paths)
+        preparation_seconds = round(time.time() - start_time, 2)
+        self._print_section_total()
+        
+        if not all_sections:
+            print("No sections found in any documents!")
+            outputs = []
+            for query in queries:
+                output = self._create_empty_output(input_files, query['persona'], query['job_to_be_done'], start_time)
+                self._add_run_metadata(output, index_status, None)
+                outputs.append(output)
+            self._end_run()
+            return outputs
+        
+        self._ensure_index(all_sections, input_files)
+        print(f"Scoring {len(queries)} queries...")
+        scoring_start = time.perf_counter()
+        query_texts = [f"{query['persona']} {query['job_to_be_done']}" for query in queries]
+        with self.recorder.stage('scoring', queries=len(queries)):
+            scores = self.ranker.score_queries(all_sections, query_texts)
+        scoring_ms = round((time.perf_counter() - scoring_start) * 1000, 2)
+        
+        outputs = []
+        for column, query in enumerate(queries):
+            query_start = time.perf_counter()
+            with self.recorder.stage('ranking'):
+                ranked = self.ranker.rank_sections(all_sections, scores[:, column], self._ranked_needed())
+            with self.recorder.stage('subsections'):
+                subsections = self.ranker.rank_subsections(self.ranker.index, query_texts[column],
+                                                           self.extractor.extract_subsections(ranked),
+                                                           self.top_subsections)
+            query_ms = round((time.perf_counter() - query_start) * 1000, 2)
+            
+            output = self._build_output(input_files, ranked, subsections, query['persona'], query['job_to_be_done'],
+                                        len(pdf_paths), self.deduplication, round(time.time() - start_time, 2))
+            if 'id' in query:
+                output['metadata']['query_id'] = query['id']
+            output['metadata']['timing'] = {
+                'shared_preparation_seconds': preparation_seconds,
+                'batch_scoring_ms': scoring_ms,
+                'query_ms': query_ms
+            }
+            outputs.append(output)
+        
+        for output in outputs:
+            self._add_run_metadata(output, index_status, None)
+        self._end_run()
+        print(f"Batch completed in {round(time.time() - start_time, 2)} seconds")
+        return outputs
+    
+    def load_collection(self, pdf_paths: List[str]) -> Dict[str, Any]:
+        """Extract (or load) a collection and pin its sections and fitted index together.
+        
+        The returned snapshot is self-contained, so a long-running caller can
+        keep answering queries against it while a replacement is being built.
+        """
+        self._start_run('load', documents=len(pdf_paths))
+        collection_key = self._collection_key(pdf_paths) if self.result_cache is not None else None
+        all_sections, input_files, index_status = self.prepare_collection(pdf_paths)
+        if not self._extraction_complete():
+            collection_key = None  # answers from a partial collection are not cached
+        index = None
+        if all_sections and self._ensure_index(all_sections, input_files):
+            index = self.ranker.index
+        self._end_run()
+        return {
+            'pdf_paths': list(pdf_paths),
+            'sections': index.sections if index else all_sections,
+            'input_files': input_files,
+            'index': index,
+            'deduplication': self.deduplication,
+            'index_status': index_status,
+            'result_key': collection_key,
+            'loaded_at': datetime.now().isoformat()
+        }
+    
+    def query(self, collection: Dict[str, Any], persona: str, job_to_be_done: str) -> Dict[str, Any]:
+        """Answer one persona/job query against a collection from load_collection.
+        
+        Only the query and candidate sentences are vectorized; section dicts and the index are read but
+        never modified, so concurrent queries may share one collection. With a result_cache, repeated
+        queries are answered from it.
+        """
+        start_time = time.time()
+        query_start = time.perf_counter()
+        index = collection['index']
+        if index is None:
+            return self._create_empty_output(collection['input_files'], persona, job_to_be_done, start_time)
+        
+        query_text = f"{persona} {job_to_be_done}"
+        result_key, cached = self._cached_result(collection.get('result_key'), query_text)
+        if cached is not None:
+            output = self._serve_cached(cached, persona, job_to_be_done, start_time)
+            output['metadata']['timing'] = {'query_ms': round((time.perf_counter() - query_start) * 1000, 2)}
+            return output
+        ranked = self.ranker.rank_index(index, query_text, self._ranked_needed())
+        subsections = self.ranker.rank_subsections(index, query_text, self.extractor.extract_subsections(ranked),
+                                                   self.top_subsections)
+        output = self._build_output(collection['input_files'], ranked, subsections, persona, job_to_be_done,
+                                    len(collection['pdf_paths']), collection['deduplication'],
+                                    round(time.time() - start_time, 2))
+        output['metadata']['timing'] = {'query_ms': round((time.perf_counter() - query_start) * 1000, 2)}
+        self._store_result(result_key, output)
+        return output
+    
+    def _end_run(self) -> None:
+        """Log the run's stage totals and peak memory to the trace."""
+        summary = self.recorder.summary()
+        summary.pop('documents')
+        self.recorder.event('run_end', **summary)
+    
+    def _ensure_index(self, sections: SectionStore, input_files: List[Dict[str, Any]]) -> bool:
+        """Fit the ranker on sections unless its index already covers them; False if fitting failed."""
+        with self.recorder.stage('vectorization'):
+            try:
+                if not self.ranker.index_covers(sections):
+                    self.ranker.build_index(sections, input_files=input_files)
+                return True
+            except ValueError as e:
+                print(f"Warning: could not fit ranker: {e}")
+                return False
+    
+    def _ranked_needed(self) -> int:
+        """How many top sections must be ranked: enough for the output and for subsections."""
+        return max(self.top_sections, SUBSECTION_SOURCE_SECTIONS)
+    
+    def _print_section_total(self) -> None:
+        """Log the sections found by the last prepare_collection and the near-duplicates collapsed."""
+        deduplication = self.deduplication
+        print(f"\nTotal sections extracted: {len(deduplication.sections)}"
+              + (f" ({deduplication.eliminated} near-duplicates collapsed)" if deduplication.eliminated else ""))
+    
+    def _build_output(self, input_files: List[Dict[str, Any]], ranked_sections: List[Dict[str, Any]],
+                      subsections: List[Dict[str, Any]], persona: str, job_to_be_done: str,
+                      total_documents: int, deduplication: Deduplication, processing_time: float) -> Dict[str, Any]:
+        """Assemble the output JSON structure from ranked sections and subsections.
+        
+        A ranked section standing for near-duplicates lists their document and
+        page under 'duplicate_locations'.
+        """
+        extracted_sections = []
+        for section in ranked_sections[:self.top_sections]:
+            extracted_sections.append({
+                'document_name': section['document_name'],
+                'page_number': section['page_number'],
+                'section_title': section['section_title'],
+                'importance_rank': section['importance_rank'],
+                'relevance_score': round(section['relevance_score'], 4)
+            })
+            locations = deduplication.other_locations(section['section_index'])
+            if locations:
+                extracted_sections[-1]['duplicate_locations'] = locations
+        return {
             'metadata': {
                 'input_files': input_files,
                 'persona': persona,
                 'job_to_be_done': job_to_be_done,
                 'timestamp': datetime.now().isoformat(),
                 'processing_time_seconds': processing_time,
-                'total_sections_found': len(all_sections),
-                'total_documents': len(pdf_paths),
+                'total_sections_found': len(deduplication.sections),
+                'total_documents': total_documents,
                 'successful_documents': len(input_files)
             },
-            'extracted_sections': [
-                {
-                    'document_name': section['document_name'],
-                    'page_number': section['page_number'],
-                    'section_title': section['section_title'],
-                    'importance_rank': section['importance_rank'],
-                    'relevance_score': round(section['relevance_score'], 4)
-                }
-                for section in all_sections[:15]  # Top 15 sections
-            ],
+            'extracted_sections': extracted_sections,
             'subsection_analysis': [
                 {
                     'document': subsection['document'],
@@ -106,11 +1077,46 @@ class DocumentIntelligenceProcessor:
                     'parent_section': subsection.get('parent_section', ''),
                     'relevance_score': round(subsection['relevance_score'], 4)
                 }
-                for subsection in subsections[:20]  
+                for subsection in subsections[:self.top_subsections]
             ]
         }
+    
+    def _add_run_metadata(self, output: Dict[str, Any], index_status: Optional[str],
+                          scoring_ms: Optional[float], page_selection: Optional[Dict[str, Any]] = None) -> None:
+        """Attach cache, index, page selection, deadline, dedup and performance details to an output's metadata."""
+        output['metadata']['ranker'] = self.ranker.engine
+        output['metadata']['performance'] = self.recorder.summary()
+        if self.cache:
+            output['metadata']['cache'] = self.cache.stats()
+        if index_status:
+            output['metadata']['index'] = {'status': index_status}
+            if scoring_ms is not None:
+                output['metadata']['index']['scoring_ms'] = scoring_ms
+        if page_selection:
+            output['metadata']['page_selection'] = page_selection
+        if self.scheduler is not None:
+            output['metadata']['time_budget'] = self.scheduler.report()
+        if self.dedup_params and self.deduplication is not None:
+            output['metadata']['deduplication'] = self._dedup_report()
+    
+    def _dedup_report(self) -> Dict[str, Any]:
+        """Near-duplicate counts and time for the metadata.
         
-        return output
+        Vectorizing and scoring grow linearly with the sections ranked, so the
+        time saved is estimated as this run's ranking time scaled by the
+        eliminated share.
+        """
+        stages = self.recorder.stages
+        ranked = len(self.deduplication.representatives)
+        ranking_seconds = sum(stages.get(name, 0.0) for name in ('vectorization', 'scoring', 'ranking'))
+        return {
+            **self.deduplication.stats(),
+            'threshold': self.dedup_params['threshold'],
+            'dedup_seconds': round(stages.get('deduplication', 0.0), 4),
+            'estimated_ranking_seconds_saved': (
+                round(ranking_seconds * self.deduplication.eliminated / ranked, 4) if ranked else 0.0
+            )
+        }
     
     def _create_empty_output(self, input_files: List[Dict], persona: str, 
                            job_to_be_done: str, start_time: float) -> Dict[str, Any]:
@@ -131,11 +1137,38 @@ class DocumentIntelligenceProcessor:
         }
     
     def save_output(self, output: Dict[str, Any], output_path: str) -> None:
-        """Save the output to a JSON file."""
+        """Save the output to a JSON file.
+        
+        The time taken to encode the output is recorded as the 'serialization'
+        stage of its metadata.performance block before it is written.
+        """
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
+        serialization_start = time.perf_counter()
+        data = json.dumps(output, indent=2, ensure_ascii=False)
+        serialization_seconds = time.perf_counter() - serialization_start
+        self.recorder.add_stage_time('serialization', serialization_seconds)
+        performance = output['metadata'].get('performance')
+        if performance is not None:
+            performance['stages']['serialization'] = round(serialization_seconds, 4)
+            data = json.dumps(output, indent=2, ensure_ascii=False)
+        
         with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+            f.write(data)
+        self.recorder.event('output_written', path=str(output_file), serialization_seconds=round(serialization_seconds, 6))
+        
+        print(f"Results saved to: {output_file}")
+    
+    def save_ndjson(self, outputs: List[Dict[str, Any]], output_path: str) -> None:
+        """Save several outputs as newline-delimited JSON, one result per line."""
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self.recorder.stage('serialization', outputs=len(outputs)):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for output in outputs:
+                    f.write(json.dumps(output, ensure_ascii=False) + '\n')
+        self.recorder.event('output_written', path=str(output_file))
         
         print(f"Results saved to: {output_file}")
\ No newline at end of file
@@ -1,64 +1,214 @@
 #!/usr/bin/env python3
 """
 Relevance Ranker
-Ranks sections based on persona and job-to-be-done using TF-IDF and cosine similarity.
+Ranks sections based on persona and job-to-be-done using TF-IDF cosine similarity or BM25.
 """
 
-from typing import Dict, List, Any
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import Dict, List, Any, Optional, Union
 import numpy as np
 
+from config import RANKER, BM25_PARAMS, HASHING_FEATURES
+
+from .bm25 import BM25Index
+from .hashing import HashingIndex, HashingIndexBuilder
+from .index import CorpusIndex, top_k_indices
+from .options import RANKERS
+from .sections import SectionStore
+
+TFIDF_PARAMS = {
+    'max_features': 1000,
+    'stop_words': 'english',
+    'ngram_range': (1, 2),
+    'min_df': 1,
+    'max_df': 0.95
+}
+SectionIndex = Union[CorpusIndex, BM25Index, HashingIndex]
+
 
 class RelevanceRanker:
-    """Ranks sections based on persona and job-to-be-done relevance."""
+    """Ranks sections based on persona and job-to-be-done relevance.
+    
+    The 'tfidf' engine fits a TfidfVectorizer into a CorpusIndex; the 'bm25'
+    engine builds a BM25Index, whose inverted index lets single queries be
+    answered with top-k pruning instead of scoring every section. The
+    'hashing' engine builds a HashingIndex incrementally, one document at a
+    time, without a vocabulary (see index_builder).
+    """
+    
+    def __init__(self, engine: str = RANKER):
+        if engine not in RANKERS:
+            raise ValueError(f"Unknown ranker '{engine}', expected one of {RANKERS}")
+        self.engine = engine
+        self._vectorizer = None
+        self.index: Optional[SectionIndex] = None
+    
+    @property
+    def vectorizer(self):
+        """The TfidfVectorizer the 'tfidf' engine fits, created (and scikit-learn imported) on first use."""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+        return self._vectorizer
+    
+    def settings(self) -> Dict[str, Any]:
+        """Everything about the engine that determines a built index."""
+        if self.engine == 'bm25':
+            return {'engine': 'bm25', **BM25_PARAMS}
+        if self.engine == 'hashing':
+            return {'engine': 'hashing', 'n_features': HASHING_FEATURES, 'ngram_range': [1, 2]}
+        return {'engine': 'tfidf', **TFIDF_PARAMS}
     
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
-            max_features=1000,
-            stop_words='english',
-            ngram_range=(1, 2),
-            min_df=1,
-            max_df=0.95
+    def build_index(self, sections: SectionStore, fingerprint: Optional[str] = None,
+                    input_files: Optional[List[Dict[str, Any]]] = None) -> SectionIndex:
+        """Fit the engine once on a collection's section texts and keep the index."""
+        if self.engine == 'bm25':
+            self.index = BM25Index.build(sections, fingerprint=fingerprint, input_files=input_files, **BM25_PARAMS)
+            return self.index
+        if self.engine == 'hashing':
+            builder = self.index_builder()
+            builder.add(sections)
+            self.index = builder.finish(fingerprint=fingerprint, input_files=input_files)
+            return self.index
+        
+        tfidf_matrix = self.vectorizer.fit_transform(sections.full_texts())
+        self.index = CorpusIndex.from_vectorizer(
+            self.vectorizer, tfidf_matrix, sections, fingerprint=fingerprint, input_files=input_files
         )
+        return self.index
+    
+    def update_index(self, index: SectionIndex, rows: np.ndarray, sections: SectionStore,
+                     order: Optional[np.ndarray] = None, fingerprint: Optional[str] = None,
+                     input_files: Optional[List[Dict[str, Any]]] = None) -> SectionIndex:
+        """Index of the given rows of index followed by new sections, e.g. after some PDFs changed.
+
+        order, if given, permutes those kept-then-new sections into the new
+        index's row order. A hashing index is patched and only the new
+        sections are vectorized. The other engines' collection-wide
+        statistics (capped vocabulary, IDF, average length) depend on every
+        section, so they are refitted on the kept and new sections; either
+        way no unchanged PDF is re-extracted.
+        """
+        if self.engine == 'hashing':
+            self.index = index.patch(rows, sections, order=order, fingerprint=fingerprint, input_files=input_files)
+            return self.index
+        sections = SectionStore.concat([index.sections.take(rows), sections])
+        return self.build_index(sections.take(order) if order is not None else sections,
+                                fingerprint=fingerprint, input_files=input_files)
+
+    def index_builder(self) -> Optional[HashingIndexBuilder]:
+        """An incremental builder for engines that can index sections as they are extracted, else None.
+        
+        Feed it each document's sections with add(), then pass the result of
+        its finish() to use_index().
+        """
+        if self.engine == 'hashing':
+            settings = self.settings()
+            return HashingIndexBuilder({'n_features': settings['n_features'], 'ngram_range': settings['ngram_range']})
+        return None
+    
+    def load_index(self, index_dir: str) -> Optional[SectionIndex]:
+        """Read this engine's stored index from index_dir, or None."""
+        if self.engine == 'bm25':
+            return BM25Index.load(index_dir)
+        if self.engine == 'hashing':
+            return HashingIndex.load(index_dir)
+        return CorpusIndex.load(index_dir)
     
-    def calculate_relevance_scores(self, sections: List[Dict[str, Any]], 
+    def use_index(self, index: SectionIndex) -> None:
+        """Score against a previously built (e.g. loaded from disk) index."""
+        self.index = index
+    
+    def index_covers(self, sections: SectionStore) -> bool:
+        """Whether the current index was built from this section store."""
+        return self.index is not None and self.index.sections is sections
+    
+    def calculate_relevance_scores(self, sections: SectionStore, 
                                  persona: str, job_to_be_done: str) -> List[Dict[str, Any]]:
-        """Calculate relevance scores based on persona and job-to-be-done."""
-        if not sections:
-            return sections
-            
+        """Calculate relevance scores based on persona and job-to-be-done.
+        
+        Returns every section as a dict, best first, with relevance_score and
+        importance_rank filled in. The vectorizer is fitted only when no index
+        exists for these sections; otherwise only the query is transformed
+        and scored.
+        """
         # Combine persona and job description for relevance matching
-        query_text = f"{persona} {job_to_be_done}"
+        return self.rank_query(sections, f"{persona} {job_to_be_done}")
+    
+    def score_queries(self, sections: SectionStore, query_texts: List[str]) -> np.ndarray:
+        """Score many queries at once; returns a (sections x queries) similarity matrix.
         
-        # Prepare texts for vectorization
-        section_texts = [section['full_text'] for section in sections]
-        all_texts = section_texts + [query_text]
+        Rows follow the order of sections. The vectorizer is fitted only when
+        no index covers these sections.
+        """
+        scores = np.zeros((len(sections), len(query_texts)))
+        if not len(sections) or not query_texts:
+            return scores
         
         try:
-            tfidf_matrix = self.vectorizer.fit_transform(all_texts)
-          
-            query_vector = tfidf_matrix[-1]
-            section_vectors = tfidf_matrix[:-1]
-            
-            similarities = cosine_similarity(section_vectors, query_vector).flatten()
-
-            for i, section in enumerate(sections):
-                section['relevance_score'] = float(similarities[i])
-
-            sections.sort(key=lambda x: x['relevance_score'], reverse=True)
-            for i, section in enumerate(sections):
-                section['importance_rank'] = i + 1
-                
+            if not self.index_covers(sections):
+                self.build_index(sections)
+            scores = self.index.score_many(query_texts)
         except Exception as e:
             print(f"Error calculating relevance scores: {e}")
-            for i, section in enumerate(sections):
-                section['relevance_score'] = 0.0
-                section['importance_rank'] = i + 1
         
-        return sections
+        return scores
     
-    def rank_subsections(self, subsections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Rank subsections by their relevance scores."""
-        subsections.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return subsections
+    def rank_sections(self, sections: SectionStore, scores: np.ndarray,
+                      top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the top_k sections by score as dicts, with relevance and rank filled in.
+        
+        Only the winners are materialised from the store, so the same
+        sections can be ranked for several queries. Ties keep their original
+        order.
+        """
+        return [
+            sections.section(i, float(scores[i]), rank)
+            for rank, i in enumerate(top_k_indices(scores, top_k), 1)
+        ]
+    
+    def rank_query(self, sections: SectionStore, query_text: str,
+                   top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank sections for one query, like score_queries followed by rank_sections.
+        
+        When the current index covers the sections, it is queried directly;
+        this lets a BM25 index prune instead of scoring every section.
+        """
+        if self.index_covers(sections):
+            try:
+                return self.rank_index(self.index, query_text, top_k)
+            except Exception as e:
+                print(f"Error calculating relevance scores: {e}")
+        return self.rank_sections(sections, self.score_queries(sections, [query_text])[:, 0], top_k)
+    
+    def rank_index(self, index: SectionIndex, query_text: str,
+                   top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank an index's own sections for one query."""
+        if top_k is not None and hasattr(index, 'top_k'):
+            indices, scores = index.top_k(query_text, top_k)
+            return [
+                index.sections.section(i, float(score), rank)
+                for rank, (i, score) in enumerate(zip(indices, scores), 1)
+            ]
+        return self.rank_sections(index.sections, index.score(query_text), top_k)
+    
+    def rank_subsections(self, index: Optional[SectionIndex], query_text: str, subsections: List[Dict[str, Any]],
+                         top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Score candidate sentences against a query and keep the top_k, best first.
+        
+        All candidates are transformed together with the index's fitted
+        weights and scored in one sparse product, so thousands of sentences
+        cost about as much as one query over a small collection. Ties keep
+        their original order.
+        """
+        if not subsections:
+            return []
+        scores = np.zeros(len(subsections))
+        if index is not None:
+            try:
+                scores = index.score_texts([s['refined_text'] for s in subsections], query_text)
+            except Exception as e:
+                print(f"Error scoring subsections: {e}")
+        return [
+            {**subsections[i], 'relevance_score': float(scores[i])}
+            for i in top_k_indices(scores, top_k)
+        ]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Query Result Cache
+Finished outputs kept in an LRU cache, in memory and optionally on disk, keyed by a collection
+fingerprint and a normalised query.
+"""
+
+import os
+import re
+import copy
+import json
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from config import RESULT_CACHE_ENTRIES, RESULT_CACHE_MAX_BYTES
+
+from .storage import save_json, load_json
+
+# Bump whenever ranking or output assembly changes what a stored result would contain
+RESULT_FORMAT_VERSION = 3
+
+# Tokens as the rankers' vectorizers split them (two or more word characters)
+QUERY_TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+# Common function words, all in scikit-learn's English list that every ranker drops, so queries
+# that differ only in these have the same ranked terms (kept here to normalise without scikit-learn)
+QUERY_STOP_WORDS = frozenset("""
+    about above across after again against all also am among an and any are around as at be because been
+    before being below between both but by can could do down during each either else etc even ever every
+    for from further had has have he her here hers him his how however if in into is it its itself may me
+    might more most much must my myself no nor not now of off on once only onto or other our ours out over
+    own per please rather same she should since so some such than that the their them themselves then
+    there these they this those though through to too under until up upon us very via was we well were
+    what when where whether which while who whom whose why will with within without would yet you your
+    yours yourself
+""".split())
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop stop words and sort the remaining tokens (repeats kept).
+
+    Queries with the same normal form rank with the same terms, except that
+    word order is ignored on purpose: reordered queries are served the same
+    result even though the TF-IDF engine's word bigrams would differ.
+    """
+    tokens = [token for token in QUERY_TOKEN_PATTERN.findall(text.lower()) if token not in QUERY_STOP_WORDS]
+    return ' '.join(sorted(tokens))
+
+
+class ResultCache:
+    """LRU cache of query outputs by key(collection fingerprint, query).
+
+    The newest max_entries outputs are held in memory. With a cache_dir
+    every output is also written there as JSON, and least recently used
+    files are deleted once the directory exceeds max_bytes, so results
+    outlive the process. A changed document changes the collection
+    fingerprint, so its old results are never served again and age out.
+    Safe to share between threads (e.g. the query server's handlers).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = RESULT_CACHE_ENTRIES,
+                 max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(collection_fingerprint: str, query_text: str) -> str:
+        """Cache key of a query against a collection: digest of the fingerprint and the normalised query."""
+        material = json.dumps([RESULT_FORMAT_VERSION, collection_fingerprint, normalize_query(query_text)])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """A copy of the output stored under key, or None."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+        if result is None and self.cache_dir:
+            entry = self._entry_path(key)
+            try:
+                result = load_json(str(entry))
+                os.utime(entry)  # mark as recently used for LRU eviction
+            except (OSError, ValueError):
+                result = None
+            if result is not None:
+                self._remember(key, result)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a copy of an output under key, in memory and, with a cache_dir, on disk."""
+        result = copy.deepcopy(result)
+        self._remember(key, result)
+        if not self.cache_dir:
+            return
+        try:
+            save_json(str(self._entry_path(key)), result)
+        except OSError as e:
+            print(f"Warning: could not write result cache entry for {key[:12]}: {e}")
+            return
+        self._evict()
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache directory fits within max_bytes."""
+        entries = []
+        for entry in self.cache_dir.glob('*.json'):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                continue
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counts since the cache was created."""
+        return {'hits': self.hits, 'misses': self.misses, 'entries_in_memory': len(self._entries)}
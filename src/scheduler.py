@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Deadline Scheduler
+Plans document extraction against a time budget: cheapest documents first, cheaper extraction modes
+as the deadline gets close.
+"""
+
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from config import TIME_BUDGET_RESERVE, DEADLINE_PAGE_LIMIT, DEADLINE_PAGE_SECONDS, DEADLINE_DOCUMENT_SECONDS
+
+from .extractor import import_fitz
+
+# Weight of the newest measurement in the running cost estimates (the rest decays geometrically)
+MEASUREMENT_WEIGHT = 0.5
+
+
+def page_count(pdf_path: str) -> int:
+    """Number of pages from opening the PDF without parsing any page; 0 if it cannot be opened."""
+    try:
+        with import_fitz().open(pdf_path) as pdf:
+            return pdf.page_count
+    except Exception:
+        return 0
+
+
+def extraction_modes(backend: str, page_limit: int = DEADLINE_PAGE_LIMIT) -> List[Dict[str, Any]]:
+    """The degradation ladder, most thorough first, from the configured backend down to page-limited plain text."""
+    modes = [{'name': 'full', 'backend': backend, 'page_limit': None}]
+    if backend == 'pdfplumber':
+        modes.append({'name': 'span_layout', 'backend': 'pymupdf', 'page_limit': None})
+    if backend != 'text':
+        modes.append({'name': 'no_font_stats', 'backend': 'text', 'page_limit': None})
+    modes.append({'name': 'page_limit', 'backend': 'text', 'page_limit': page_limit})
+    return modes
+
+
+def limit_pages(pages: Optional[Set[int]], page_count: int, mode: Dict[str, Any]) -> Optional[Set[int]]:
+    """The page numbers a mode analyses out of pages (None: every page of a page_count-page PDF)."""
+    if mode['page_limit'] is None:
+        return pages
+    candidates = sorted(pages) if pages is not None else range(1, page_count + 1)
+    return set(list(candidates)[:mode['page_limit']])
+
+
+class DeadlineScheduler:
+    """Decides how, and whether, each document is extracted so that a run ends within its budget.
+
+    Extraction must finish by the deadline: the budget, measured from the
+    run's start, less the TIME_BUDGET_RESERVE share kept for deduplication,
+    ranking and output. Documents are started cheapest first by page count.
+    Each gets the most thorough mode of the ladder whose estimated cost fits
+    in the time left, both on its own worker and on all workers once the
+    work still running and the cheapest mode of the waiting documents (as
+    many as the time covers) are accounted for; failing that, the cheapest
+    mode if it fits on its own worker. The largest documents, coming last,
+    are the ones skipped once time runs out. A document costs a fixed
+    overhead plus a cost per page, per backend; both start at
+    DEADLINE_DOCUMENT_SECONDS and DEADLINE_PAGE_SECONDS and follow this
+    run's measurements as documents finish.
+    """
+
+    def __init__(self, budget: float, backend: str, workers: int = 1, start_time: Optional[float] = None,
+                 reserve: float = TIME_BUDGET_RESERVE, page_limit: int = DEADLINE_PAGE_LIMIT):
+        self.budget = budget
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.deadline = self.start_time + budget * (1 - reserve)
+        self.workers = max(1, workers)
+        self.modes = extraction_modes(backend, page_limit)
+        self.page_seconds = dict(DEADLINE_PAGE_SECONDS)
+        self.document_seconds = {backend: DEADLINE_DOCUMENT_SECONDS for backend in self.page_seconds}
+        self.documents: List[Dict[str, Any]] = []  # one record per planned document, in input order
+        self._base = 0  # position in documents of the current batch
+        self._measured: Set[str] = set()  # backends with a measured cost
+        self._waiting = deque()
+        self._running: Dict[int, Tuple[float, float]] = {}  # document -> (estimated cost, start time)
+
+    def remaining(self) -> float:
+        """Seconds left until the extraction deadline (negative once it has passed)."""
+        return self.deadline - time.perf_counter()
+
+    def cost(self, mode: Dict[str, Any], pages: int) -> float:
+        """Estimated seconds to extract a document of this many pages in the given mode."""
+        if mode['page_limit'] is not None:
+            pages = min(pages, mode['page_limit'])
+        return self.document_seconds[mode['backend']] + pages * self.page_seconds[mode['backend']]
+
+    def plan(self, filenames: List[str], page_counts: List[int]) -> None:
+        """Queue a batch of documents cheapest first, ties in input order; next() returns positions in filenames."""
+        self._base = len(self.documents)
+        self.documents.extend({'filename': filename, 'pages': pages, 'mode': None}
+                              for filename, pages in zip(filenames, page_counts))
+        self._waiting = deque(sorted(range(len(filenames)), key=lambda i: page_counts[i]))
+        self._running = {}
+
+    def waiting(self) -> bool:
+        return bool(self._waiting)
+
+    def next(self) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """The next scheduling decision: the cheapest waiting document and its mode, or None if it is skipped.
+
+        The time of all workers, less the work still running and this
+        document's cheapest mode, is held for the cheapest mode of as many
+        waiting documents as it covers, cheapest first; the document gets the
+        most thorough mode that fits in the rest. A document is skipped only
+        when not even its cheapest mode fits by the deadline, one document at
+        a time with the latest measurements rather than ahead of time on the
+        initial guesses, so the extraction time left unused is at most about
+        one cheapest-mode extraction.
+        """
+        now = time.perf_counter()
+        remaining = self.deadline - now
+        busy = sum(max(cost - (now - started), 0.0) for cost, started in self._running.values())
+        i = self._waiting.popleft()
+        document = self.documents[self._base + i]
+        pages = document['pages']
+        floor = self.modes[-1]
+        spare = remaining * self.workers - busy - self.cost(floor, pages)
+        for j in self._waiting:
+            held = self.cost(floor, self.documents[self._base + j]['pages'])
+            if held > spare:
+                break
+            spare -= held
+        for mode in self.modes:
+            cost = self.cost(mode, pages)
+            if cost <= remaining and (cost <= spare + self.cost(floor, pages) or mode is floor):
+                document['mode'] = mode['name']
+                self._running[i] = (cost, now)
+                return i, mode
+        document['mode'] = 'skipped'
+        return i, None
+
+    def finish(self, i: int, backend: str, result: Dict[str, Any]) -> None:
+        """Record a finished document and update its backend's per-document and per-page costs.
+
+        The per-page cost comes from the worker's own parse time; the rest of
+        the wall time from start to result (process hand-over, opening the
+        file, contention with the main process) is the per-document overhead.
+        Kept apart, the overhead of the small documents scheduled first does
+        not inflate the estimate for large ones. Each is a running average
+        weighted towards recent documents (MEASUREMENT_WEIGHT), replacing
+        the configured guess at the first measurement.
+        """
+        _, started = self._running.pop(i)
+        timings = result.get('timings')
+        if not result.get('pages') or not timings:
+            return
+        parse_seconds = timings['extraction_seconds'] + timings['heading_seconds']
+        overhead = max(time.perf_counter() - started - parse_seconds, 0.0)
+        rate = parse_seconds / result['pages']
+        if backend in self._measured:
+            overhead = MEASUREMENT_WEIGHT * overhead + (1 - MEASUREMENT_WEIGHT) * self.document_seconds[backend]
+            rate = MEASUREMENT_WEIGHT * rate + (1 - MEASUREMENT_WEIGHT) * self.page_seconds[backend]
+        self.document_seconds[backend], self.page_seconds[backend] = overhead, rate
+        self._measured.add(backend)
+
+    def abandon(self) -> List[int]:
+        """Give up on every running and waiting document at the deadline; returns their positions."""
+        abandoned = list(self._running) + list(self._waiting)
+        for i in self._running:
+            self.documents[self._base + i]['mode'] = 'timed_out'
+        for i in self._waiting:
+            self.documents[self._base + i]['mode'] = 'skipped'
+        self._running, self._waiting = {}, deque()
+        return abandoned
+
+    @property
+    def degraded(self) -> bool:
+        """Whether any document was extracted in a cheaper mode than full, or not at all."""
+        return any(document['mode'] not in (None, 'full') for document in self.documents)
+
+    def report(self) -> Dict[str, Any]:
+        """Budget, applied degradations and per-document modes for the output metadata."""
+        counts: Dict[str, int] = {}
+        for document in self.documents:
+            counts[document['mode']] = counts.get(document['mode'], 0) + 1
+        ladder = [mode['name'] for mode in self.modes] + ['skipped', 'timed_out']
+        return {
+            'budget_seconds': self.budget,
+            'extraction_deadline_seconds': round(self.deadline - self.start_time, 2),
+            'elapsed_seconds': round(time.perf_counter() - self.start_time, 2),
+            'degradations': [name for name in ladder[1:] if name in counts],
+            'documents_by_mode': {name: counts[name] for name in ladder if name in counts},
+            'degraded_documents': [
+                {'filename': document['filename'], 'pages': document['pages'], 'mode': document['mode']}
+                for document in self.documents if document['mode'] != 'full'
+            ]
+        }
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Page Screening
+Cheap first pass of coarse-to-fine extraction: picks the pages worth full layout analysis for a query.
+"""
+
+from typing import List, Optional, Set
+
+from .extractor import import_fitz
+from .index import top_k_indices
+from .ranker import RelevanceRanker
+from .sections import SectionStore
+
+
+def page_texts(pdf_path: str) -> Optional[List[str]]:
+    """Plain text of every page, in page order, without layout or font data.
+
+    None if the PDF cannot be read, or is damaged: repaired on opening yet
+    without text on every page, as PDFExtractor.extract_sections rejects it.
+    """
+    try:
+        with import_fitz().open(pdf_path) as pdf:
+            texts = [page.get_text().strip() for page in pdf]
+            repaired = pdf.is_repaired
+    except Exception as e:
+        print(f"Error screening pages of {pdf_path}: {e}")
+        return None
+    if repaired and not all(texts):
+        print(f"Error screening pages of {pdf_path}: damaged PDF: text on only "
+              f"{sum(1 for text in texts if text)} of {len(texts)} pages after repair")
+        return None
+    return texts
+
+
+def select_pages(documents: List[List[str]], query_text: str, budget: int, neighbours: int = 1) -> List[Set[int]]:
+    """Page numbers to analyse per document: the budget best pages overall and their neighbours.
+
+    documents holds each PDF's page_texts() ([] if unreadable). Pages are scored against the
+    query with the TF-IDF ranker, the budget highest-scoring pages across
+    the collection are kept, and every kept page brings up to neighbours
+    pages on either side along, since a section's heading may sit on the
+    page before its matching text. Pages without text are never selected.
+    """
+    names, numbers, texts = [], [], []
+    for document, pages in enumerate(documents):
+        for number, text in enumerate(pages, 1):
+            if text:
+                names.append(str(document))
+                numbers.append(number)
+                texts.append(text)
+    selected: List[Set[int]] = [set() for _ in documents]
+    if not texts or budget <= 0:
+        return selected
+
+    store = SectionStore.from_columns(names, numbers, [''] * len(texts), texts)
+    scores = RelevanceRanker('tfidf').score_queries(store, [query_text])[:, 0]
+    for i in top_k_indices(scores, budget):
+        document, number = int(names[i]), numbers[i]
+        pages = documents[document]
+        for page in range(max(1, number - neighbours), min(len(pages), number + neighbours) + 1):
+            if pages[page - 1]:
+                selected[document].add(page)
+    return selected
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Section Store
+Columnar, immutable storage of a collection's detected sections.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from .storage import save_arrays, load_arrays, save_json, load_json
+
+STORE_COLUMNS = ['doc_ids', 'page_numbers', 'starts', 'title_ends', 'ends', 'body_ends', 'text']
+
+
+class SectionStore:
+    """Sections as columns instead of one dict per heading.
+
+    Document names are interned once in `documents` and referenced by int32
+    `doc_ids`; page numbers are int32. Each section's text is stored once,
+    UTF-8 encoded in a single `text` buffer, as title + ' ' + content + '\n'
+    + body: text[starts[i]:ends[i]] is the section's full_text, the title
+    ends at title_ends[i] and the body (everything up to the next heading,
+    used for subsection scoring) ends at body_ends[i], so full_text is never
+    kept as a second copy. Strings are
+    decoded only when a section is read. The buffer is either bytes or a
+    uint8 array, such as the memory map opened by load().
+
+    A store is never modified after construction; take() and concat() build
+    new stores, so one store can be shared by concurrent queries.
+    """
+
+    def __init__(self, documents: List[str], doc_ids: np.ndarray, page_numbers: np.ndarray,
+                 text: Union[bytes, np.ndarray],
+                 starts: np.ndarray, title_ends: np.ndarray, ends: np.ndarray, body_ends: np.ndarray):
+        self.documents = documents
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        self.page_numbers = np.asarray(page_numbers, dtype=np.int32)
+        self.text = text
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.title_ends = np.asarray(title_ends, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.body_ends = np.asarray(body_ends, dtype=np.int64)
+
+    @classmethod
+    def from_columns(cls, document_names: Sequence[str], page_numbers: Sequence[int],
+                     titles: Sequence[str], contents: Sequence[str],
+                     bodies: Optional[Sequence[str]] = None) -> 'SectionStore':
+        """Build a store from parallel per-section columns; bodies default to empty."""
+        documents: Dict[str, int] = {}
+        doc_ids = np.fromiter((documents.setdefault(name, len(documents)) for name in document_names),
+                              dtype=np.int32, count=len(document_names))
+        encoded_titles = [title.encode('utf-8') for title in titles]
+        encoded_contents = [content.encode('utf-8') for content in contents]
+        title_lengths = np.fromiter(map(len, encoded_titles), dtype=np.int64, count=len(encoded_titles))
+        encoded_bodies = [body.encode('utf-8') for body in bodies] if bodies is not None else [b''] * len(titles)
+        content_lengths = np.fromiter(map(len, encoded_contents), dtype=np.int64, count=len(encoded_contents))
+        body_lengths = np.fromiter(map(len, encoded_bodies), dtype=np.int64, count=len(encoded_bodies))
+        body_ends = np.cumsum(title_lengths + content_lengths + body_lengths + 2)
+        ends = body_ends - body_lengths - 1
+        starts = ends - title_lengths - content_lengths - 1
+        text = b''.join(part for title, content, body in zip(encoded_titles, encoded_contents, encoded_bodies)
+                        for part in (title, b' ', content, b'\n', body))
+        return cls(list(documents), doc_ids, page_numbers, text, starts, starts + title_lengths, ends, body_ends)
+
+    @classmethod
+    def empty(cls) -> 'SectionStore':
+        return cls.from_columns([], [], [], [])
+
+    @classmethod
+    def concat(cls, stores: List['SectionStore']) -> 'SectionStore':
+        """One store with the sections of all stores, in order; document names are re-interned."""
+        stores = [store for store in stores if len(store)]
+        if len(stores) == 1:
+            return stores[0]
+        if not stores:
+            return cls.empty()
+        documents: Dict[str, int] = {}
+        doc_ids, starts, title_ends, ends, body_ends = [], [], [], [], []
+        shift = 0
+        for store in stores:
+            remap = np.array([documents.setdefault(name, len(documents)) for name in store.documents], dtype=np.int32)
+            doc_ids.append(remap[store.doc_ids])
+            # each store's text is copied whole, so its offsets shift by the text before it
+            starts.append(store.starts + shift)
+            title_ends.append(store.title_ends + shift)
+            ends.append(store.ends + shift)
+            body_ends.append(store.body_ends + shift)
+            shift += len(store.text)
+        return cls(list(documents), np.concatenate(doc_ids),
+                   np.concatenate([store.page_numbers for store in stores]),
+                   b''.join(store.text for store in stores),
+                   np.concatenate(starts), np.concatenate(title_ends), np.concatenate(ends),
+                   np.concatenate(body_ends))
+
+    def take(self, rows: Sequence[int]) -> 'SectionStore':
+        """A new store of the given sections, in the given order, with a compacted text buffer."""
+        rows = np.asarray(rows, dtype=np.int64)
+        return SectionStore.from_columns([self.document_name(i) for i in rows], self.page_numbers[rows],
+                                         [self.title(i) for i in rows], [self.content(i) for i in rows],
+                                         [self.body(i) for i in rows])
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def document_name(self, i: int) -> str:
+        return self.documents[self.doc_ids[i]]
+
+    def _decode(self, begin: int, end: int) -> str:
+        return bytes(self.text[begin:end]).decode('utf-8')
+
+    def title(self, i: int) -> str:
+        return self._decode(self.starts[i], self.title_ends[i])
+
+    def content(self, i: int) -> str:
+        return self._decode(self.title_ends[i] + 1, self.ends[i])
+
+    def body(self, i: int) -> str:
+        return self._decode(self.ends[i] + 1, self.body_ends[i])
+
+    def full_text(self, i: int) -> str:
+        return self._decode(self.starts[i], self.ends[i])
+
+    def full_texts(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Decode the full_text of sections start..stop one at a time, e.g. to feed a vectorizer."""
+        for begin, end in zip(self.starts[start:stop].tolist(), self.ends[start:stop].tolist()):
+            yield self._decode(begin, end)
+
+    def section(self, i: int, relevance_score: float = 0.0, importance_rank: int = 0) -> Dict[str, Any]:
+        """Section i as the dict consumed by subsection extraction and the JSON writer."""
+        title, content = self.title(i), self.content(i)
+        return {
+            'section_index': int(i),
+            'document_name': self.document_name(i),
+            'page_number': int(self.page_numbers[i]),
+            'section_title': title,
+            'content': content,
+            'full_text': title + ' ' + content,
+            'body': self.body(i),
+            'importance_rank': importance_rank,
+            'relevance_score': relevance_score
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Every section as a dict (the pre-columnar representation)."""
+        return [self.section(i) for i in range(len(self))]
+
+    def save(self, directory: str, prefix: str) -> None:
+        """Write the columns as flat <prefix>.<column>.npy files plus <prefix>.documents.json."""
+        text = self.text if isinstance(self.text, np.ndarray) else np.frombuffer(self.text, dtype=np.uint8)
+        save_arrays(directory, prefix, {
+            'doc_ids': self.doc_ids, 'page_numbers': self.page_numbers, 'starts': self.starts,
+            'title_ends': self.title_ends, 'ends': self.ends, 'body_ends': self.body_ends, 'text': text
+        })
+        save_json(str(Path(directory) / f'{prefix}.documents.json'), {'documents': self.documents})
+
+    @classmethod
+    def load(cls, directory: str, prefix: str, mmap: bool = True) -> 'SectionStore':
+        """Open a store written by save(); with mmap the columns and text stay on disk until read.
+
+        Raises OSError or ValueError if a file is missing or unreadable.
+        """
+        arrays = load_arrays(directory, prefix, STORE_COLUMNS, mmap=mmap)
+        documents = load_json(str(Path(directory) / f'{prefix}.documents.json'))['documents']
+        return cls(documents, arrays['doc_ids'], arrays['page_numbers'], arrays['text'],
+                   arrays['starts'], arrays['title_ends'], arrays['ends'], arrays['body_ends'])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the text buffer and column arrays (excluding the interned names)."""
+        return len(self.text) + sum(array.nbytes for array in (
+            self.doc_ids, self.page_numbers, self.starts, self.title_ends, self.ends, self.body_ends))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Document Intelligence Query Server
+Resident local HTTP/JSON service that keeps extracted sections and the fitted ranker warm.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .processor import DocumentIntelligenceProcessor
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Serves persona/job queries from an in-memory collection snapshot.
+
+    Endpoints (JSON bodies and responses):
+      GET  /health     collection size and load time
+      POST /query      {"persona", "job_to_be_done"} -> standard output JSON
+      POST /reload     {"pdf_paths"?: [...], "input_dir"?: "..."} re-extract changed PDFs
+      POST /documents  {"pdf_paths": [...]} add documents to the collection
+
+    Queries run concurrently, each against the snapshot that was current when
+    it arrived; reloads build a new snapshot and swap it in atomically.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, processor: DocumentIntelligenceProcessor, pdf_paths: List[str]):
+        super().__init__(address, QueryRequestHandler)
+        self.processor = processor
+        self.reload_lock = threading.Lock()
+        self.collection = processor.load_collection(pdf_paths)
+
+    def reload(self, pdf_paths: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Rebuild the collection (unchanged PDFs come from the section cache) and swap it in."""
+        with self.reload_lock:
+            paths = pdf_paths if pdf_paths is not None else self.collection['pdf_paths']
+            self.collection = self.processor.load_collection(paths)
+            return self.describe()
+
+    def add_documents(self, pdf_paths: List[str]) -> Dict[str, Any]:
+        """Append new PDFs to the current collection and reload it."""
+        with self.reload_lock:
+            current = self.collection['pdf_paths']
+            paths = current + [path for path in pdf_paths if path not in current]
+            self.collection = self.processor.load_collection(paths)
+            return self.describe()
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary of the current collection snapshot."""
+        collection = self.collection
+        return {
+            'status': 'ok',
+            'documents': len(collection['input_files']),
+            'sections': len(collection['sections']),
+            'index_status': collection['index_status'],
+            'loaded_at': collection['loaded_at']
+        }
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Routes JSON requests to the QueryServer."""
+
+    server: QueryServer
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, self.server.describe())
+        else:
+            self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {'error': f"invalid JSON body: {e}"})
+            return
+
+        try:
+            if self.path == '/query':
+                persona = body.get('persona')
+                job_to_be_done = body.get('job_to_be_done')
+                if not persona or not job_to_be_done:
+                    self._send_json(400, {'error': "'persona' and 'job_to_be_done' are required"})
+                    return
+                collection = self.server.collection
+                self._send_json(200, self.server.processor.query(collection, persona, job_to_be_done))
+            elif self.path == '/reload':
+                self._send_json(200, self.server.reload(_requested_paths(body)))
+            elif self.path == '/documents':
+                paths = _requested_paths(body)
+                if not paths:
+                    self._send_json(400, {'error': "'pdf_paths' or 'input_dir' is required"})
+                    return
+                self._send_json(200, self.server.add_documents(paths))
+            else:
+                self._send_json(404, {'error': f"unknown endpoint {self.path}"})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(body, dict):
+            raise ValueError("expected a JSON object")
+        return body
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # keep the console for processing output
+
+
+def _requested_paths(body: Dict[str, Any]) -> Optional[List[str]]:
+    """PDF paths named by a request body, either listed or found under input_dir."""
+    if body.get('pdf_paths'):
+        return [str(path) for path in body['pdf_paths']]
+    if body.get('input_dir'):
+        return sorted(str(path) for path in Path(body['input_dir']).rglob('*.pdf'))
+    return None
+
+
+def serve(processor: DocumentIntelligenceProcessor, pdf_paths: List[str],
+          host: str = '127.0.0.1', port: int = 8765) -> None:
+    """Load the collection once and answer requests until interrupted."""
+    server = QueryServer((host, port), processor, pdf_paths)
+    info = server.describe()
+    print(f"Serving {info['sections']} sections from {info['documents']} documents on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
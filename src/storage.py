@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Index Storage
+Flat .npy array files opened as memory maps, and atomic JSON metadata, for persisted indexes.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Dict, List, Any
+
+import numpy as np
+
+
+def _replace(path: Path, write) -> None:
+    """Write a file through a temporary name and rename it over path.
+
+    Readers that already mapped the old file keep its inode, so replacing an
+    index never truncates pages another process is reading.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.tmp{os.getpid()}')
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def save_arrays(directory: str, prefix: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Write each array as <prefix>.<name>.npy in directory."""
+    for name, array in arrays.items():
+        def write(tmp: Path, array=array) -> None:
+            with open(tmp, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+        _replace(Path(directory) / f'{prefix}.{name}.npy', write)
+
+
+def load_arrays(directory: str, prefix: str, names: List[str], mmap: bool = True) -> Dict[str, np.ndarray]:
+    """Open arrays written by save_arrays, read-only memory-mapped unless mmap is False.
+
+    Mapped arrays are paged in from the OS page cache on access and shared
+    between processes. Raises OSError or ValueError if a file is missing or
+    unreadable.
+    """
+    return {
+        name: np.load(Path(directory) / f'{prefix}.{name}.npy', mmap_mode='r' if mmap else None,
+                      allow_pickle=False)
+        for name in names
+    }
+
+
+def save_json(path: str, data: Dict[str, Any]) -> None:
+    """Write data as a JSON file, replacing any previous version atomically."""
+    def write(tmp: Path) -> None:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    _replace(Path(path), write)
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    """Read a JSON file; raises OSError or ValueError."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
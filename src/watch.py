@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Input Directory Watcher
+Polls a directory tree for added, changed and removed PDFs.
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+
+def scan_pdfs(input_dir: str) -> Dict[str, Tuple[int, int]]:
+    """(mtime_ns, size) of every PDF under input_dir, by path."""
+    snapshot = {}
+    for path in Path(input_dir).rglob('*.pdf'):
+        try:
+            stat = path.stat()
+        except OSError:  # removed while scanning
+            continue
+        snapshot[str(path)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def watch_changes(input_dir: str, interval: float) -> Iterator[Dict[str, Tuple[int, int]]]:
+    """Yield a new snapshot each time the PDFs under input_dir change; runs until interrupted.
+
+    Polling needs no platform-specific notification API. A change is only
+    reported once two consecutive scans agree, so PDFs that are still being
+    copied in are not picked up half-written.
+    """
+    current = scan_pdfs(input_dir)
+    while True:
+        time.sleep(interval)
+        snapshot = scan_pdfs(input_dir)
+        if snapshot == current:
+            continue
+        while True:
+            time.sleep(interval)
+            settled = scan_pdfs(input_dir)
+            if settled == snapshot:
+                break
+            snapshot = settled
+        current = snapshot
+        yield snapshot